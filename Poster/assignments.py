@@ -0,0 +1,135 @@
+# assignments.py
+
+import logging
+from datetime import datetime
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from callback_router import router, CLOSE_ASSIGNMENT
+from database import SessionLocal
+from models import Assignment, Submission
+from stats import count_assignment
+from utils.formatter import unescape_markdown
+
+logger = logging.getLogger(__name__)
+
+
+class ReviewerLoad:
+    """
+    Количество открытых назначений у каждого ответственного в памяти процесса.
+    Таблица assignments — источник истины: при запуске счётчики целиком
+    восстанавливаются одним агрегирующим запросом, а дальше обновляются
+    после каждого успешного коммита назначения.
+    """
+
+    def __init__(self):
+        self.counts = {}
+
+    def rebuild(self, session: Session = None) -> None:
+        own_session = session is None
+        session = session or SessionLocal()
+        try:
+            rows = (
+                session.query(Assignment.responsible_id, func.count(Assignment.id))
+                .filter(Assignment.status == 'open')
+                .group_by(Assignment.responsible_id)
+                .all()
+            )
+            self.counts = {responsible_id: count for responsible_id, count in rows}
+        finally:
+            if own_session:
+                session.close()
+        logger.info(f"Загружена нагрузка ответственных: {sum(self.counts.values())} открытых назначений.")
+
+    def load(self, responsible_id: int) -> int:
+        return self.counts.get(responsible_id, 0)
+
+    def pick(self, persons: list):
+        """
+        Ответственный с наименьшим числом открытых назначений.
+        При равной нагрузке выбирается добавленный раньше.
+        """
+        if not persons:
+            return None
+        return min(persons, key=lambda person: (self.load(person.telegram_id), person.id))
+
+    def apply(self, assigned: int = None, released: int = None) -> None:
+        """
+        Учитывает закоммиченное изменение: новое назначение и/или освобождение.
+        """
+        if assigned is not None:
+            self.counts[assigned] = self.load(assigned) + 1
+        if released is not None and self.load(released) > 0:
+            self.counts[released] -= 1
+
+
+reviewer_load = ReviewerLoad()
+
+
+def open_assignment(session: Session, submission_id: int) -> Assignment:
+    return (
+        session.query(Assignment)
+        .filter(Assignment.submission_id == submission_id, Assignment.status == 'open')
+        .first()
+    )
+
+
+def assign(session: Session, submission_id: int, responsible_id: int, assigned_by: str) -> tuple:
+    """
+    Назначает ответственного за заявку в рамках транзакции сессии. Открытое
+    назначение другому ответственному помечается как переданное.
+    Возвращает (назначение, id прежнего ответственного или None); если заявка
+    уже назначена этому ответственному, возвращает (None, None).
+    Счётчики нагрузки вызывающий код обновляет после коммита через reviewer_load.apply;
+    счётчики статистики обновляются здесь же и коммитятся вместе с назначением.
+    """
+    previous = open_assignment(session, submission_id)
+    if previous is not None and previous.responsible_id == responsible_id:
+        return None, None
+
+    now = datetime.utcnow()
+    released = None
+    latency = None
+    if previous is not None:
+        previous.status = 'reassigned'
+        previous.closed_at = now
+        released = previous.responsible_id
+    elif session.query(Assignment.id).filter(Assignment.submission_id == submission_id).first() is None:
+        # Время до назначения считается только для первого назначения заявки
+        submission = session.get(Submission, submission_id)
+        if submission is not None and submission.created_at is not None:
+            latency = (now - submission.created_at).total_seconds()
+
+    assignment = Assignment(submission_id=submission_id, responsible_id=responsible_id, assigned_by=assigned_by)
+    session.add(assignment)
+    session.flush()
+    count_assignment(session, responsible_id, latency)
+    return assignment, released
+
+
+def close_assignment(session: Session, assignment: Assignment) -> None:
+    """
+    Отмечает назначение проверенным, а заявку — одобренной.
+    """
+    now = datetime.utcnow()
+    assignment.status = 'closed'
+    assignment.closed_at = now
+    submission = session.get(Submission, assignment.submission_id)
+    if submission is not None and submission.approved_at is None:
+        submission.approved_at = now
+
+
+def assignment_notification(submission: Submission, assignment: Assignment) -> dict:
+    """
+    Параметры send_message для уведомления ответственного о назначении
+    с кнопкой, закрывающей назначение.
+    """
+    title = unescape_markdown(submission.title or '') or 'Без заголовка'
+    return {
+        'text': f"Вам назначена на проверку заявка #{submission.id}:\n\n{title}",
+        'reply_markup': InlineKeyboardMarkup([
+            [InlineKeyboardButton("✅ Проверено", callback_data=router.encode(CLOSE_ASSIGNMENT, assignment.id))]
+        ]),
+    }
@@ -0,0 +1,192 @@
+# backup.py
+#
+# Резервное копирование и восстановление базы данных SQLite.
+#
+# Использование из каталога Poster:
+#     python backup.py backup             — создать резервную копию
+#     python backup.py list               — показать имеющиеся копии
+#     python backup.py verify <файл>      — проверить целостность копии
+#     python backup.py restore <файл>     — восстановить базу из копии (бот должен быть остановлен)
+
+import glob
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime
+
+from config import (
+    DATABASE_PATH,
+    BACKUP_DIR,
+    BACKUP_KEEP,
+    BACKUP_COMPRESS,
+    BACKUP_PAGES_PER_STEP,
+    BACKUP_STEP_SLEEP,
+)
+
+logger = logging.getLogger(__name__)
+
+BACKUP_PREFIX = "drafts-"
+
+
+def _copy_database(source_path: str, target_path: str, pages: int = -1, sleep: float = 0.0) -> None:
+    """
+    Копирует базу через онлайн-API резервного копирования SQLite.
+    При pages > 0 копирование идёт шагами, между которыми блокировка источника отпускается.
+    """
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target, pages=pages, sleep=sleep)
+    finally:
+        target.close()
+        source.close()
+
+
+def check_integrity(path: str) -> None:
+    """
+    Проверяет целостность файла базы данных.
+    Выбрасывает ValueError, если файл повреждён или не содержит таблицы черновиков.
+    """
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        result = connection.execute("PRAGMA integrity_check").fetchone()[0]
+        if result != 'ok':
+            raise ValueError(f"Проверка целостности не пройдена: {result}")
+
+        table = connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'drafts'"
+        ).fetchone()
+        if not table:
+            raise ValueError("В резервной копии нет таблицы drafts.")
+    except sqlite3.DatabaseError as e:
+        raise ValueError(f"Файл не является корректной базой SQLite: {e}")
+    finally:
+        connection.close()
+
+
+def list_backups(backup_dir: str = BACKUP_DIR) -> list:
+    """
+    Возвращает пути к резервным копиям, от старых к новым. Недописанные
+    копии (*.tmp) не учитываются: их нельзя ни восстанавливать, ни ротировать.
+    """
+    paths = []
+    for suffix in ('.db', '.db.gz'):
+        paths += glob.glob(os.path.join(backup_dir, f"{BACKUP_PREFIX}*{suffix}"))
+    return sorted(paths)
+
+
+def rotate_backups(backup_dir: str = BACKUP_DIR, keep: int = BACKUP_KEEP) -> None:
+    """
+    Удаляет старые резервные копии, оставляя `keep` последних.
+    """
+    backups = list_backups(backup_dir)
+    for path in backups[:max(len(backups) - keep, 0)]:
+        os.remove(path)
+        logger.info(f"Удалена устаревшая резервная копия {path}.")
+
+
+def backup_database(backup_dir: str = BACKUP_DIR, compress: bool = BACKUP_COMPRESS) -> str:
+    """
+    Создаёт резервную копию рабочей базы, не блокируя пишущие обработчики надолго,
+    и выполняет ротацию старых копий. Возвращает путь к созданному файлу.
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    timestamp = datetime.utcnow().strftime('%Y%m%d-%H%M%S')
+    path = os.path.join(backup_dir, f"{BACKUP_PREFIX}{timestamp}.db")
+    temp_path = f"{path}.tmp"
+    temp_gz_path = f"{path}.gz.tmp"
+
+    try:
+        _copy_database(DATABASE_PATH, temp_path, pages=BACKUP_PAGES_PER_STEP, sleep=BACKUP_STEP_SLEEP)
+        check_integrity(temp_path)
+
+        if compress:
+            # Архив тоже пишется во временный файл и появляется под своим именем только целиком
+            path = f"{path}.gz"
+            with open(temp_path, 'rb') as source, gzip.open(temp_gz_path, 'wb') as target:
+                shutil.copyfileobj(source, target)
+            os.replace(temp_gz_path, path)
+        else:
+            os.replace(temp_path, path)
+    finally:
+        for leftover in (temp_path, temp_gz_path):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    rotate_backups(backup_dir)
+    return path
+
+
+def _unpack(backup_path: str, directory: str) -> str:
+    """
+    Возвращает путь к несжатому файлу копии, при необходимости распаковывая её в `directory`.
+    """
+    if not backup_path.endswith('.gz'):
+        return backup_path
+
+    unpacked = os.path.join(directory, 'restore.db')
+    with gzip.open(backup_path, 'rb') as source, open(unpacked, 'wb') as target:
+        shutil.copyfileobj(source, target)
+    return unpacked
+
+
+def verify_backup(backup_path: str) -> None:
+    """
+    Проверяет целостность резервной копии (в том числе сжатой).
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        check_integrity(_unpack(backup_path, directory))
+
+
+def restore_database(backup_path: str, target_path: str = DATABASE_PATH) -> None:
+    """
+    Восстанавливает базу из резервной копии. Копия проверяется до восстановления,
+    а результат — после. Бот на время восстановления должен быть остановлен.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        source_path = _unpack(backup_path, directory)
+        check_integrity(source_path)
+        _copy_database(source_path, target_path)
+
+    check_integrity(target_path)
+
+
+def main(argv: list) -> int:
+    logging.basicConfig(
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        level=logging.INFO
+    )
+    usage = "Использование: python backup.py backup | list | verify <файл> | restore <файл>"
+
+    if not argv:
+        print(usage)
+        return 1
+
+    command, args = argv[0], argv[1:]
+    try:
+        if command == 'backup':
+            print(f"Резервная копия создана: {backup_database()}")
+        elif command == 'list':
+            for path in list_backups():
+                print(path)
+        elif command == 'verify' and len(args) == 1:
+            verify_backup(args[0])
+            print("Резервная копия в порядке.")
+        elif command == 'restore' and len(args) == 1:
+            restore_database(args[0])
+            print(f"База {DATABASE_PATH} восстановлена из {args[0]}.")
+        else:
+            print(usage)
+            return 1
+    except (ValueError, OSError) as e:
+        print(f"Ошибка: {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,87 @@
+# benchmarks/bench_http_pool.py
+#
+# Сравнение пропускной способности send_message при разных настройках пула
+# HTTP-соединений. Запуск из каталога Poster:
+#
+#     python -m benchmarks.bench_http_pool --messages 500 --concurrency 64 --latency 0.02
+
+import argparse
+import asyncio
+import time
+
+from telegram import Bot
+
+from benchmarks.fake_bot_api import FakeBotAPI
+from http_pool import build_request
+
+# Конфигурации пула: (название, размер пула, время жизни keep-alive).
+# По умолчанию PTB создаёт для вызовов API пул на 256 соединений, для
+# getUpdates — на одно; keep-alive — стандартные для httpx 5 секунд.
+CONFIGS = [
+    ("pool=256 (API по умолчанию в PTB)", 256, 5.0),
+    ("pool=1 (как getUpdates в PTB)", 1, 5.0),
+    ("pool=4", 4, 30.0),
+    ("pool=16", 16, 30.0),
+    ("pool=64", 64, 30.0),
+    ("pool=256, keep-alive 30 с", 256, 30.0),
+    ("pool=16, без keep-alive", 16, 0.0),
+]
+
+
+async def run_config(server: FakeBotAPI, pool_size: int, keepalive_expiry: float,
+                     messages: int, concurrency: int) -> tuple:
+    request = build_request(
+        pool_size=pool_size,
+        connect_timeout=5,
+        read_timeout=30,
+        write_timeout=30,
+        # Большой pool_timeout, чтобы маленький пул ждал, а не падал
+        pool_timeout=60,
+        keepalive_expiry=keepalive_expiry,
+    )
+    bot = Bot("123:fake", base_url=server.base_url, request=request)
+    semaphore = asyncio.Semaphore(concurrency)
+    errors = 0
+
+    async def send(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            try:
+                await bot.send_message(chat_id=1000 + i % 50, text=f"Сообщение {i}")
+            except Exception:
+                errors += 1
+
+    connections_before = server.connections
+    async with bot:
+        started = time.perf_counter()
+        await asyncio.gather(*(send(i) for i in range(messages)))
+        elapsed = time.perf_counter() - started
+
+    return elapsed, errors, server.connections - connections_before
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк пула HTTP-соединений")
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--latency', type=float, default=0.02, help="Задержка ответа сервера, с")
+    args = parser.parse_args()
+
+    server = FakeBotAPI(latency=args.latency)
+    await server.start()
+
+    print(f"{args.messages} сообщений, параллелизм {args.concurrency}, задержка сервера {args.latency * 1000:.0f} мс")
+    print(f"{'Конфигурация':<34} {'Время, с':>9} {'Сообщ./с':>10} {'Соединений':>11} {'Ошибок':>7}")
+    for name, pool_size, keepalive_expiry in CONFIGS:
+        elapsed, errors, connections = await run_config(
+            server, pool_size, keepalive_expiry, args.messages, args.concurrency
+        )
+        print(f"{name:<34} {elapsed:>9.2f} {args.messages / elapsed:>10.1f} {connections:>11} {errors:>7}")
+
+    # HTTP/2 без TLS работает только в режиме prior knowledge, который
+    # локальный сервер не поддерживает, поэтому он в сравнении не участвует.
+    await server.stop()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
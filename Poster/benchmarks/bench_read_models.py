@@ -0,0 +1,127 @@
+# benchmarks/bench_read_models.py
+#
+# Чтение списков черновиков и удаление старых черновиков: ORM-запросы
+# в сравнении с подготовленными Core-запросами из read_models.py.
+# Запуск из каталога Poster:
+#
+#     python -m benchmarks.bench_read_models --users 2000 --drafts 20
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Бенчмарку не нужен настоящий бот, но config.py требует эти переменные
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123:fake")
+os.environ.setdefault("REVIEW_CHAT_ID", "-1")
+os.environ.setdefault("ADMIN_IDS", "1")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from base import Base
+from models import Draft
+from read_models import delete_old_drafts, draft_summaries
+
+CHUNK = 50000
+
+
+def fill(session, users: int, drafts: int, rng: random.Random) -> None:
+    """
+    Заполняет таблицу черновиками; примерно половина из них старше месяца.
+    """
+    table = Draft.__table__
+    now = datetime.utcnow()
+    batch = []
+    for user_id in range(users):
+        for number in range(drafts):
+            batch.append({
+                'user_id': user_id,
+                'title': f'Черновик {number} пользователя {user_id}',
+                'date': '25.12.2030',
+                'time_start': '18:30',
+                'time_end': '20:30',
+                'place_name': 'Площадка',
+                'place_url': 'https://example.com/place',
+                'text': 'Описание события ' * 20,
+                'contact': '@user',
+                'created_at': now - timedelta(days=rng.randint(0, 60)),
+            })
+            if len(batch) >= CHUNK:
+                session.execute(table.insert(), batch)
+                batch = []
+    if batch:
+        session.execute(table.insert(), batch)
+    session.commit()
+
+
+def measure_reads(session, users: int, read) -> tuple:
+    """
+    Читает черновики всех пользователей по очереди. Возвращает (строк, секунд).
+    """
+    rows = 0
+    started = time.perf_counter()
+    for user_id in range(users):
+        for draft in read(session, user_id):
+            # Как при формировании списка: обращаемся к отображаемым полям
+            rows += bool(draft.id and draft.title and draft.date)
+        # Как в обработчиках: сессия живёт долго, объекты в ней не копятся
+        session.expunge_all()
+    return rows, time.perf_counter() - started
+
+
+def orm_reads(session, user_id: int) -> list:
+    return session.query(Draft).filter(Draft.user_id == user_id).all()
+
+
+def orm_delete_old(session, cutoff: datetime) -> int:
+    old_drafts = session.query(Draft).filter(Draft.created_at < cutoff).all()
+    for draft in old_drafts:
+        session.delete(draft)
+    session.flush()
+    return len(old_drafts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк чтения и удаления черновиков: ORM и Core")
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--drafts', type=int, default=20, help="Черновиков у каждого пользователя")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Base.metadata.create_all(engine, tables=[Draft.__table__])
+        session = sessionmaker(bind=engine)()
+
+        started = time.perf_counter()
+        fill(session, args.users, args.drafts, random.Random(42))
+        print(f"Вставлено {args.users * args.drafts} черновиков за {time.perf_counter() - started:.1f} с")
+
+        # Прогрев: кэш скомпилированных запросов и страницы базы
+        measure_reads(session, min(args.users, 50), orm_reads)
+        measure_reads(session, min(args.users, 50), draft_summaries)
+
+        for name, read in (('ORM', orm_reads), ('Core', draft_summaries)):
+            rows, elapsed = measure_reads(session, args.users, read)
+            print(f"Чтение {name:<5}: {rows} строк за {elapsed:.2f} с, {rows / elapsed:,.0f} строк/с, "
+                  f"{elapsed / args.users * 1000:.2f} мс на список")
+
+        cutoff = datetime.utcnow() - timedelta(days=30)
+        for name in ('ORM', 'Core'):
+            started = time.perf_counter()
+            if name == 'ORM':
+                count = orm_delete_old(session, cutoff)
+            else:
+                count, _ = delete_old_drafts(session, cutoff)
+            elapsed = time.perf_counter() - started
+            print(f"Удаление {name:<5}: {count} строк за {elapsed:.2f} с, {count / elapsed:,.0f} строк/с")
+            # Откатываем, чтобы оба способа удаляли одни и те же строки
+            session.rollback()
+
+        session.close()
+
+
+if __name__ == '__main__':
+    main()
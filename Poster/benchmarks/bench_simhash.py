@@ -0,0 +1,107 @@
+# benchmarks/bench_simhash.py
+#
+# Поиск похожих заявок по полосам SimHash среди большого количества отпечатков
+# в сравнении с полным перебором. Запуск из каталога Poster:
+#
+#     python -m benchmarks.bench_simhash --rows 1000000 --lookups 200
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+# Бенчмарку не нужен настоящий бот, но config.py требует эти переменные
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123:fake")
+os.environ.setdefault("REVIEW_CHAT_ID", "-1")
+os.environ.setdefault("ADMIN_IDS", "1")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from base import Base
+from models import Submission
+from submissions import find_near_duplicates
+from utils.simhash import bands, hamming_distance, to_signed, to_unsigned
+
+CHUNK = 50000
+
+
+def fill(session, rows: int, rng: random.Random) -> list:
+    """
+    Заполняет таблицу случайными отпечатками. Возвращает часть из них для поиска.
+    """
+    samples = []
+    table = Submission.__table__
+    created_at = datetime.utcnow()
+    for start in range(0, rows, CHUNK):
+        batch = []
+        for _ in range(min(CHUNK, rows - start)):
+            value = rng.getrandbits(64)
+            band_values = bands(value)
+            batch.append({
+                'user_id': rng.randrange(10000),
+                'title': 'x',
+                'simhash': to_signed(value),
+                'simhash_band0': band_values[0],
+                'simhash_band1': band_values[1],
+                'simhash_band2': band_values[2],
+                'simhash_band3': band_values[3],
+                'created_at': created_at,
+            })
+            if len(samples) < 1000 and rng.random() < 0.01:
+                samples.append(value)
+        session.execute(table.insert(), batch)
+        session.commit()
+    return samples
+
+
+def flip_bits(value: int, count: int, rng: random.Random) -> int:
+    for bit in rng.sample(range(64), count):
+        value ^= 1 << bit
+    return value
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк поиска похожих заявок по SimHash")
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--lookups', type=int, default=200)
+    parser.add_argument('--scans', type=int, default=3, help="Количество запросов полным перебором")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Base.metadata.create_all(engine, tables=[Submission.__table__])
+        session = sessionmaker(bind=engine)()
+
+        started = time.perf_counter()
+        samples = fill(session, args.rows, rng)
+        print(f"Вставлено {args.rows} отпечатков за {time.perf_counter() - started:.1f} с")
+
+        # Запросы — известные отпечатки с 1–3 изменёнными битами: каждый должен найтись
+        queries = [flip_bits(rng.choice(samples), rng.randint(1, 3), rng) for _ in range(args.lookups)]
+
+        found = 0
+        started = time.perf_counter()
+        for value in queries:
+            found += bool(find_near_duplicates(session, value))
+        elapsed = time.perf_counter() - started
+        print(f"По полосам: {args.lookups} запросов, {elapsed / args.lookups * 1000:.2f} мс на запрос, "
+              f"найдено {found}/{args.lookups}")
+
+        started = time.perf_counter()
+        for value in queries[:args.scans]:
+            [
+                row for row in session.query(Submission.id, Submission.simhash).yield_per(CHUNK)
+                if hamming_distance(to_unsigned(row.simhash), value) <= 3
+            ]
+        elapsed = time.perf_counter() - started
+        print(f"Полный перебор: {args.scans} запросов, {elapsed / args.scans * 1000:.0f} мс на запрос")
+
+        session.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+# benchmarks/fake_bot_api.py
+
+import asyncio
+import itertools
+import json
+import random
+import re
+import time
+from urllib.parse import parse_qs
+
+# Ссылка MarkdownV2: внутри (...) экранируются только ')' и обратная косая черта
+MARKDOWN_V2_LINK = re.compile(r'\[([^\[\]]*)\]\(([^)]*)\)')
+# Парные символы разметки: жирный, курсив, зачёркивание, спойлер, код
+MARKDOWN_V2_ENTITIES = '*_~|`'
+# Символы, которые вне разметки Telegram принимает только экранированными
+MARKDOWN_V2_RESERVED = '[](){}#+-=.!'
+
+
+def markdown_v2_error(text: str):
+    """
+    Упрощённая проверка текста MarkdownV2 по правилам Telegram.
+    Возвращает описание ошибки, как в ответе Bot API, или None для корректного текста.
+    """
+    text = re.sub(r'\\.', '', text, flags=re.S)
+    text = MARKDOWN_V2_LINK.sub(r'\1', text)
+    for char in MARKDOWN_V2_ENTITIES:
+        if text.count(char) % 2:
+            return f"can't find end of the entity starting with '{char}'"
+    for char in MARKDOWN_V2_RESERVED:
+        if char in text:
+            return f"character '{char}' is reserved and must be escaped with the preceding '\\'"
+    if re.search(r'(?<!^)>', text, flags=re.M):
+        return "character '>' is reserved and must be escaped with the preceding '\\'"
+    return None
+
+
+class FakeBotAPI:
+    """
+    Локальный заменитель HTTP-сервера Telegram Bot API для бенчмарков.
+    Понимает HTTP/1.1 keep-alive и отвечает на вызовы правдоподобными объектами
+    с искусственной задержкой `latency` (в секундах), имитирующей сеть.
+
+    Тексты и подписи с parse_mode=MarkdownV2 проверяются markdown_v2_error():
+    неэкранированная разметка отклоняется ошибкой 400, как в Telegram.
+    С вероятностью `rate_limit_ratio` исходящий вызов отклоняется ошибкой 429
+    с retry_after = `retry_after`, как при превышении лимитов Telegram.
+    Обновления для бота добавляются через push_update() и отдаются в getUpdates
+    с long polling; все сообщения бота передаются в on_message(method, message).
+    """
+
+    # Вызовы, которые не подвергаются искусственному ограничению частоты
+    UNLIMITED_METHODS = ('getMe', 'getUpdates', 'deleteWebhook')
+
+    def __init__(self, latency: float = 0.0, rate_limit_ratio: float = 0.0, retry_after: int = 1,
+                 seed: int = None):
+        self.latency = latency
+        self.rate_limit_ratio = rate_limit_ratio
+        self.retry_after = retry_after
+        self.port = None
+        self.connections = 0
+        self.calls = {}
+        self.rate_limited = {}
+        self.rejected = {}
+        self.on_message = None
+        self._random = random.Random(seed)
+        self._server = None
+        self._message_ids = itertools.count(1)
+        self._update_ids = itertools.count(1)
+        self._updates = []
+        self._new_updates = asyncio.Event()
+        self._messages = {}
+        self.methods = {
+            'getMe': self._get_me,
+            'deleteWebhook': self._true,
+            'getUpdates': self._get_updates,
+            'sendMessage': self._send_message,
+            'sendPhoto': self._send_photo,
+            'sendMediaGroup': self._send_media_group,
+            'editMessageText': self._edit_message_text,
+            'editMessageCaption': self._edit_message_caption,
+            'answerCallbackQuery': self._true,
+            'deleteMessage': self._true,
+        }
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/bot"
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> None:
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b'\r\n\r\n')
+                request_line, *header_lines = head.decode('latin-1').split('\r\n')
+                _, path, _ = request_line.split(' ', 2)
+                headers = {}
+                for line in header_lines:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                params = self._parse_params(headers.get('content-type', ''), body)
+                method = path.rsplit('/', 1)[-1]
+
+                status, payload = await self._dispatch(method, params)
+                data = json.dumps(payload, ensure_ascii=False).encode()
+                writer.write(
+                    f"HTTP/1.1 {status}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: keep-alive\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _parse_params(content_type: str, body: bytes) -> dict:
+        """
+        Разбирает параметры запроса. python-telegram-bot передаёт параметры формой,
+        кодируя составные значения (reply_markup и т.п.) в JSON.
+        """
+        if not body:
+            return {}
+        if content_type.startswith('application/json'):
+            return json.loads(body)
+        if content_type.startswith('application/x-www-form-urlencoded'):
+            return {key: values[0] for key, values in parse_qs(body.decode()).items()}
+        return {}
+
+    def _markup_error(self, params: dict):
+        """
+        Проверяет разметку текста, подписи и подписей элементов альбома.
+        """
+        entries = [params]
+        if 'media' in params:
+            entries += self._json_param(params['media']) or []
+        for entry in entries:
+            if entry.get('parse_mode') != 'MarkdownV2':
+                continue
+            for field in ('text', 'caption'):
+                error = markdown_v2_error(entry.get(field) or '')
+                if error:
+                    return error
+        return None
+
+    async def _dispatch(self, method: str, params: dict):
+        self.calls[method] = self.calls.get(method, 0) + 1
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        handler = self.methods.get(method)
+        if handler is None:
+            return '404 Not Found', {'ok': False, 'error_code': 404, 'description': 'Not Found: method not found'}
+
+        if (self.rate_limit_ratio and method not in self.UNLIMITED_METHODS
+                and self._random.random() < self.rate_limit_ratio):
+            self.rate_limited[method] = self.rate_limited.get(method, 0) + 1
+            return '429 Too Many Requests', {
+                'ok': False,
+                'error_code': 429,
+                'description': f'Too Many Requests: retry after {self.retry_after}',
+                'parameters': {'retry_after': self.retry_after},
+            }
+
+        error = self._markup_error(params)
+        if error:
+            self.rejected[method] = self.rejected.get(method, 0) + 1
+            return '400 Bad Request', {
+                'ok': False,
+                'error_code': 400,
+                'description': f"Bad Request: can't parse entities: {error}",
+            }
+
+        result = handler(params)
+        if asyncio.iscoroutine(result):
+            result = await result
+        return '200 OK', {'ok': True, 'result': result}
+
+    def push_update(self, update: dict) -> int:
+        """
+        Добавляет обновление в очередь getUpdates и возвращает его update_id.
+        """
+        update['update_id'] = next(self._update_ids)
+        self._updates.append(update)
+        self._new_updates.set()
+        return update['update_id']
+
+    async def _get_updates(self, params: dict) -> list:
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        timeout = float(params.get('timeout') or 0)
+
+        # Обновления до offset подтверждены ботом и больше не нужны
+        if offset:
+            self._updates = [update for update in self._updates if update['update_id'] >= offset]
+
+        if not self._updates and timeout:
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[:limit]
+
+    def _true(self, params: dict) -> bool:
+        return True
+
+    def _get_me(self, params: dict) -> dict:
+        return {
+            'id': 1,
+            'is_bot': True,
+            'first_name': 'FakeBot',
+            'username': 'fake_bot',
+            'can_join_groups': True,
+            'can_read_all_group_messages': False,
+            'supports_inline_queries': True,
+        }
+
+    def _message(self, params: dict, **fields) -> dict:
+        chat_id = params.get('chat_id', 0)
+        try:
+            chat_id = int(chat_id)
+        except (TypeError, ValueError):
+            pass
+        message = {
+            'message_id': next(self._message_ids),
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': {'id': 1, 'is_bot': True, 'first_name': 'FakeBot', 'username': 'fake_bot'},
+        }
+        reply_markup = self._json_param(params.get('reply_markup'))
+        if reply_markup and 'inline_keyboard' in reply_markup:
+            message['reply_markup'] = reply_markup
+        message.update(fields)
+        self._messages[(chat_id, message['message_id'])] = message
+        return message
+
+    @staticmethod
+    def _json_param(value):
+        # Составные параметры в форме приходят JSON-строкой
+        if isinstance(value, str):
+            try:
+                return json.loads(value)
+            except ValueError:
+                return None
+        return value
+
+    @staticmethod
+    def _photo(file_id: str) -> list:
+        return [{'file_id': file_id, 'file_unique_id': file_id, 'width': 1280, 'height': 720}]
+
+    def _notify(self, method: str, message: dict) -> None:
+        if self.on_message:
+            self.on_message(method, message)
+
+    def _send_message(self, params: dict) -> dict:
+        message = self._message(params, text=params.get('text', ''))
+        self._notify('sendMessage', message)
+        return message
+
+    def _send_photo(self, params: dict) -> dict:
+        message = self._message(params, photo=self._photo(params.get('photo', '')), caption=params.get('caption'))
+        self._notify('sendPhoto', message)
+        return message
+
+    def _send_media_group(self, params: dict) -> list:
+        group_id = str(next(self._message_ids))
+        messages = []
+        for item in self._json_param(params.get('media')) or []:
+            message = self._message(
+                params, photo=self._photo(item.get('media', '')), caption=item.get('caption'), media_group_id=group_id
+            )
+            self._notify('sendMediaGroup', message)
+            messages.append(message)
+        return messages
+
+    def _edit_message(self, method: str, params: dict, **fields):
+        try:
+            key = (int(params.get('chat_id', 0)), int(params.get('message_id', 0)))
+        except (TypeError, ValueError):
+            return True
+        message = self._messages.get(key)
+        if message is None:
+            return True
+        message.update(fields)
+        message['edit_date'] = int(time.time())
+        reply_markup = self._json_param(params.get('reply_markup'))
+        if reply_markup:
+            message['reply_markup'] = reply_markup
+        else:
+            message.pop('reply_markup', None)
+        self._notify(method, message)
+        return message
+
+    def _edit_message_text(self, params: dict):
+        return self._edit_message('editMessageText', params, text=params.get('text', ''))
+
+    def _edit_message_caption(self, params: dict):
+        return self._edit_message('editMessageCaption', params, caption=params.get('caption'))
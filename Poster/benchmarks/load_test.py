@@ -0,0 +1,305 @@
+# benchmarks/load_test.py
+#
+# Сквозной нагрузочный тест: настоящий bot.py запускается отдельным процессом
+# и работает с локальным заменителем Bot API, а симулированные пользователи
+# проходят сценарий /start → /create_post → все шаги → «Отправить на согласование».
+# Запуск из каталога Poster:
+#
+#     python -m benchmarks.load_test --users 2000 --concurrency 200 --latency 0.01 --rate-limit 0.01
+#
+# С --album N на шаге картинки отправляется альбом из N фото, и проверяется,
+# что в чат согласования он дошёл целиком. Вместе с --throttle и паузой
+# пользователя это проверка того, что ограничитель не теряет части альбома:
+#
+#     python -m benchmarks.load_test --users 5 --concurrency 5 --throttle --think-time 1.1 --album 10
+
+import argparse
+import asyncio
+import itertools
+import os
+import signal
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_bot_api import FakeBotAPI
+
+REVIEW_CHAT_ID = -100500
+BOT_ADMIN_ID = 1
+FIRST_USER_ID = 100000
+
+# Шаги сценария: (название, действие, значение). Действие 'text' — сообщение
+# пользователя, 'button' — нажатие кнопки с этой надписью под последним сообщением бота.
+SCENARIO = [
+    ('start', 'text', '/start'),
+    ('create_post', 'text', '/create_post'),
+    ('title', 'text', 'Нагрузочный тест {user}'),
+    ('date', 'text', '25.12.2030'),
+    ('time_start', 'text', '18:30'),
+    ('time_end', 'text', '20:30'),
+    ('place_name', 'text', 'Площадка {user}'),
+    ('place_url', 'text', 'https://example.com/place/{user}'),
+    ('text', 'text', 'Описание события номер {user} для нагрузочного теста'),
+    ('contact', 'text', '@user{user}'),
+    ('image', 'button', 'Пропустить'),
+    ('send_for_approval', 'button', '🚀 Отправить на согласование'),
+]
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(q / 100 * len(values)) - 1))
+    return values[index]
+
+
+class SimulatedUsers:
+    """
+    Формирует обновления от имени пользователей и доставляет каждому
+    пользователю новые сообщения бота в его чат.
+    """
+
+    def __init__(self, server: FakeBotAPI):
+        self.server = server
+        self.inboxes = {}
+        self.review_messages = 0
+        # media_group_id альбома в чате согласования -> количество фото
+        self.review_albums = {}
+        # Размеры альбомов в превью поста, которое видит пользователь
+        self.preview_albums = []
+        self._message_ids = itertools.count(1)
+        self._callback_ids = itertools.count(1)
+        server.on_message = self._on_message
+
+    def _on_message(self, method: str, message: dict) -> None:
+        chat_id = message['chat']['id']
+        if chat_id == REVIEW_CHAT_ID:
+            if not method.startswith('edit'):
+                self.review_messages += 1
+            if method == 'sendMediaGroup':
+                group_id = message['media_group_id']
+                self.review_albums[group_id] = self.review_albums.get(group_id, 0) + 1
+            return
+        # Ответом на шаг считается новое или отредактированное сообщение:
+        # в режиме мастера бот редактирует одно и то же сообщение
+        if chat_id in self.inboxes:
+            self.inboxes[chat_id].put_nowait(message)
+
+    @staticmethod
+    def _user(user_id: int) -> dict:
+        return {'id': user_id, 'is_bot': False, 'first_name': f'User{user_id}'}
+
+    def send_text(self, user_id: int, text: str) -> None:
+        message = {
+            'message_id': next(self._message_ids),
+            'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': self._user(user_id),
+            'text': text,
+        }
+        if text.startswith('/'):
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+        self.server.push_update({'message': message})
+
+    def send_album(self, user_id: int, count: int) -> None:
+        # Части альбома приходят отдельными обновлениями с общим media_group_id
+        group_id = f"album{next(self._message_ids)}"
+        for index in range(count):
+            file_id = f"photo_{user_id}_{index}"
+            self.server.push_update({'message': {
+                'message_id': next(self._message_ids),
+                'date': int(time.time()),
+                'chat': {'id': user_id, 'type': 'private'},
+                'from': self._user(user_id),
+                'media_group_id': group_id,
+                'photo': [{'file_id': file_id, 'file_unique_id': file_id, 'width': 1280, 'height': 720}],
+            }})
+
+    def press_button(self, user_id: int, message: dict, text: str) -> None:
+        buttons = {
+            button['text']: button['callback_data']
+            for row in message.get('reply_markup', {}).get('inline_keyboard', [])
+            for button in row
+        }
+        if text not in buttons:
+            raise LookupError(f"нет кнопки {text}")
+        self.server.push_update({
+            'callback_query': {
+                'id': str(next(self._callback_ids)),
+                'from': self._user(user_id),
+                'chat_instance': str(user_id),
+                'message': message,
+                'data': buttons[text],
+            }
+        })
+
+
+async def run_user(users: SimulatedUsers, user_id: int, scenario: list, step_timeout: float, think_time: float,
+                   latencies: dict, failures: dict) -> bool:
+    inbox = users.inboxes.setdefault(user_id, asyncio.Queue())
+    last_message = None
+    try:
+        for name, action, value in scenario:
+            if think_time:
+                await asyncio.sleep(think_time)
+            started = time.perf_counter()
+            if action == 'text':
+                users.send_text(user_id, value.format(user=user_id))
+            elif action == 'album':
+                users.send_album(user_id, value)
+            else:
+                users.press_button(user_id, last_message, value)
+            try:
+                last_message = await asyncio.wait_for(inbox.get(), step_timeout)
+                # Превью с альбомом приходит частями, а кнопки — следующим сообщением
+                preview = 0
+                while last_message.get('media_group_id'):
+                    preview += 1
+                    last_message = await asyncio.wait_for(inbox.get(), step_timeout)
+                if preview:
+                    users.preview_albums.append(preview)
+            except asyncio.TimeoutError:
+                failures[name] = failures.get(name, 0) + 1
+                return False
+            latencies.setdefault(name, []).append(time.perf_counter() - started)
+        return True
+    except LookupError:
+        failures[name] = failures.get(name, 0) + 1
+        return False
+    finally:
+        users.inboxes.pop(user_id, None)
+
+
+def bot_environment(server: FakeBotAPI, workdir: str, args) -> dict:
+    env = dict(os.environ)
+    env.update({
+        'TELEGRAM_BOT_TOKEN': '123456:fake',
+        'TELEGRAM_API_BASE_URL': server.base_url,
+        'REVIEW_CHAT_ID': str(REVIEW_CHAT_ID),
+        'ADMIN_IDS': str(BOT_ADMIN_ID),
+        'DATABASE_PATH': os.path.join(workdir, 'load_test.db'),
+        'BACKUP_DIR': os.path.join(workdir, 'backups'),
+        'BACKUP_INTERVAL_HOURS': '0',
+        'OUTBOX_POLL_INTERVAL': '0.5',
+        'OUTBOX_BACKOFF_BASE': '0.5',
+        'POLLING_READ_TIMEOUT': '15',
+    })
+    if not args.throttle:
+        # Ограничитель частоты рассчитан на живых людей, а не на тысячи виртуальных
+        env.update({
+            'THROTTLE_USER_RATE': '1000',
+            'THROTTLE_USER_BURST': '1000',
+            'THROTTLE_GLOBAL_RATE': '100000',
+            'THROTTLE_GLOBAL_BURST': '100000',
+        })
+    return env
+
+
+async def wait_for(condition, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.1)
+    return True
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Сквозной нагрузочный тест бота")
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=100, help="Одновременно активных пользователей")
+    parser.add_argument('--latency', type=float, default=0.01, help="Задержка ответа сервера, с")
+    parser.add_argument('--rate-limit', type=float, default=0.0, help="Доля вызовов, отклоняемых ошибкой 429")
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--step-timeout', type=float, default=15.0, help="Сколько ждать ответа бота на шаг, с")
+    parser.add_argument('--think-time', type=float, default=0.0, help="Пауза пользователя перед каждым шагом, с")
+    parser.add_argument('--throttle', action='store_true', help="Не отключать ограничитель частоты бота")
+    parser.add_argument('--album', type=int, default=0, help="Отправлять на шаге картинки альбом из стольких фото")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    scenario = [
+        ('image', 'album', args.album) if name == 'image' and args.album else (name, action, value)
+        for name, action, value in SCENARIO
+    ]
+
+    server = FakeBotAPI(latency=args.latency, rate_limit_ratio=args.rate_limit,
+                        retry_after=args.retry_after, seed=args.seed)
+    await server.start()
+    users = SimulatedUsers(server)
+
+    workdir = tempfile.mkdtemp(prefix='poster_load_')
+    log_path = os.path.join(workdir, 'bot.log')
+    poster_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(log_path, 'wb') as log_file:
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, 'bot.py',
+            cwd=poster_dir,
+            env=bot_environment(server, workdir, args),
+            stdout=log_file,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+
+    try:
+        if not await wait_for(lambda: server.calls.get('getUpdates') or process.returncode is not None, 30):
+            raise RuntimeError("бот не начал опрашивать getUpdates")
+        if process.returncode is not None:
+            raise RuntimeError(f"бот завершился с кодом {process.returncode}, см. {log_path}")
+
+        latencies, failures = {}, {}
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def limited(user_id: int) -> bool:
+            async with semaphore:
+                return await run_user(users, user_id, scenario, args.step_timeout, args.think_time, latencies, failures)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(limited(FIRST_USER_ID + i) for i in range(args.users)))
+        elapsed = time.perf_counter() - started
+
+        completed = sum(results)
+        # Посты в чат согласования уходят через очередь, даём ей догнать сценарии
+        await wait_for(lambda: users.review_messages >= completed * 2, 30)
+    finally:
+        if process.returncode is None:
+            process.send_signal(signal.SIGINT)
+            try:
+                await asyncio.wait_for(process.wait(), 30)
+            except asyncio.TimeoutError:
+                process.kill()
+        await server.stop()
+
+    steps_done = sum(len(values) for values in latencies.values())
+    all_latencies = [value for values in latencies.values() for value in values]
+    api_calls = sum(server.calls.values())
+    rate_limited = sum(server.rate_limited.values())
+    rejected = sum(server.rejected.values())
+
+    print(f"Пользователей: {args.users}, параллелизм {args.concurrency}, задержка API {args.latency * 1000:.0f} мс, "
+          f"доля 429: {args.rate_limit:.1%}")
+    print(f"Время: {elapsed:.1f} с; сценариев завершено {completed}/{args.users} "
+          f"({completed / elapsed:.1f}/с), шагов {steps_done} ({steps_done / elapsed:.1f} обновлений/с)")
+    print(f"Ошибки: сценариев {args.users - completed} ({(args.users - completed) / args.users:.1%}), "
+          f"ответов 429 {rate_limited}/{api_calls} вызовов API ({rate_limited / max(api_calls, 1):.1%}), "
+          f"отклонено из-за разметки {rejected}")
+    print(f"Сообщений в чате согласования: {users.review_messages} (не меньше {completed * 2} ожидаемых)")
+    if args.album:
+        full = sum(1 for size in users.review_albums.values() if size == args.album)
+        print(f"Альбомов в чате согласования: {len(users.review_albums)}, из них целых ({args.album} фото): {full}; "
+              f"размеры: {sorted(users.review_albums.values())}")
+        print(f"Размеры альбомов в превью у пользователей: {sorted(users.preview_albums)}")
+    print()
+    print(f"{'Шаг':<18} {'n':>6} {'p50, мс':>9} {'p90, мс':>9} {'p99, мс':>9} {'max, мс':>9} {'сбоев':>6}")
+    for name, _, _ in scenario + [('всего', None, None)]:
+        values = all_latencies if name == 'всего' else latencies.get(name, [])
+        failed = sum(failures.values()) if name == 'всего' else failures.get(name, 0)
+        print(f"{name:<18} {len(values):>6} {percentile(values, 50) * 1000:>9.1f} {percentile(values, 90) * 1000:>9.1f} "
+              f"{percentile(values, 99) * 1000:>9.1f} {max(values, default=0) * 1000:>9.1f} {failed:>6}")
+    print()
+    print("Вызовы API: " + ", ".join(f"{method}={count}" for method, count in sorted(server.calls.items())))
+    print(f"Лог бота: {log_path}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
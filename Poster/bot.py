@@ -1,7 +1,6 @@
 # bot.py
 
 import logging
-import asyncio
 
 from telegram import Update
 from telegram.ext import (
@@ -14,88 +13,201 @@ from telegram.ext import (
     ContextTypes,
 )
 
-from config import TELEGRAM_BOT_TOKEN
+from config import (
+    TELEGRAM_BOT_TOKEN,
+    TELEGRAM_API_BASE_URL,
+    ADMIN_IDS,
+    API_POOL_SIZE,
+    API_CONNECT_TIMEOUT,
+    API_READ_TIMEOUT,
+    API_WRITE_TIMEOUT,
+    API_POOL_TIMEOUT,
+    POLLING_POOL_SIZE,
+    POLLING_CONNECT_TIMEOUT,
+    POLLING_READ_TIMEOUT,
+    POLLING_WRITE_TIMEOUT,
+    POLLING_POOL_TIMEOUT,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_VERSION,
+)
 from database import SessionLocal, init_db
+from http_pool import build_request
+from permissions import seed_admins
+from assignments import reviewer_load
+from loop_monitor import loop_monitor
+from stats import backfill_stats
 from handlers.main_menu import main_menu_handlers
 from handlers.admin import admin_handlers
 from handlers.post_creation import post_creation_handlers
 from handlers.callbacks import callbacks_handlers
+from handlers.drafts import drafts_handlers
+from handlers.digest import digest_handlers
+from handlers.inline import inline_handlers
+from handlers.throttle import throttle_handlers, THROTTLE_GROUP
+from handlers.activity import activity_handlers, ACTIVITY_GROUP
 from jobs import setup_jobs
+from structured_logging import setup_logging, instrument_handlers
+from utils.formatter import escape_markdown
 
-# Настройка логирования
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+# Настройка логирования: записи выводит отдельный поток, а не цикл событий
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # Создание всех таблиц в базе данных
 init_db()
 
+# Администраторы из окружения становятся первыми администраторами в базе
+seed_admins(ADMIN_IDS)
+
+# Счётчики нагрузки ответственных восстанавливаются из таблицы назначений
+reviewer_load.rebuild()
+
+# Счётчики статистики заполняются по истории, если их ещё нет
+backfill_stats()
+
+async def post_init_callback(application: Application):
+    """
+    Запускает контроль задержек цикла событий, когда цикл уже работает.
+    """
+    loop_monitor.start()
+
 async def shutdown_callback(application: Application):
     """
     Shutdown Callback для закрытия сессии базы данных.
     """
+    await loop_monitor.stop()
     session = application.bot_data.get('db_session')
     if session:
         session.close()
         logger.info("Сессия базы данных закрыта.")
 
-async def main():
+def main():
+    # Отдельные пулы соединений для исходящих вызовов и для long polling getUpdates
+    api_request = build_request(
+        pool_size=API_POOL_SIZE,
+        connect_timeout=API_CONNECT_TIMEOUT,
+        read_timeout=API_READ_TIMEOUT,
+        write_timeout=API_WRITE_TIMEOUT,
+        pool_timeout=API_POOL_TIMEOUT,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        http_version=HTTP_VERSION,
+    )
+    polling_request = build_request(
+        pool_size=POLLING_POOL_SIZE,
+        connect_timeout=POLLING_CONNECT_TIMEOUT,
+        read_timeout=POLLING_READ_TIMEOUT,
+        write_timeout=POLLING_WRITE_TIMEOUT,
+        pool_timeout=POLLING_POOL_TIMEOUT,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        http_version=HTTP_VERSION,
+    )
+
     # Создание приложения бота
-    application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    application = (
+        Application.builder()
+        .token(TELEGRAM_BOT_TOKEN)
+        .base_url(TELEGRAM_API_BASE_URL)
+        .request(api_request)
+        .get_updates_request(polling_request)
+        .post_init(post_init_callback)
+        .post_shutdown(shutdown_callback)
+        .build()
+    )
 
     # Создание сессии базы данных и сохранение её в bot_data для доступа в обработчиках
     application.bot_data['db_session'] = SessionLocal()
 
+    # Учёт активности пользователей для удаления простаивающего состояния
+    for handler in activity_handlers():
+        application.add_handler(handler, group=ACTIVITY_GROUP)
+
+    # Ограничение частоты входящих обновлений — до всех остальных групп обработчиков
+    for handler in throttle_handlers():
+        application.add_handler(handler, group=THROTTLE_GROUP)
+
+    # Регистрация обработчиков создания поста (ConversationHandler).
+    # Регистрируются до основного меню, иначе его обработчик любого текста
+    # перехватывал бы ответы на шаги создания поста.
+    for handler in post_creation_handlers():
+        application.add_handler(handler)
+
     # Регистрация обработчиков основного меню
     for handler in main_menu_handlers():
         application.add_handler(handler)
 
-    # Регистрация обработчиков административных команд
-    for handler in admin_handlers():
+    # Регистрация обработчиков истории черновиков
+    for handler in drafts_handlers():
         application.add_handler(handler)
 
-    # Регистрация обработчиков создания поста (ConversationHandler)
-    for handler in post_creation_handlers():
+    # Регистрация обработчиков анонса событий
+    for handler in digest_handlers():
+        application.add_handler(handler)
+
+    # Регистрация обработчиков административных команд
+    for handler in admin_handlers():
         application.add_handler(handler)
 
     # Регистрация обработчиков CallbackQuery
     for handler in callbacks_handlers():
         application.add_handler(handler)
 
+    # Регистрация обработчиков inline-режима
+    for handler in inline_handlers():
+        application.add_handler(handler)
+
     # Настройка фоновых задач
     setup_jobs(application)
 
     # Добавление обработчика команд /help
     async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        help_text = (
-            "📚 *Доступные команды:*\n\n"
+        commands = (
             "/start - Начало работы с ботом\n"
             "/help - Показать это сообщение\n"
+            "/create_post - Создать пост по шагам\n"
+            "/resume_post - Продолжить пост, прерванный из-за неактивности\n"
+            "/edit_draft <ID> - Открыть черновик для редактирования\n"
+            "/revisions <ID> - История изменений черновика\n"
+            "/restore_revision <ID> <номер> - Вернуть черновик к ревизии\n"
+            "/digest - Анонс ближайших событий\n"
+            "Пост можно отправить и одним сообщением со строками «Заголовок:», «Дата:», «Время:», «Место:», «Ссылка:», «Текст:», «Контакт:»\n"
             "/add_responsible <Имя> <Telegram_ID> - Добавить ответственного (только админам)\n"
-            "/remove_responsible <Telegram_ID> - Удалить ответственного (только админам)"
+            "/remove_responsible <Telegram_ID> - Удалить ответственного (только админам)\n"
+            "/import_responsible - Подпись к CSV/JSONL файлу для массового добавления ответственных (только админам)\n"
+            "/add_admin <Telegram_ID> - Назначить администратора (только админам)\n"
+            "/remove_admin <Telegram_ID> - Отозвать права администратора (только админам)\n"
+            "/export_drafts [csv|jsonl] - Выгрузить черновики (только админам)\n"
+            "/export_responsible [csv|jsonl] - Выгрузить ответственных (только админам)\n"
+            "/stats - Статистика заявок и назначений (только админам)"
         )
+        # Описания команд содержат зарезервированные символы MarkdownV2 ('-', '(', '_' ...)
+        help_text = "📚 *Доступные команды:*\n\n" + escape_markdown(commands)
         await update.message.reply_text(help_text, parse_mode='MarkdownV2')
 
     application.add_handler(CommandHandler('help', help_command))
 
+    # Контекст логирования и длительность обработки для всех обработчиков
+    instrument_handlers(application)
+
     # Добавление обработчика ошибок
     async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
-        logger.error(msg="Exception while handling an update:", exc_info=context.error)
+        extra = {}
+        if isinstance(update, Update):
+            extra = {
+                'update_id': update.update_id,
+                'user_id': update.effective_user.id if update.effective_user else None,
+            }
+        logger.error(msg="Exception while handling an update:", exc_info=context.error, extra=extra)
 
     application.add_error_handler(error_handler)
 
-    # Добавление Shutdown Callback
-    application.add_shutdown_callback(shutdown_callback)
-
     # Запуск бота
     logger.info("Запуск бота...")
-    await application.run_polling()
+    # run_polling сам управляет циклом событий, поэтому main() синхронная
+    application.run_polling()
 
 if __name__ == '__main__':
     try:
-        asyncio.run(main())
+        main()
     except RuntimeError as e:
         logger.error(f"RuntimeError: {e}")
     except Exception as e:
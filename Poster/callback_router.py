@@ -0,0 +1,173 @@
+# callback_router.py
+
+import logging
+import string
+
+from telegram import Update
+from telegram.ext import CallbackQueryHandler, ContextTypes
+
+from idempotency import callback_key, press_window
+from metrics import metrics
+from structured_logging import set_handler_name
+
+logger = logging.getLogger(__name__)
+
+# Версия формата данных кнопок. Увеличивается при изменении кодов или аргументов
+# действий: кнопки старых версий отклоняются без обращения к базе.
+CALLBACK_VERSION = 1
+
+# Telegram ограничивает callback_data 64 байтами
+MAX_CALLBACK_DATA = 64
+
+SEPARATOR = ':'
+DIGITS = string.digits + string.ascii_lowercase
+
+# Области, в которых обрабатываются кнопки: общая и диалог создания поста
+GLOBAL_SCOPE = 'global'
+POST_CREATION_SCOPE = 'post_creation'
+
+# Коды действий. Коды удалённых действий не переиспользуются.
+SKIP = 'k'
+SAVE_DRAFT = 's'
+SEND_FOR_APPROVAL = 'a'
+EDIT_POST = 'e'
+EDIT_FIELD = 'f'
+CANCEL_EDIT = 'c'
+RESPONSIBLE = 'r'
+MAIN_MENU = 'm'
+DELETE_DRAFT = 'd'
+CLOSE_ASSIGNMENT = 'x'
+
+
+def _pack_int(value: int) -> str:
+    if value < 0:
+        return '-' + _pack_int(-value)
+    digits = ''
+    while True:
+        value, remainder = divmod(value, 36)
+        digits = DIGITS[remainder] + digits
+        if not value:
+            return digits
+
+
+def _pack(value) -> str:
+    if isinstance(value, int):
+        return _pack_int(value)
+    value = str(value)
+    if SEPARATOR in value:
+        raise ValueError(f"Аргумент кнопки не может содержать '{SEPARATOR}': {value}")
+    return value
+
+
+class CallbackRouter:
+    """
+    Единый маршрутизатор нажатий на inline-кнопки.
+
+    callback_data имеет вид <версия><код действия>[:<аргумент>...], целые
+    аргументы упакованы в base36, например '1d:2n9c' — удалить черновик 123456.
+    Обработчик находится по коду словарём, без перебора регулярных выражений,
+    и вызывается как callback(update, context, *args).
+    """
+
+    def __init__(self, version: int = CALLBACK_VERSION):
+        self.version = DIGITS[version % len(DIGITS)]
+        self._routes = {}
+        self._idempotent = set()
+
+    def register(self, code: str, callback, arg_types: tuple = (), scope: str = GLOBAL_SCOPE,
+                 idempotent: bool = False) -> None:
+        """
+        Регистрирует обработчик действия. Повторная регистрация кода с другим
+        обработчиком — ошибка: одному действию соответствует ровно один обработчик.
+        Повторные нажатия кнопок idempotent-действия в пределах CALLBACK_DEDUP_WINDOW
+        подтверждаются и отбрасываются без вызова обработчика.
+        """
+        if SEPARATOR in code:
+            raise ValueError(f"Код действия не может содержать '{SEPARATOR}': {code}")
+        route = (callback, tuple(arg_types), scope)
+        existing = self._routes.get(code)
+        if existing is not None and existing != route:
+            raise ValueError(f"Код действия '{code}' уже зарегистрирован для {existing[0].__name__}.")
+        self._routes[code] = route
+        if idempotent:
+            self._idempotent.add(code)
+
+    def encode(self, code: str, *args) -> str:
+        """
+        callback_data для кнопки действия с аргументами.
+        """
+        data = self.version + code + ''.join(SEPARATOR + _pack(arg) for arg in args)
+        if len(data.encode()) > MAX_CALLBACK_DATA:
+            raise ValueError(f"callback_data длиннее {MAX_CALLBACK_DATA} байт: {data}")
+        return data
+
+    def decode(self, data: str):
+        """
+        Возвращает (обработчик, аргументы, область) или None для устаревших и некорректных данных.
+        """
+        if not data or data[0] != self.version:
+            return None
+        code, *raw_args = data[1:].split(SEPARATOR)
+        route = self._routes.get(code)
+        if route is None:
+            return None
+
+        callback, arg_types, scope = route
+        if len(raw_args) != len(arg_types):
+            return None
+        try:
+            args = [int(raw, 36) if arg_type is int else arg_type(raw) for raw, arg_type in zip(raw_args, arg_types)]
+        except ValueError:
+            return None
+        return callback, args, scope
+
+    def handler(self, scope: str = GLOBAL_SCOPE) -> CallbackQueryHandler:
+        """
+        Обработчик всех кнопок указанной области.
+        """
+        def matches(data) -> bool:
+            decoded = self.decode(data)
+            return decoded is not None and decoded[2] == scope
+
+        async def dispatch(update: Update, context: ContextTypes.DEFAULT_TYPE):
+            query = update.callback_query
+            callback, args, _ = self.decode(query.data)
+            metrics.increment('callbacks.routed')
+            set_handler_name(callback.__qualname__)
+
+            if query.data[1:].split(SEPARATOR)[0] not in self._idempotent:
+                return await callback(update, context, *args)
+
+            key = callback_key(query)
+            if not press_window.first_press(key):
+                metrics.increment('callbacks.duplicate')
+                await query.answer("Уже выполняется.")
+                return None
+            try:
+                return await callback(update, context, *args)
+            except Exception:
+                # Действие не выполнено — повторное нажатие должно сработать
+                press_window.forget(key)
+                raise
+
+        return CallbackQueryHandler(dispatch, pattern=matches)
+
+    def stale_handler(self) -> CallbackQueryHandler:
+        """
+        Обработчик кнопок, которые никто не обработал: старого формата,
+        прежней версии или из завершившегося диалога. Регистрируется последним.
+        """
+        async def reject(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+            query = update.callback_query
+            # Повторное нажатие приходит сюда, если первое уже завершило диалог
+            if press_window.seen(callback_key(query)):
+                metrics.increment('callbacks.duplicate')
+                await query.answer("Уже выполнено.")
+                return
+            metrics.increment('callbacks.stale')
+            await query.answer("Эта кнопка устарела.")
+
+        return CallbackQueryHandler(reject)
+
+
+router = CallbackRouter()
@@ -9,6 +9,10 @@ load_dotenv()
 # Получение токена бота из переменных окружения
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 
+# Адрес сервера Bot API. Можно указать локальный Bot API сервер
+# или заменитель из benchmarks/ для нагрузочного тестирования
+TELEGRAM_API_BASE_URL = os.getenv("TELEGRAM_API_BASE_URL", "https://api.telegram.org/bot")
+
 # Получение ID чата для отправки постов на согласование
 REVIEW_CHAT_ID = os.getenv("REVIEW_CHAT_ID")
 
@@ -16,6 +20,176 @@ REVIEW_CHAT_ID = os.getenv("REVIEW_CHAT_ID")
 # Предполагается, что ADMIN_IDS хранятся в виде "123456789,987654321"
 ADMIN_IDS = [int(admin_id.strip()) for admin_id in os.getenv("ADMIN_IDS", "").split(",") if admin_id.strip().isdigit()]
 
+# Интервал, с которым кэш прав администраторов перечитывается из базы, в секундах.
+# ADMIN_IDS из окружения добавляются в базу при запуске как первые администраторы.
+PERMISSIONS_TTL = float(os.getenv("PERMISSIONS_TTL", "60"))
+
+# Путь к файлу базы данных SQLite
+DATABASE_PATH = os.getenv("DATABASE_PATH", "./handlers/drafts.db")
+
+# Настройки резервного копирования базы данных
+BACKUP_DIR = os.getenv("BACKUP_DIR", "./backups")
+# Интервал между резервными копиями в часах (0 — отключить)
+BACKUP_INTERVAL_HOURS = float(os.getenv("BACKUP_INTERVAL_HOURS", "6"))
+# Количество хранимых резервных копий
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", "7"))
+# Сжимать ли резервные копии gzip
+BACKUP_COMPRESS = os.getenv("BACKUP_COMPRESS", "true").lower() in ("1", "true", "yes")
+# Количество страниц, копируемых за один шаг, и пауза между шагами в секундах.
+# Между шагами блокировка базы отпускается, и пишущие обработчики не простаивают.
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "256"))
+BACKUP_STEP_SLEEP = float(os.getenv("BACKUP_STEP_SLEEP", "0.05"))
+
+# Настройки массового импорта и экспорта
+# Количество строк, вставляемых в базу одной транзакцией при импорте
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+# Количество строк, читаемых из базы за раз при экспорте
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# Ограничение частоты входящих обновлений (token bucket).
+# RATE — пополнение в токенах в секунду, BURST — ёмкость корзины.
+THROTTLE_USER_RATE = float(os.getenv("THROTTLE_USER_RATE", "1"))
+THROTTLE_USER_BURST = float(os.getenv("THROTTLE_USER_BURST", "5"))
+THROTTLE_GLOBAL_RATE = float(os.getenv("THROTTLE_GLOBAL_RATE", "30"))
+THROTTLE_GLOBAL_BURST = float(os.getenv("THROTTLE_GLOBAL_BURST", "60"))
+# Максимальное количество пользователей, для которых хранится состояние
+THROTTLE_MAX_USERS = int(os.getenv("THROTTLE_MAX_USERS", "10000"))
+# Минимальный интервал между предупреждениями одному пользователю, в секундах
+THROTTLE_WARN_INTERVAL = float(os.getenv("THROTTLE_WARN_INTERVAL", "10"))
+
+# Настройки inline-режима (@bot <начало заголовка>)
+# Время кэширования ответа на стороне Telegram, в секундах
+INLINE_CACHE_TIME = int(os.getenv("INLINE_CACHE_TIME", "30"))
+# Количество результатов на одной странице ответа (не больше 50)
+INLINE_PAGE_SIZE = int(os.getenv("INLINE_PAGE_SIZE", "20"))
+# Максимальное количество пользователей, для которых индекс черновиков хранится в памяти
+INLINE_INDEX_MAX_USERS = int(os.getenv("INLINE_INDEX_MAX_USERS", "1000"))
+# Максимальное количество пользователей, для которых список черновиков хранится в памяти
+DRAFT_LIST_CACHE_USERS = int(os.getenv("DRAFT_LIST_CACHE_USERS", "1000"))
+
+# Простаивающее состояние пользователей (user_data, chat_data).
+# Через USER_DATA_TTL секунд без активности состояние удаляется из памяти (0 — не удалять),
+# проверка выполняется каждые USER_DATA_SWEEP_INTERVAL секунд.
+USER_DATA_TTL = float(os.getenv("USER_DATA_TTL", "3600"))
+USER_DATA_SWEEP_INTERVAL = float(os.getenv("USER_DATA_SWEEP_INTERVAL", "300"))
+# Каталог, куда сохраняется незавершённый пост вместо удаления (пусто — не сохранять),
+# и сколько дней хранить такие файлы
+USER_DATA_SPILL_DIR = os.getenv("USER_DATA_SPILL_DIR", "")
+USER_DATA_SPILL_DAYS = float(os.getenv("USER_DATA_SPILL_DAYS", "7"))
+# Через сколько секунд без ответа прерывается создание поста (0 — никогда).
+# Если USER_DATA_TTL включён, должно быть больше 0 и не больше USER_DATA_TTL,
+# иначе данные удалялись бы посреди диалога (проверяется ниже).
+CONVERSATION_TIMEOUT = float(os.getenv("CONVERSATION_TIMEOUT", "1800"))
+
+# Режим мастера создания поста: одно сообщение бота, которое редактируется
+# на каждом шаге, вместо нового сообщения на каждый шаг и каждую ошибку
+WIZARD_EDIT_IN_PLACE = os.getenv("WIZARD_EDIT_IN_PLACE", "true").lower() in ("1", "true", "yes")
+# Удалять ли ответы пользователя на шаги мастера и сколько сообщений удалять за раз
+WIZARD_DELETE_INPUTS = os.getenv("WIZARD_DELETE_INPUTS", "false").lower() in ("1", "true", "yes")
+WIZARD_DELETE_BATCH = int(os.getenv("WIZARD_DELETE_BATCH", "5"))
+
+# Сколько секунд ждать следующую часть альбома (media group), прежде чем обработать его целиком
+MEDIA_GROUP_WINDOW = float(os.getenv("MEDIA_GROUP_WINDOW", "1.0"))
+
+# Автоматически назначать ответственного с наименьшим числом открытых назначений.
+# Выбрать другого ответственного вручную в чате согласования можно и в этом режиме.
+AUTO_ASSIGN = os.getenv("AUTO_ASSIGN", "false").lower() in ("1", "true", "yes")
+
+# Максимальное расстояние Хэмминга между SimHash-отпечатками, при котором
+# заявки считаются похожими (должно быть меньше количества полос, т.е. не больше 3)
+SIMHASH_MAX_DISTANCE = int(os.getenv("SIMHASH_MAX_DISTANCE", "3"))
+# За сколько последних дней искать похожие заявки (0 — за всё время)
+SIMHASH_WINDOW_DAYS = float(os.getenv("SIMHASH_WINDOW_DAYS", "180"))
+
+# Настройки логирования
+# Уровень логов и формат: json — одна JSON-строка на запись, text — прежний текстовый
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Доля обновлений, для которых пишутся DEBUG-записи (все записи одного обновления сохраняются вместе)
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))
+# Обработка обновления дольше этого времени, в миллисекундах, записывается предупреждением
+LOG_SLOW_HANDLER_MS = float(os.getenv("LOG_SLOW_HANDLER_MS", "1000"))
+
+# Интервал записи метрик в лог, в секундах (0 — отключить)
+METRICS_LOG_INTERVAL = float(os.getenv("METRICS_LOG_INTERVAL", "300"))
+
+# Контроль задержек цикла событий: как часто проверять, в секундах,
+# и с какой задержки считать цикл заблокированным (0 — отключить контроль)
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.1"))
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.25"))
+# Сколько последних кадров стека блокирующего кода записывать в лог
+LOOP_STACK_DEPTH = int(os.getenv("LOOP_STACK_DEPTH", "12"))
+
+# Настройки очереди исходящих сообщений (outbox)
+# Интервал опроса очереди фоновым воркером, в секундах
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "2"))
+# Максимальное количество сообщений, отправляемых за один проход воркера
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+# Количество попыток отправки, после которого сообщение помечается как failed
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+# Базовая и максимальная задержка экспоненциального backoff, в секундах
+OUTBOX_BACKOFF_BASE = float(os.getenv("OUTBOX_BACKOFF_BASE", "2"))
+OUTBOX_BACKOFF_MAX = float(os.getenv("OUTBOX_BACKOFF_MAX", "300"))
+# Сколько дней хранить отправленные сообщения очереди (0 — не удалять)
+OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", "7"))
+
+# Сколько секунд повторные нажатия той же кнопки считаются двойным нажатием
+CALLBACK_DEDUP_WINDOW = float(os.getenv("CALLBACK_DEDUP_WINDOW", "10"))
+# Сколько дней хранить отметки о выполненных нажатиях (0 — не удалять)
+CALLBACK_RECEIPT_DAYS = int(os.getenv("CALLBACK_RECEIPT_DAYS", "7"))
+
+# Координация фоновых задач между процессами бота.
+# Имя процесса в таблице аренды (по умолчанию — имя хоста и PID)
+JOB_INSTANCE_ID = os.getenv("JOB_INSTANCE_ID", "")
+# На сколько секунд берётся аренда задачи; продлевается каждую треть срока
+JOB_LEASE_TTL = float(os.getenv("JOB_LEASE_TTL", "60"))
+# Случайная задержка запуска обслуживающих задач, до стольких секунд
+JOB_JITTER = float(os.getenv("JOB_JITTER", "300"))
+# Сколько дней хранить записи о запусках задач (0 — не удалять)
+JOB_RUN_RETENTION_DAYS = int(os.getenv("JOB_RUN_RETENTION_DAYS", "30"))
+
+# Каждая N-я ревизия черновика хранится целиком, остальные — только изменениями.
+# Чем меньше N, тем быстрее восстановление старых ревизий и тем больше места они занимают
+DRAFT_SNAPSHOT_INTERVAL = int(os.getenv("DRAFT_SNAPSHOT_INTERVAL", "10"))
+# Строковые поля длиннее этого числа символов хранятся в ревизиях посимвольными правками
+DRAFT_PATCH_MIN_LENGTH = int(os.getenv("DRAFT_PATCH_MIN_LENGTH", "80"))
+
+# Ежедневный анонс одобренных событий: чат или канал (пусто — не публиковать),
+# время отправки по UTC в формате ЧЧ:ММ и на сколько дней вперёд брать события
+DIGEST_CHAT_ID = os.getenv("DIGEST_CHAT_ID", "")
+DIGEST_TIME = os.getenv("DIGEST_TIME", "09:00")
+DIGEST_DAYS = int(os.getenv("DIGEST_DAYS", "7"))
+# Сколько секунд хранить готовый анонс в памяти
+DIGEST_CACHE_TTL = float(os.getenv("DIGEST_CACHE_TTL", "600"))
+
+# За сколько последних дней /stats показывает число заявок
+STATS_DAYS = int(os.getenv("STATS_DAYS", "7"))
+
+# Сколько независимых вызовов Bot API выполняется одновременно
+# (ответ пользователю, отправка в разные чаты из очереди и т.п.)
+FANOUT_CONCURRENCY = int(os.getenv("FANOUT_CONCURRENCY", "8"))
+
+# Настройки HTTP-клиентов для Bot API.
+# Long polling getUpdates и исходящие вызовы (send_message, send_photo и т.д.)
+# используют разные пулы соединений, как и по умолчанию в PTB (256 и 1 соединение);
+# здесь дополнительно настраиваются таймауты и время жизни keep-alive.
+API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", "256"))
+API_CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "5"))
+API_READ_TIMEOUT = float(os.getenv("API_READ_TIMEOUT", "10"))
+API_WRITE_TIMEOUT = float(os.getenv("API_WRITE_TIMEOUT", "20"))
+API_POOL_TIMEOUT = float(os.getenv("API_POOL_TIMEOUT", "3"))
+
+POLLING_POOL_SIZE = int(os.getenv("POLLING_POOL_SIZE", "1"))
+POLLING_CONNECT_TIMEOUT = float(os.getenv("POLLING_CONNECT_TIMEOUT", "5"))
+POLLING_READ_TIMEOUT = float(os.getenv("POLLING_READ_TIMEOUT", "5"))
+POLLING_WRITE_TIMEOUT = float(os.getenv("POLLING_WRITE_TIMEOUT", "5"))
+POLLING_POOL_TIMEOUT = float(os.getenv("POLLING_POOL_TIMEOUT", "1"))
+
+# Время жизни простаивающего keep-alive соединения, в секундах
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+# Версия HTTP: "1.1" или "2" (для HTTP/2 нужен пакет httpx[http2])
+HTTP_VERSION = os.getenv("HTTP_VERSION", "1.1")
+
 if not TELEGRAM_BOT_TOKEN:
     raise ValueError("TELEGRAM_BOT_TOKEN не установлен в .env файле.")
 
@@ -24,3 +198,9 @@ if not REVIEW_CHAT_ID:
 
 if not ADMIN_IDS:
     raise ValueError("ADMIN_IDS не установлены или пусты в .env файле.")
+
+if USER_DATA_TTL > 0 and not 0 < CONVERSATION_TIMEOUT <= USER_DATA_TTL:
+    raise ValueError(
+        "CONVERSATION_TIMEOUT должен быть больше 0 и не больше USER_DATA_TTL, "
+        "иначе данные пользователя удаляются посреди создания поста."
+    )
@@ -0,0 +1,165 @@
+# data_transfer.py
+
+import csv
+import json
+import logging
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from config import IMPORT_CHUNK_SIZE, EXPORT_BATCH_SIZE
+from database import SessionLocal, engine
+from models import Draft, ResponsiblePerson
+
+logger = logging.getLogger(__name__)
+
+# Поддерживаемые форматы файлов и соответствующие им расширения
+FORMATS = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+}
+
+
+def detect_format(filename: str) -> str:
+    """
+    Определяет формат файла по расширению. Возвращает None, если формат не поддерживается.
+    """
+    filename = (filename or '').lower()
+    for extension, fmt in FORMATS.items():
+        if filename.endswith(extension):
+            return fmt
+    return None
+
+
+def iter_records(path: str, fmt: str):
+    """
+    Построчно читает записи из CSV или JSONL файла, не загружая его в память целиком.
+    Вместо строки JSONL, которая не разбирается, возвращается None, чтобы одна
+    испорченная строка не прерывала импорт.
+    """
+    with open(path, newline='', encoding='utf-8-sig') as file:
+        if fmt == 'csv':
+            yield from csv.DictReader(file)
+        else:
+            for number, line in enumerate(file, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    logger.warning(f"Строка {number} не является корректным JSON: {e}")
+                    yield None
+
+
+def _parse_responsible(record: dict):
+    """
+    Приводит запись к виду {'name': ..., 'telegram_id': ...}. Возвращает None для некорректных записей,
+    в том числе для строк JSONL, которые не разобрались или содержат не объект.
+    """
+    if not isinstance(record, dict):
+        return None
+    name = str(record.get('name') or '').strip()
+    telegram_id = str(record.get('telegram_id') or '').strip()
+    if not name or not telegram_id.isdigit():
+        return None
+    return {'name': name[:255], 'telegram_id': int(telegram_id)}
+
+
+def import_responsible_persons(path: str, fmt: str, on_conflict: str = 'update') -> tuple:
+    """
+    Импортирует ответственных лиц из файла пачками по IMPORT_CHUNK_SIZE строк,
+    каждая пачка — отдельной транзакцией.
+
+    При совпадении telegram_id имя обновляется (on_conflict='update')
+    или существующая запись остаётся без изменений (on_conflict='skip').
+
+    Возвращает кортеж (обработано, пропущено некорректных).
+    """
+    statement = sqlite_insert(ResponsiblePerson.__table__)
+    if on_conflict == 'skip':
+        statement = statement.on_conflict_do_nothing(index_elements=['telegram_id'])
+    else:
+        statement = statement.on_conflict_do_update(
+            index_elements=['telegram_id'],
+            set_={'name': statement.excluded.name},
+        )
+
+    session: Session = SessionLocal()
+    processed = skipped = 0
+    chunk = {}
+
+    def flush():
+        if chunk:
+            session.execute(statement, list(chunk.values()))
+            session.commit()
+            chunk.clear()
+
+    try:
+        for record in iter_records(path, fmt):
+            person = _parse_responsible(record)
+            if person is None:
+                skipped += 1
+                continue
+
+            # Повтор telegram_id внутри пачки: побеждает последняя запись
+            chunk[person['telegram_id']] = person
+            processed += 1
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                flush()
+        flush()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+    logger.info(f"Импорт ответственных: обработано {processed}, пропущено {skipped}.")
+    return processed, skipped
+
+
+def _serialize(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def export_table(table, path: str, fmt: str) -> int:
+    """
+    Выгружает таблицу в файл, читая строки из базы порциями по EXPORT_BATCH_SIZE
+    через потоковый курсор. Возвращает количество выгруженных строк.
+    """
+    columns = [column.name for column in table.columns]
+    count = 0
+
+    with engine.connect() as connection, open(path, 'w', newline='', encoding='utf-8') as file:
+        result = connection.execution_options(stream_results=True).execute(
+            select(table).order_by(table.c.id)
+        )
+
+        writer = None
+        if fmt == 'csv':
+            writer = csv.writer(file)
+            writer.writerow(columns)
+
+        for rows in result.partitions(EXPORT_BATCH_SIZE):
+            for row in rows:
+                if writer:
+                    writer.writerow([_serialize(value) for value in row])
+                else:
+                    record = {column: _serialize(value) for column, value in zip(columns, row)}
+                    file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            count += len(rows)
+
+    return count
+
+
+def export_drafts(path: str, fmt: str) -> int:
+    return export_table(Draft.__table__, path, fmt)
+
+
+def export_responsible_persons(path: str, fmt: str) -> int:
+    return export_table(ResponsiblePerson.__table__, path, fmt)
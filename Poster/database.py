@@ -1,11 +1,12 @@
 # database.py
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
 from base import Base  # Импортируем Base из base.py
+from config import DATABASE_PATH
 
 # Путь к базе данных SQLite
-SQLALCHEMY_DATABASE_URL = "sqlite:///./handlers/drafts.db"
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
 
 # Создание SQLAlchemy engine
 engine = create_engine(
@@ -17,4 +18,22 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Функция для создания таблиц
 def init_db():
+    import models  # noqa: F401  Регистрируем все модели в Base.metadata
     Base.metadata.create_all(bind=engine)
+    upgrade_tables()
+
+def upgrade_tables():
+    """
+    create_all не изменяет уже существующие таблицы, поэтому новые колонки
+    и индексы моделей добавляются в них здесь. Новые колонки должны допускать NULL.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            for index in table.indexes:
+                index.create(bind=connection, checkfirst=True)
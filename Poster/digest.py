@@ -0,0 +1,163 @@
+# digest.py
+
+import logging
+import time
+from datetime import date, datetime, timedelta
+from typing import NamedTuple
+
+from sqlalchemy.orm import Session
+from telegram.constants import MessageLimit
+
+from config import DIGEST_DAYS, DIGEST_CACHE_TTL
+from metrics import metrics
+from outbox import enqueue_message, album_media
+from read_models import upcoming_events
+from utils.formatter import escape_markdown
+
+logger = logging.getLogger(__name__)
+
+# Telegram ограничивает альбом десятью элементами
+MAX_ALBUM_SIZE = 10
+
+WEEKDAYS = ('Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс')
+
+# Значение, которое ставится в поле при пропуске шага редактирования
+EMPTY_VALUE = 'Не указано'
+
+
+class Digest(NamedTuple):
+    """
+    Готовый к отправке анонс. Тексты — в MarkdownV2, каждый не длиннее
+    лимита сообщения. Если анонс начинается с альбома, первый текст
+    помещается в его подпись (caption), а не отдельным сообщением.
+    """
+    events: int
+    caption: str
+    messages: list
+    albums: list
+
+
+def _value(value: str) -> str:
+    return value if value and value != EMPTY_VALUE else None
+
+
+def _day_header(day: date) -> str:
+    return f"📅 *{WEEKDAYS[day.weekday()]}, {escape_markdown(day.strftime('%d.%m'))}*"
+
+
+def _event_block(event) -> str:
+    time_start, time_end = _value(event.time_start), _value(event.time_end)
+    when = f"{time_start} – {time_end}" if time_start and time_end else time_start or time_end
+    lines = [f"{'⏰ ' + when + ' ' if when else ''}*{_value(event.title) or 'Без заголовка'}*"]
+
+    place = _value(event.place_name)
+    if place and _value(event.place_url):
+        place = f"[{place}]({event.place_url})"
+    if place:
+        lines.append(f"📍 {place}")
+    if _value(event.contact):
+        lines.append(f"📞 {event.contact}")
+    return '\n'.join(lines)
+
+
+def chunk_blocks(header: str, days: list, limit: int = MessageLimit.MAX_TEXT_LENGTH) -> list:
+    """
+    Собирает блоки событий в как можно меньшее число текстов не длиннее limit.
+    days — список (заголовок дня, [блоки событий]). Если день продолжается
+    в следующем тексте, его заголовок повторяется.
+    """
+    chunks = []
+    current = header
+    for day_header, blocks in days:
+        current_day = None
+        for block in blocks:
+            piece = block if current_day == day_header else f"{day_header}\n{block}"
+            candidate = f"{current}\n\n{piece}" if current else piece
+            if len(candidate) > limit and current:
+                chunks.append(current)
+                piece = f"{day_header}\n{block}"
+                candidate = piece
+            current = candidate
+            current_day = day_header
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def render_digest(events: list, start: date, days: int) -> Digest:
+    """
+    Превращает события в тексты анонса и альбомы обложек.
+    """
+    end = start + timedelta(days=days - 1)
+    header = f"🗓 *Анонс событий {escape_markdown(start.strftime('%d.%m'))} – {escape_markdown(end.strftime('%d.%m'))}*"
+
+    by_day = {}
+    for event in events:
+        by_day.setdefault(event.event_date, []).append(_event_block(event))
+    chunks = chunk_blocks(header, [(_day_header(day), blocks) for day, blocks in by_day.items()])
+
+    covers = [event.image for event in events if event.image]
+    albums = [covers[i:i + MAX_ALBUM_SIZE] for i in range(0, len(covers), MAX_ALBUM_SIZE)]
+
+    caption = None
+    if albums and len(chunks[0]) <= MessageLimit.CAPTION_LENGTH:
+        # Короткий анонс уходит подписью к первому альбому — на одно сообщение меньше
+        caption, chunks = chunks[0], chunks[1:]
+    return Digest(events=len(events), caption=caption, messages=chunks, albums=albums)
+
+
+class DigestCache:
+    """
+    Последний собранный анонс в памяти. Повторные запросы за тот же день
+    не обращаются к базе, пока не истёк DIGEST_CACHE_TTL или пока анонс не
+    сброшен invalidate() после одобрения заявки.
+    """
+
+    def __init__(self, ttl: float = DIGEST_CACHE_TTL):
+        self.ttl = ttl
+        self._key = None
+        self._expires = 0.0
+        self._digest = None
+
+    def get(self, session: Session, today: date = None, days: int = DIGEST_DAYS) -> Digest:
+        today = today or datetime.utcnow().date()
+        key = (today, days)
+        now = time.monotonic()
+        if self._key == key and now < self._expires:
+            metrics.increment('digest.cache_hits')
+            return self._digest
+
+        metrics.increment('digest.cache_misses')
+        events = upcoming_events(session, today, today + timedelta(days=days))
+        self._digest = render_digest(events, today, days)
+        self._key = key
+        self._expires = now + self.ttl
+        return self._digest
+
+    def invalidate(self) -> None:
+        self._key = None
+
+
+digest_cache = DigestCache()
+
+
+def publish_digest(session: Session, chat_id, digest: Digest, day: date) -> int:
+    """
+    Ставит анонс в очередь отправки в рамках транзакции сессии. Ключи
+    идемпотентности привязаны к дню, поэтому повторный запуск в тот же день
+    ничего не дублирует. Очередь отправляет сообщения одного чата по порядку.
+    Возвращает количество сообщений.
+    """
+    key = f"digest:{chat_id}:{day.isoformat()}"
+    parts = []
+    albums = list(digest.albums)
+    if digest.caption:
+        parts.append(('send_media_group', {'media': album_media(albums.pop(0), caption=digest.caption, parse_mode='MarkdownV2')}))
+    for text in digest.messages:
+        parts.append(('send_message', {'text': text, 'parse_mode': 'MarkdownV2', 'disable_web_page_preview': True}))
+    for album in albums:
+        parts.append(('send_media_group', {'media': album_media(album)}))
+
+    for index, (method, payload) in enumerate(parts):
+        enqueue_message(session, chat_id, method, idempotency_key=f"{key}:{index}", **payload)
+    return len(parts)
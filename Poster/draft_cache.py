@@ -0,0 +1,84 @@
+# draft_cache.py
+
+from collections import OrderedDict
+
+from sqlalchemy.orm import Session
+
+from config import DRAFT_LIST_CACHE_USERS
+from draft_index import draft_index
+from metrics import metrics
+from read_models import draft_summaries
+
+
+class CachedDrafts:
+    """
+    Черновики пользователя и уже отрисованные по ним сообщения:
+    имя представления -> результат функции отрисовки.
+    """
+
+    __slots__ = ('drafts', 'views')
+
+    def __init__(self, drafts: list):
+        self.drafts = drafts
+        self.views = {}
+
+
+class DraftListCache:
+    """
+    Списки черновиков по пользователям с вытеснением давно не использованных.
+    Список читается из базы при первом обращении и хранится, пока черновики
+    пользователя не изменятся: все места, где они меняются, вызывают
+    invalidate_drafts после коммита.
+    """
+
+    def __init__(self, max_users: int):
+        self.max_users = max_users
+        self._entries = OrderedDict()
+
+    def _entry(self, session: Session, user_id: int) -> CachedDrafts:
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            self._entries.move_to_end(user_id)
+            metrics.increment('draft_lists.hits')
+            return entry
+
+        metrics.increment('draft_lists.misses')
+        entry = CachedDrafts(draft_summaries(session, user_id))
+        self._entries[user_id] = entry
+        if len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+        return entry
+
+    def summaries(self, session: Session, user_id: int) -> list:
+        """
+        Список DraftSummary пользователя от старых к новым.
+        """
+        return self._entry(session, user_id).drafts
+
+    def rendered(self, session: Session, user_id: int, view: str, render):
+        """
+        Сообщение со списком черновиков в представлении view. render(drafts)
+        вызывается только при первом обращении после изменения черновиков.
+        """
+        entry = self._entry(session, user_id)
+        if view not in entry.views:
+            entry.views[view] = render(entry.drafts)
+        return entry.views[view]
+
+    def invalidate(self, user_id: int) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+draft_lists = DraftListCache(DRAFT_LIST_CACHE_USERS)
+
+
+def invalidate_drafts(user_id: int) -> None:
+    """
+    Сбрасывает всё, что построено по черновикам пользователя: список
+    черновиков и inline-индекс. Вызывается после коммита изменений.
+    """
+    draft_lists.invalidate(user_id)
+    draft_index.invalidate(user_id)
@@ -0,0 +1,137 @@
+# draft_index.py
+
+import bisect
+from collections import OrderedDict
+
+from sqlalchemy.orm import Session
+from telegram import (
+    InlineQueryResultArticle,
+    InlineQueryResultCachedPhoto,
+    InputTextMessageContent,
+)
+
+from config import INLINE_INDEX_MAX_USERS
+from database import SessionLocal
+from metrics import metrics
+from models import Draft
+from utils.formatter import render_post, unescape_markdown
+
+DRAFT_FIELDS = ('title', 'date', 'time_start', 'time_end', 'place_name', 'place_url', 'text', 'contact')
+
+
+def normalize(text: str) -> str:
+    return ' '.join((text or '').lower().replace('ё', 'е').split())
+
+
+def render_result(draft: Draft):
+    """
+    Готовит inline-результат для черновика. Выполняется один раз при построении индекса.
+    """
+    post = render_post({field: getattr(draft, field) for field in DRAFT_FIELDS})
+    title = unescape_markdown(draft.title or '') or 'Без заголовка'
+    description = unescape_markdown(f"{draft.date or ''} {draft.time_start or ''}").strip()
+
+    if draft.image:
+        return InlineQueryResultCachedPhoto(
+            id=str(draft.id),
+            photo_file_id=draft.image,
+            title=title,
+            description=description,
+            caption=post,
+            parse_mode='MarkdownV2',
+        )
+    return InlineQueryResultArticle(
+        id=str(draft.id),
+        title=title,
+        description=description,
+        input_message_content=InputTextMessageContent(post, parse_mode='MarkdownV2'),
+    )
+
+
+class UserDraftIndex:
+    """
+    Префиксный индекс по заголовкам черновиков одного пользователя.
+
+    Для каждого черновика в отсортированный список ключей попадают все «хвосты»
+    заголовка, начиная с каждого слова, поэтому запрос «конц» найдёт и
+    «Концерт в парке», и «Большой концерт». Поиск — bisect по списку, O(log n + k).
+    """
+
+    __slots__ = ('keys', 'results', 'ordered')
+
+    def __init__(self, drafts: list):
+        self.keys = []
+        self.results = {}
+        # Без запроса показываем черновики от новых к старым
+        self.ordered = []
+
+        for draft in sorted(drafts, key=lambda d: d.id, reverse=True):
+            result = render_result(draft)
+            self.results[draft.id] = result
+            self.ordered.append(result)
+
+            words = normalize(unescape_markdown(draft.title or '')).split()
+            for index in range(len(words)):
+                self.keys.append((' '.join(words[index:]), draft.id))
+
+        self.keys.sort()
+
+    def search(self, query: str) -> list:
+        prefix = normalize(query)
+        if not prefix:
+            return self.ordered
+
+        found = []
+        seen = set()
+        position = bisect.bisect_left(self.keys, (prefix,))
+        while position < len(self.keys) and self.keys[position][0].startswith(prefix):
+            draft_id = self.keys[position][1]
+            if draft_id not in seen:
+                seen.add(draft_id)
+                found.append(self.results[draft_id])
+            position += 1
+
+        # Новые черновики — первыми
+        found.sort(key=lambda result: int(result.id), reverse=True)
+        return found
+
+
+class DraftIndexCache:
+    """
+    Индексы черновиков по пользователям с вытеснением давно не использованных.
+    Индекс строится из базы при первом запросе пользователя и сбрасывается
+    при сохранении или удалении его черновиков.
+    """
+
+    def __init__(self, max_users: int):
+        self.max_users = max_users
+        self._indexes = OrderedDict()
+
+    def get(self, user_id: int) -> UserDraftIndex:
+        index = self._indexes.get(user_id)
+        if index is not None:
+            self._indexes.move_to_end(user_id)
+            metrics.increment('inline_index.hits')
+            return index
+
+        metrics.increment('inline_index.misses')
+        session: Session = SessionLocal()
+        try:
+            drafts = session.query(Draft).filter(Draft.user_id == user_id).all()
+        finally:
+            session.close()
+
+        index = UserDraftIndex(drafts)
+        self._indexes[user_id] = index
+        if len(self._indexes) > self.max_users:
+            self._indexes.popitem(last=False)
+        return index
+
+    def invalidate(self, user_id: int) -> None:
+        self._indexes.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._indexes.clear()
+
+
+draft_index = DraftIndexCache(INLINE_INDEX_MAX_USERS)
@@ -0,0 +1,48 @@
+# fanout.py
+
+import asyncio
+import logging
+
+from config import FANOUT_CONCURRENCY
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class FanOutError(Exception):
+    """
+    Часть вызовов завершилась ошибкой. errors — словарь {метка: исключение}.
+    """
+
+    def __init__(self, errors: dict):
+        self.errors = errors
+        super().__init__(", ".join(f"{label}: {error}" for label, error in errors.items()))
+
+
+async def fan_out(calls: dict, limit: int = FANOUT_CONCURRENCY, raise_errors: bool = True) -> dict:
+    """
+    Выполняет независимые вызовы Bot API одновременно, не больше limit за раз.
+
+    calls — словарь {метка: awaitable}. Ошибка одного вызова не прерывает остальные:
+    все вызовы доводятся до конца, ошибки записываются в лог с меткой вызова,
+    после чего выбрасывается FanOutError (или, при raise_errors=False,
+    исключения возвращаются вместо результатов).
+    Возвращает словарь {метка: результат}.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(awaitable):
+        async with semaphore:
+            return await awaitable
+
+    labels = list(calls)
+    results = await asyncio.gather(*(run(calls[label]) for label in labels), return_exceptions=True)
+    outcome = dict(zip(labels, results))
+
+    errors = {label: result for label, result in outcome.items() if isinstance(result, Exception)}
+    for label, error in errors.items():
+        metrics.increment('fanout.errors')
+        logger.error(f"Ошибка вызова '{label}': {error}")
+    if errors and raise_errors:
+        raise FanOutError(errors)
+    return outcome
@@ -0,0 +1,26 @@
+# handlers/activity.py
+
+from telegram import Update
+from telegram.ext import ContextTypes, TypeHandler
+
+from user_state import activity
+
+# Группа обработчика: раньше ограничителя частоты, чтобы учитывать и отброшенные обновления
+ACTIVITY_GROUP = -2
+
+
+async def track_activity(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Отмечает время последней активности пользователя и чата.
+    """
+    activity.touch(
+        user_id=update.effective_user.id if update.effective_user else None,
+        chat_id=update.effective_chat.id if update.effective_chat else None,
+    )
+
+
+def activity_handlers() -> list:
+    """
+    Возвращает список обработчиков учёта активности.
+    """
+    return [TypeHandler(Update, track_activity)]
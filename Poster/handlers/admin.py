@@ -1,12 +1,26 @@
 # handlers/admin.py
 
+import asyncio
+import os
+import tempfile
+
 from telegram import Update
-from telegram.ext import ContextTypes, CommandHandler, filters
+from telegram.ext import ContextTypes, CommandHandler, MessageHandler, filters
 from sqlalchemy.orm import Session
 
-from config import ADMIN_IDS
+from data_transfer import (
+    detect_format,
+    import_responsible_persons,
+    export_drafts,
+    export_responsible_persons,
+)
+from assignments import reviewer_load
+from config import STATS_DAYS
 from database import SessionLocal
-from models import ResponsiblePerson
+from models import AdminRole, ResponsiblePerson
+from permissions import is_admin, notify_permissions_changed
+from read_models import release_assignments
+from stats import load_stats, format_stats
 
 async def add_responsible(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
@@ -15,7 +29,7 @@ async def add_responsible(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     """
     user_id = update.effective_user.id
 
-    if user_id not in ADMIN_IDS:
+    if not is_admin(user_id):
         await update.message.reply_text("У вас нет прав для выполнения этой команды.")
         return
 
@@ -56,7 +70,7 @@ async def remove_responsible(update: Update, context: ContextTypes.DEFAULT_TYPE)
     """
     user_id = update.effective_user.id
 
-    if user_id not in ADMIN_IDS:
+    if not is_admin(user_id):
         await update.message.reply_text("У вас нет прав для выполнения этой команды.")
         return
 
@@ -83,11 +97,195 @@ async def remove_responsible(update: Update, context: ContextTypes.DEFAULT_TYPE)
         session.close()
         return
 
+    # Открытые назначения удалённого ответственного снимаются одним UPDATE
+    released = release_assignments(session, telegram_id)
     session.delete(person)
     session.commit()
     session.close()
+    reviewer_load.counts.pop(telegram_id, None)
+
+    message = f"Ответственный {person.name} с Telegram_ID {telegram_id} удалён успешно."
+    if released:
+        message += f" Снято открытых назначений: {released}."
+    await update.message.reply_text(message)
+
+async def add_admin(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Обработчик команды /add_admin <Telegram_ID>
+    Выдаёт пользователю права администратора.
+    """
+    user_id = update.effective_user.id
+
+    if not is_admin(user_id):
+        await update.message.reply_text("У вас нет прав для выполнения этой команды.")
+        return
+
+    args = context.args
+
+    if len(args) != 1 or not args[0].isdigit():
+        await update.message.reply_text("Использование: /add_admin <Telegram_ID>")
+        return
+
+    telegram_id = int(args[0])
+
+    session: Session = SessionLocal()
+
+    if session.query(AdminRole).filter_by(telegram_id=telegram_id).first():
+        await update.message.reply_text(f"Пользователь {telegram_id} уже является администратором.")
+        session.close()
+        return
+
+    session.add(AdminRole(telegram_id=telegram_id, role='admin'))
+    session.commit()
+    session.close()
+    notify_permissions_changed()
+
+    await update.message.reply_text(f"Пользователь {telegram_id} назначен администратором.")
+
+async def remove_admin(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Обработчик команды /remove_admin <Telegram_ID>
+    Отзывает права администратора. Администраторов из ADMIN_IDS удалить нельзя.
+    """
+    user_id = update.effective_user.id
+
+    if not is_admin(user_id):
+        await update.message.reply_text("У вас нет прав для выполнения этой команды.")
+        return
+
+    args = context.args
+
+    if len(args) != 1 or not args[0].isdigit():
+        await update.message.reply_text("Использование: /remove_admin <Telegram_ID>")
+        return
+
+    telegram_id = int(args[0])
+
+    session: Session = SessionLocal()
+
+    role = session.query(AdminRole).filter_by(telegram_id=telegram_id).first()
+
+    if not role:
+        await update.message.reply_text(f"Пользователь {telegram_id} не является администратором.")
+        session.close()
+        return
+
+    if role.role == 'owner':
+        await update.message.reply_text(f"Администратор {telegram_id} задан в ADMIN_IDS и не может быть удалён.")
+        session.close()
+        return
+
+    session.delete(role)
+    session.commit()
+    session.close()
+    notify_permissions_changed()
+
+    await update.message.reply_text(f"Пользователь {telegram_id} больше не является администратором.")
+
+async def import_responsible(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Обработчик документа с подписью /import_responsible [skip]
+    Массово добавляет ответственных лиц из CSV (колонки name, telegram_id) или JSONL файла.
+    По умолчанию имя существующего ответственного обновляется, с параметром skip — остаётся прежним.
+    """
+    user_id = update.effective_user.id
+
+    if not is_admin(user_id):
+        await update.message.reply_text("У вас нет прав для выполнения этой команды.")
+        return
+
+    document = update.message.document
+    fmt = detect_format(document.file_name)
+
+    if not fmt:
+        await update.message.reply_text("Поддерживаются только файлы .csv и .jsonl.")
+        return
+
+    on_conflict = 'skip' if 'skip' in update.message.caption.split()[1:] else 'update'
+
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, f"import.{fmt}")
+            file = await document.get_file()
+            await file.download_to_drive(path)
+            # Импорт выполняется в отдельном потоке, чтобы не блокировать обработку других обновлений
+            processed, skipped = await asyncio.to_thread(import_responsible_persons, path, fmt, on_conflict)
+    except Exception as e:
+        await update.message.reply_text(f"Ошибка при импорте ответственных: {e}")
+        return
+
+    await update.message.reply_text(f"Импорт завершён. Обработано записей: {processed}, пропущено некорректных: {skipped}.")
+
+async def _send_export(update: Update, context: ContextTypes.DEFAULT_TYPE, exporter, name: str, usage: str) -> None:
+    """
+    Выгружает данные во временный файл и отправляет его администратору документом.
+    """
+    user_id = update.effective_user.id
+
+    if not is_admin(user_id):
+        await update.message.reply_text("У вас нет прав для выполнения этой команды.")
+        return
+
+    args = context.args
+    fmt = args[0].lower() if args else 'csv'
+
+    if len(args) > 1 or fmt not in ('csv', 'jsonl'):
+        await update.message.reply_text(usage)
+        return
+
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            filename = f"{name}.{fmt}"
+            path = os.path.join(directory, filename)
+            count = await asyncio.to_thread(exporter, path, fmt)
+            with open(path, 'rb') as file:
+                await update.message.reply_document(
+                    document=file,
+                    filename=filename,
+                    caption=f"Выгружено записей: {count}"
+                )
+    except Exception as e:
+        await update.message.reply_text(f"Ошибка при выгрузке: {e}")
+
+async def export_drafts_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Обработчик команды /export_drafts [csv|jsonl]
+    Выгружает все черновики в файл.
+    """
+    await _send_export(update, context, export_drafts, 'drafts', "Использование: /export_drafts [csv|jsonl]")
+
+async def export_responsible_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Обработчик команды /export_responsible [csv|jsonl]
+    Выгружает всех ответственных лиц в файл.
+    """
+    await _send_export(
+        update, context, export_responsible_persons, 'responsible_persons',
+        "Использование: /export_responsible [csv|jsonl]"
+    )
+
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Обработчик команды /stats
+    Показывает заявки по дням, назначения по ответственным и время до назначения.
+    Данные берутся из заранее посчитанных счётчиков, а не из всей истории заявок.
+    """
+    if not is_admin(update.effective_user.id):
+        await update.message.reply_text("У вас нет прав для выполнения этой команды.")
+        return
+
+    session: Session = SessionLocal()
+    try:
+        stats = load_stats(session, STATS_DAYS)
+        names = dict(
+            session.query(ResponsiblePerson.telegram_id, ResponsiblePerson.name)
+            .filter(ResponsiblePerson.telegram_id.in_(list(stats.reviewers)))
+            .all()
+        )
+    finally:
+        session.close()
 
-    await update.message.reply_text(f"Ответственный {person.name} с Telegram_ID {telegram_id} удалён успешно.")
+    await update.message.reply_text(format_stats(stats, names))
 
 def admin_handlers() -> list:
     """
@@ -96,4 +294,13 @@ def admin_handlers() -> list:
     return [
         CommandHandler('add_responsible', add_responsible, filters=filters.ChatType.PRIVATE),
         CommandHandler('remove_responsible', remove_responsible, filters=filters.ChatType.PRIVATE),
+        CommandHandler('add_admin', add_admin, filters=filters.ChatType.PRIVATE),
+        CommandHandler('remove_admin', remove_admin, filters=filters.ChatType.PRIVATE),
+        CommandHandler('export_drafts', export_drafts_command, filters=filters.ChatType.PRIVATE),
+        CommandHandler('export_responsible', export_responsible_command, filters=filters.ChatType.PRIVATE),
+        CommandHandler('stats', stats_command, filters=filters.ChatType.PRIVATE),
+        MessageHandler(
+            filters.ChatType.PRIVATE & filters.Document.ALL & filters.CaptionRegex(r'^/import_responsible\b'),
+            import_responsible
+        ),
     ]
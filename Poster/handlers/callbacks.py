@@ -1,214 +1,97 @@
 # handlers/callbacks.py
 
-from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
-from telegram.ext import (
-    ContextTypes,
-    CallbackQueryHandler,
-)
+from telegram import Update
+from telegram.ext import ContextTypes
 from sqlalchemy.orm import Session
 
-from config import REVIEW_CHAT_ID
+from assignments import reviewer_load, assign, assignment_notification, close_assignment
+from callback_router import router, RESPONSIBLE, MAIN_MENU, DELETE_DRAFT, CLOSE_ASSIGNMENT
 from database import SessionLocal
-from models import Draft, ResponsiblePerson
-from utils.formatter import format_text
-from handlers.main_menu import main_menu_handler  # Импортируем обработчик главного меню
-
-# Обработчик действий после создания поста: сохранение в черновики, отправка на согласование, редактирование
-async def handle_post_action(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+from digest import digest_cache
+from fanout import fan_out
+from models import Assignment, ResponsiblePerson, Submission
+from handlers.drafts import delete_draft
+from handlers.main_menu import show_main_menu
+
+# Обработчик выбора ответственного лица (в том числе ручного переназначения)
+async def handle_responsible_selection(update: Update, context: ContextTypes.DEFAULT_TYPE,
+                                       submission_id: int, telegram_id: int) -> None:
     query = update.callback_query
-    await query.answer()
-    action = query.data
-
-    if action == 'save_draft':
-        await save_draft(query, context)
-    elif action == 'send_for_approval':
-        await send_for_approval(query, context)
-    elif action == 'edit_post':
-        await edit_post(query, context)
-    else:
-        await query.edit_message_text("Неизвестное действие.", reply_markup=None)
 
-async def save_draft(query, context: ContextTypes.DEFAULT_TYPE) -> None:
     session: Session = SessionLocal()
     try:
-        draft = Draft(
-            user_id=query.from_user.id,
-            title=context.user_data.get('title', 'Без заголовка'),
-            date=context.user_data.get('date', 'Не указана'),
-            time_start=context.user_data.get('time_start', 'Не указано'),
-            time_end=context.user_data.get('time_end', 'Не указано'),
-            place_name=context.user_data.get('place_name', 'Не указано'),
-            place_url=context.user_data.get('place_url', ''),
-            text=context.user_data.get('text', 'Без текста'),
-            contact=context.user_data.get('contact', 'Не указано'),
-            image=context.user_data.get('image')
-        )
-        session.add(draft)
+        person = session.query(ResponsiblePerson).filter_by(telegram_id=telegram_id).first()
+        submission = session.get(Submission, submission_id)
+        if not person or not submission:
+            await query.answer()
+            await query.edit_message_text(text="Ответственный или заявка не найдены.")
+            return
+
+        assignment, released = assign(session, submission.id, telegram_id, 'manual')
+        if assignment is None:
+            await query.answer(f"{person.name} уже назначен.")
+            return
         session.commit()
+        reviewer_load.apply(assigned=telegram_id, released=released)
+
+        await query.answer()
+        # Уведомление ответственному и правка сообщения в чате согласования независимы
+        await fan_out({
+            'notify_responsible': context.bot.send_message(
+                chat_id=telegram_id,
+                **assignment_notification(submission, assignment)
+            ),
+            'edit_review': query.edit_message_text(text=f"Ответственный назначен: {person.name}"),
+        }, raise_errors=False)
     except Exception as e:
-        await query.message.reply_text(f"Ошибка при сохранении черновика: {e}")
         session.rollback()
+        await query.edit_message_text(text=f"Ошибка при назначении ответственного: {e}")
     finally:
         session.close()
 
-    await query.edit_message_caption(
-        caption="Пост сохранён в черновики.",
-        parse_mode='MarkdownV2',
-        reply_markup=None
-    )
-    await query.message.reply_text(
-        "Пост сохранён в черновики.",
-        reply_markup=InlineKeyboardMarkup([
-            [InlineKeyboardButton("Главное меню", callback_data='main_menu')]
-        ])
-    )
-    context.user_data.clear()
+# Обработчик кнопки «Проверено» в уведомлении ответственного
+async def handle_close_assignment(update: Update, context: ContextTypes.DEFAULT_TYPE, assignment_id: int) -> None:
+    query = update.callback_query
 
-async def send_for_approval(query, context: ContextTypes.DEFAULT_TYPE) -> None:
     session: Session = SessionLocal()
     try:
-        post_data = context.user_data
-
-        post = (
-            f"📢 *{post_data.get('title', 'Без заголовка')}*\n\n"
-            f"📅 *Дата*: {post_data.get('date', 'Не указана')}\n"
-            f"⏰ *Время*: {post_data.get('time_start', 'Не указано')} - {post_data.get('time_end', 'Не указано')}\n"
-            f"📍 *Место*: [{post_data.get('place_name', 'Не указано')}]({post_data.get('place_url', '')})\n\n"
-            f"{post_data.get('text', 'Без текста')}\n\n"
-            f"📞 *Контакт*: {post_data.get('contact', 'Не указано')}"
-        )
-
-        if post_data.get('image'):
-            await context.bot.send_photo(
-                chat_id=REVIEW_CHAT_ID,
-                photo=post_data['image'],
-                caption=post,
-                parse_mode='MarkdownV2'
-            )
-        else:
-            await context.bot.send_message(
-                chat_id=REVIEW_CHAT_ID,
-                text=post,
-                parse_mode='MarkdownV2'
-            )
+        assignment = session.get(Assignment, assignment_id)
+        if assignment is None or assignment.responsible_id != query.from_user.id:
+            await query.answer("Назначение не найдено.")
+            return
+        if assignment.status != 'open':
+            await query.answer("Заявка уже передана другому ответственному или проверена.")
+            await query.edit_message_reply_markup(reply_markup=None)
+            return
 
-        # Получение списка ответственных лиц
-        responsible_persons = session.query(ResponsiblePerson).all()
+        close_assignment(session, assignment)
+        session.commit()
+        reviewer_load.apply(released=assignment.responsible_id)
+        # Проверенная заявка попадает в анонс — собранный ранее анонс устарел
+        digest_cache.invalidate()
 
-        if responsible_persons:
-            keyboard = [
-                [InlineKeyboardButton(person.name, callback_data=f'responsible_{person.telegram_id}')]
-                for person in responsible_persons
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            await context.bot.send_message(
-                chat_id=REVIEW_CHAT_ID,
-                text="Выберите ответственного за этот пост:",
-                reply_markup=reply_markup
-            )
-        else:
-            await context.bot.send_message(
-                chat_id=REVIEW_CHAT_ID,
-                text="Нет ответственных лиц для назначения."
-            )
-    except Exception as e:
-        await query.message.reply_text(f"Ошибка при отправке на согласование: {e}")
-        session.rollback()
+        await query.answer()
+        await query.edit_message_text(text=f"Заявка #{assignment.submission_id} отмечена как проверенная.")
     finally:
         session.close()
 
-    await query.edit_message_caption(
-        caption="Пост отправлен на согласование.",
-        parse_mode='MarkdownV2',
-        reply_markup=None
-    )
-    await query.message.reply_text(
-        "Пост отправлен на согласование.",
-        reply_markup=InlineKeyboardMarkup([
-            [InlineKeyboardButton("Главное меню", callback_data='main_menu')]
-        ])
-    )
-    context.user_data.clear()
-
-async def edit_post(query, context: ContextTypes.DEFAULT_TYPE) -> None:
-    await query.edit_message_caption(
-        caption="Редактирование поста. Выберите поле для редактирования:",
-        parse_mode='MarkdownV2',
-        reply_markup=InlineKeyboardMarkup([
-            [InlineKeyboardButton("Заголовок", callback_data='edit_title')],
-            [InlineKeyboardButton("Дата", callback_data='edit_date')],
-            [InlineKeyboardButton("Время начала", callback_data='edit_time_start')],
-            [InlineKeyboardButton("Время конца", callback_data='edit_time_end')],
-            [InlineKeyboardButton("Место", callback_data='edit_place')],
-            [InlineKeyboardButton("Текст", callback_data='edit_text')],
-            [InlineKeyboardButton("Контакт", callback_data='edit_contact')],
-            [InlineKeyboardButton("Картинка", callback_data='edit_image')],
-            [InlineKeyboardButton("Отмена", callback_data='cancel_edit')]
-        ])
-    )
-    return
-
-# Обработчик выбора ответственного лица
-async def handle_responsible_selection(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    query = update.callback_query
-    await query.answer()
-    data = query.data
-
-    if data.startswith('responsible_'):
-        try:
-            telegram_id = int(data.split('_')[1])
-        except ValueError:
-            await query.edit_message_text(
-                text="Неверный формат Telegram_ID.",
-                parse_mode='MarkdownV2'
-            )
-            return
-
-        session: Session = SessionLocal()
-        try:
-            person = session.query(ResponsiblePerson).filter_by(telegram_id=telegram_id).first()
-            if person:
-                # Отправка уведомления ответственному лицу
-                await context.bot.send_message(
-                    chat_id=telegram_id,
-                    text=f"Вам назначен ответственный за новый пост:\n\n{format_text(context.user_data.get('title', 'Без заголовка'))}"
-                )
-                await query.edit_message_text(
-                    text=f"Ответственный назначен: {person.name}",
-                    parse_mode='MarkdownV2'
-                )
-            else:
-                await query.edit_message_text(
-                    text="Ответственный не найден.",
-                    parse_mode='MarkdownV2'
-                )
-        except Exception as e:
-            await query.edit_message_text(
-                text=f"Ошибка при назначении ответственного: {e}",
-                parse_mode='MarkdownV2'
-            )
-            session.rollback()
-        finally:
-            session.close()
-
-# Обработчик главного меню из CallbackQuery
+# Обработчик кнопки «Главное меню»
 async def handle_main_menu_selection(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    query = update.callback_query
-    await query.answer()
-    data = query.data
-
-    if data == 'main_menu':
-        # Вызываем обработчик главного меню
-        await main_menu_handler(update, context)
-    else:
-        await query.edit_message_text("Неизвестное действие.", reply_markup=None)
+    await update.callback_query.answer()
+    await show_main_menu(update, context)
 
 def callbacks_handlers() -> list:
     """
     Возвращает список обработчиков для CallbackQuery.
+    Все кнопки вне диалога создания поста проходят через единый маршрутизатор;
+    последним регистрируется обработчик устаревших кнопок.
     """
+    router.register(RESPONSIBLE, handle_responsible_selection, arg_types=(int, int), idempotent=True)
+    router.register(CLOSE_ASSIGNMENT, handle_close_assignment, arg_types=(int,), idempotent=True)
+    router.register(MAIN_MENU, handle_main_menu_selection)
+    router.register(DELETE_DRAFT, delete_draft, arg_types=(int,), idempotent=True)
+
     return [
-        CallbackQueryHandler(handle_post_action, pattern='^(save_draft|send_for_approval|edit_post)$'),
-        CallbackQueryHandler(handle_responsible_selection, pattern='^responsible_\\d+$'),
-        CallbackQueryHandler(handle_main_menu_selection, pattern='^main_menu$'),
+        router.handler(),
+        router.stale_handler(),
     ]
@@ -0,0 +1,31 @@
+# handlers/digest.py
+
+from sqlalchemy.orm import Session
+from telegram import Update
+from telegram.ext import ContextTypes, CommandHandler
+
+from config import DIGEST_DAYS
+from digest import digest_cache
+
+async def show_digest(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Обработчик команды /digest
+    Показывает анонс ближайших событий. Анонс берётся из кэша, поэтому
+    повторные запросы не обращаются к базе.
+    """
+    session: Session = context.bot_data['db_session']
+    digest = digest_cache.get(session)
+    if not digest.events:
+        await update.message.reply_text(f"В ближайшие {DIGEST_DAYS} дней событий нет.")
+        return
+
+    # В личных сообщениях обложки не нужны: показываем только тексты анонса
+    texts = ([digest.caption] if digest.caption else []) + digest.messages
+    for text in texts:
+        await update.message.reply_text(text, parse_mode='MarkdownV2', disable_web_page_preview=True)
+
+def digest_handlers() -> list:
+    """
+    Возвращает список обработчиков команд анонса.
+    """
+    return [CommandHandler('digest', show_digest)]
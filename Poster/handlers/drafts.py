@@ -1,18 +1,21 @@
 # handlers/drafts.py
 
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
-from telegram.ext import (
-    ContextTypes,
-    CallbackQueryHandler,
-)
-from models import Draft
+from telegram.ext import ContextTypes, CommandHandler
+from callback_router import router, DELETE_DRAFT, MAIN_MENU
 from sqlalchemy.orm import Session
 from config import ADMIN_IDS, REVIEW_CHAT_ID
+from draft_cache import draft_lists, invalidate_drafts
+from models import Draft
+from read_models import delete_user_draft
+from revisions import list_revisions, restore_revision
+from handlers.post_creation import FIELD_NAMES
 from utils.formatter import format_text
 
 def build_drafts_message(drafts: list) -> (str, InlineKeyboardMarkup):
     """
     Формирует текст сообщения и клавиатуру с кнопками для удаления черновиков.
+    drafts — список DraftSummary.
     """
     if not drafts:
         return "У вас пока нет черновиков.", None
@@ -28,10 +31,10 @@ def build_drafts_message(drafts: list) -> (str, InlineKeyboardMarkup):
         message_text += f"📍 {format_text(draft.place_name)}\n\n"
         
         # Добавляем кнопку для удаления этого черновика
-        keyboard.append([InlineKeyboardButton(f"❌ Удалить черновик {draft.id}", callback_data=f'delete_{draft.id}')])
+        keyboard.append([InlineKeyboardButton(f"❌ Удалить черновик {draft.id}", callback_data=router.encode(DELETE_DRAFT, draft.id))])
     
     # Добавляем кнопку для возврата в главное меню
-    keyboard.append([InlineKeyboardButton("↩️ Главное меню", callback_data='main_menu')])
+    keyboard.append([InlineKeyboardButton("↩️ Главное меню", callback_data=router.encode(MAIN_MENU))])
     
     reply_markup = InlineKeyboardMarkup(keyboard)
     
@@ -44,9 +47,7 @@ async def view_drafts(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
     user_id = update.effective_user.id
     session: Session = context.bot_data['db_session']
     
-    drafts = session.query(Draft).filter(Draft.user_id == user_id).all()
-    
-    message_text, reply_markup = build_drafts_message(drafts)
+    message_text, reply_markup = draft_lists.rendered(session, user_id, 'manage', build_drafts_message)
     
     await update.message.reply_text(
         message_text,
@@ -54,34 +55,25 @@ async def view_drafts(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         reply_markup=reply_markup
     )
 
-async def delete_draft(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+async def delete_draft(update: Update, context: ContextTypes.DEFAULT_TYPE, draft_id: int) -> None:
     """
     Удаляет черновик по ID и уведомляет пользователя.
     """
     query = update.callback_query
     await query.answer()
     
-    data = query.data
-    if not data.startswith('delete_'):
-        await query.edit_message_text("Неизвестная команда.")
-        return
-    
-    draft_id = int(data.split('_')[1])
     user_id = query.from_user.id
     session: Session = context.bot_data['db_session']
     
-    draft = session.query(Draft).filter(Draft.id == draft_id, Draft.user_id == user_id).first()
-    
-    if draft:
-        session.delete(draft)
+    if delete_user_draft(session, user_id, draft_id):
         session.commit()
+        invalidate_drafts(user_id)
         await query.edit_message_text(f"Черновик {draft_id} успешно удалён.")
         
         # Отправить обновлённый список черновиков
-        drafts = session.query(Draft).filter(Draft.user_id == user_id).all()
-        message_text, reply_markup = build_drafts_message(drafts)
+        message_text, reply_markup = draft_lists.rendered(session, user_id, 'manage', build_drafts_message)
         
-        if drafts:
+        if reply_markup:
             await query.message.reply_text(
                 message_text,
                 parse_mode='HTML',
@@ -97,11 +89,77 @@ async def delete_draft(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     
     session.close()
 
+def _parse_ids(args: list, count: int) -> list:
+    if len(args) != count or not all(arg.isdigit() for arg in args):
+        return None
+    return [int(arg) for arg in args]
+
+async def view_revisions(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Обработчик команды /revisions <ID черновика>
+    Показывает историю изменений черновика.
+    """
+    ids = _parse_ids(context.args, 1)
+    if not ids:
+        await update.message.reply_text("Использование: /revisions <ID черновика>")
+        return
+
+    draft_id, = ids
+    session: Session = context.bot_data['db_session']
+    draft = session.query(Draft.id).filter(Draft.id == draft_id, Draft.user_id == update.effective_user.id).first()
+    revisions = list_revisions(session, draft_id) if draft else []
+    if not revisions:
+        await update.message.reply_text("История этого черновика не найдена.")
+        return
+
+    lines = [f"История черновика {draft_id}:"]
+    for revision in revisions:
+        changed = ', '.join(FIELD_NAMES.get(field, field) for field in revision.changed.split(',') if field)
+        kind = "полная копия" if revision.kind == 'snapshot' else "изменения"
+        lines.append(
+            f"{revision.number}. {revision.created_at:%d.%m.%Y %H:%M} — {changed or 'исходная версия'} "
+            f"({kind}, {revision.size} байт)"
+        )
+    lines.append("\nВосстановить: /restore_revision <ID черновика> <номер ревизии>")
+    await update.message.reply_text('\n'.join(lines))
+
+async def restore_draft_revision(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Обработчик команды /restore_revision <ID черновика> <номер ревизии>
+    Возвращает черновик к состоянию выбранной ревизии.
+    """
+    ids = _parse_ids(context.args, 2)
+    if not ids:
+        await update.message.reply_text("Использование: /restore_revision <ID черновика> <номер ревизии>")
+        return
+
+    draft_id, number = ids
+    user_id = update.effective_user.id
+    session: Session = context.bot_data['db_session']
+    draft = session.query(Draft).filter(Draft.id == draft_id, Draft.user_id == user_id).first()
+    if not draft:
+        await update.message.reply_text("Черновик не найден или у вас нет прав для его изменения.")
+        return
+
+    revision = restore_revision(session, draft, number)
+    if revision is None:
+        await update.message.reply_text(f"У черновика {draft_id} нет ревизии {number}.")
+        return
+
+    session.commit()
+    invalidate_drafts(user_id)
+    if revision:
+        await update.message.reply_text(
+            f"Черновик {draft_id} восстановлен из ревизии {number} (новая ревизия {revision.number})."
+        )
+    else:
+        await update.message.reply_text(f"Черновик {draft_id} уже совпадает с ревизией {number}.")
+
 def drafts_handlers() -> list:
     """
-    Возвращает список обработчиков для управления черновиками.
+    Возвращает список обработчиков команд истории черновиков.
     """
     return [
-        CallbackQueryHandler(delete_draft, pattern=r'^delete_\d+$'),
-        CallbackQueryHandler(view_drafts, pattern='^main_menu$'),
+        CommandHandler('revisions', view_revisions),
+        CommandHandler('restore_revision', restore_draft_revision),
     ]
@@ -0,0 +1,34 @@
+# handlers/inline.py
+
+from telegram import Update
+from telegram.ext import ContextTypes, InlineQueryHandler
+
+from config import INLINE_CACHE_TIME, INLINE_PAGE_SIZE
+from draft_index import draft_index
+
+async def inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Обработчик inline-запроса @bot <начало заголовка>.
+    Возвращает черновики пользователя из индекса в памяти с постраничной выдачей.
+    """
+    query = update.inline_query
+    offset = int(query.offset) if query.offset.isdigit() else 0
+
+    results = draft_index.get(query.from_user.id).search(query.query)
+    page = results[offset:offset + INLINE_PAGE_SIZE]
+    next_offset = str(offset + INLINE_PAGE_SIZE) if offset + INLINE_PAGE_SIZE < len(results) else ''
+
+    await query.answer(
+        page,
+        cache_time=INLINE_CACHE_TIME,
+        is_personal=True,
+        next_offset=next_offset,
+    )
+
+def inline_handlers() -> list:
+    """
+    Возвращает список обработчиков inline-режима.
+    """
+    return [
+        InlineQueryHandler(inline_query),
+    ]
@@ -8,7 +8,7 @@ from telegram.ext import (
     ContextTypes,
 )
 from utils.formatter import format_text
-from models import Draft
+from draft_cache import draft_lists
 
 # Определяем основные опции меню
 MAIN_MENU_OPTIONS = [
@@ -41,6 +41,16 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     
     return MAIN_MENU  # Возвращаем состояние MAIN_MENU для дальнейшей обработки
 
+async def show_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """
+    Показывает главное меню. Работает и для сообщений, и для нажатий на кнопки.
+    """
+    await update.effective_message.reply_text(
+        "Выберите одно из действий ниже:",
+        reply_markup=main_menu_markup
+    )
+    return MAIN_MENU
+
 async def main_menu_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """
     Обработчик выбора из основного меню.
@@ -69,6 +79,20 @@ async def main_menu_handler(update: Update, context: ContextTypes.DEFAULT_TYPE)
         )
         return MAIN_MENU
 
+def build_menu_drafts_message(drafts: list) -> str:
+    """
+    Краткий список черновиков для основного меню. drafts — список DraftSummary.
+    """
+    if not drafts:
+        return "У вас пока нет черновиков."
+
+    response = "Ваши черновики:\n\n"
+    for draft in drafts:
+        response += f"📝 <b>Черновик {draft.id}</b>\n"
+        response += f"📢 <b>{format_text(draft.title)}</b>\n"
+        response += f"📅 Дата: {format_text(draft.date)}\n\n"
+    return response
+
 async def view_drafts(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Отправляет пользователю список его черновиков.
@@ -83,25 +107,13 @@ async def view_drafts(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         )
         return
     
-    drafts = session.query(Draft).filter(Draft.user_id == user_id).all()
+    response = draft_lists.rendered(session, user_id, 'menu', build_menu_drafts_message)
     
-    if not drafts:
-        await update.message.reply_text(
-            "У вас пока нет черновиков.",
-            reply_markup=main_menu_markup
-        )
-    else:
-        response = "Ваши черновики:\n\n"
-        for draft in drafts:
-            response += f"📝 <b>Черновик {draft.id}</b>\n"
-            response += f"📢 <b>{format_text(draft.title)}</b>\n"
-            response += f"📅 Дата: {format_text(draft.date)}\n\n"
-        
-        await update.message.reply_text(
-            response,
-            parse_mode='HTML',
-            reply_markup=main_menu_markup
-        )
+    await update.message.reply_text(
+        response,
+        parse_mode='HTML',
+        reply_markup=main_menu_markup
+    )
     
     # Не закрываем сессию здесь, так как она хранится в bot_data и используется другими обработчиками
 
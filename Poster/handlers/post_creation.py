@@ -1,19 +1,51 @@
 # handlers/post_creation.py
 
-from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardRemove
+import json
+
+from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton, InputMediaPhoto, ReplyKeyboardMarkup, ReplyKeyboardRemove
+from telegram.error import BadRequest
 from telegram.ext import (
     ContextTypes,
     ConversationHandler,
     MessageHandler,
-    CallbackQueryHandler,
     CommandHandler,
+    TypeHandler,
     filters,
 )
 from utils.validators import validate_date, validate_time, validate_url
-from utils.formatter import format_text
+from utils.formatter import format_text, render_post
+from utils.post_parser import looks_structured, parse_structured_post
 from models import Draft, ResponsiblePerson
 from sqlalchemy.orm import Session
-from config import REVIEW_CHAT_ID
+from config import (
+    REVIEW_CHAT_ID,
+    CONVERSATION_TIMEOUT,
+    AUTO_ASSIGN,
+    WIZARD_EDIT_IN_PLACE,
+    WIZARD_DELETE_INPUTS,
+    WIZARD_DELETE_BATCH,
+)
+from database import SessionLocal
+from draft_cache import invalidate_drafts
+from media_groups import media_group_buffer
+from fanout import fan_out
+from outbox import enqueue_message, album_media, kick_outbox
+from submissions import record_submission, duplicate_warning
+from assignments import reviewer_load, assign, assignment_notification
+from user_state import spill_user_data, restore_user_data
+from idempotency import callback_key, claim_callback
+from revisions import REVISION_FIELDS, draft_fields, record_revision
+from callback_router import (
+    router,
+    POST_CREATION_SCOPE,
+    SKIP,
+    SAVE_DRAFT,
+    SEND_FOR_APPROVAL,
+    EDIT_POST,
+    EDIT_FIELD,
+    CANCEL_EDIT,
+    RESPONSIBLE,
+)
 
 # Определяем состояния для ConversationHandler
 POST_CREATION = range(9)
@@ -85,21 +117,138 @@ POST_STEPS = [
     },
 ]
 
+POST_STEPS_KEYS = [step['key'] for step in POST_STEPS]
+
+# Поля, доступные для редактирования: (поле, кнопка, приглашение)
+EDIT_FIELDS = [
+    ('title', "Заголовок", "Введите новый заголовок или нажмите 'Пропустить':"),
+    ('date', "Дата", "Введите новую дату (например, 25.12.2023) или нажмите 'Пропустить':"),
+    ('time_start', "Время начала", "Введите новое время начала (например, 18:30) или нажмите 'Пропустить':"),
+    ('time_end', "Время конца", "Введите новое время конца (например, 20:30) или нажмите 'Пропустить':"),
+    ('place_name', "Место", "Введите новое название места или нажмите 'Пропустить':"),
+    ('text', "Текст", "Введите новый текст поста или нажмите 'Пропустить':"),
+    ('contact', "Контакт", "Введите новую контактную информацию или нажмите 'Пропустить':"),
+    ('image', "Картинка", "Отправьте новую картинку или нажмите 'Пропустить':"),
+]
+EDIT_PROMPTS = {field: prompt for field, _, prompt in EDIT_FIELDS}
+
+# Названия полей для сообщений пользователю
+FIELD_NAMES = {
+    'title': 'заголовок',
+    'date': 'дата',
+    'time_start': 'время начала',
+    'time_end': 'время конца',
+    'place_name': 'место',
+    'place_url': 'ссылка на место',
+    'text': 'текст',
+    'contact': 'контакт',
+    'image': 'картинка',
+}
+
+class StructuredPostFilter(filters.MessageFilter):
+    """
+    Пропускает сообщения (или подписи к фото) с подписанными полями поста: «Заголовок: ...», «Дата: ...».
+    """
+    def filter(self, message) -> bool:
+        return looks_structured(message.text or message.caption)
+
+structured_post_filter = StructuredPostFilter()
+
 def get_skip_keyboard():
     keyboard = [
-        [InlineKeyboardButton("Пропустить", callback_data='skip')]
+        [InlineKeyboardButton("Пропустить", callback_data=router.encode(SKIP))]
     ]
     return InlineKeyboardMarkup(keyboard)
 
 def get_post_actions_keyboard():
     keyboard = [
-        [InlineKeyboardButton("📄 В черновик", callback_data='save_draft')],
-        [InlineKeyboardButton("🚀 Отправить на согласование", callback_data='send_for_approval')],
-        [InlineKeyboardButton("✏️ Редактировать", callback_data='edit_post')]
+        [InlineKeyboardButton("📄 В черновик", callback_data=router.encode(SAVE_DRAFT))],
+        [InlineKeyboardButton("🚀 Отправить на согласование", callback_data=router.encode(SEND_FOR_APPROVAL))],
+        [InlineKeyboardButton("✏️ Редактировать", callback_data=router.encode(EDIT_POST))]
     ]
     return InlineKeyboardMarkup(keyboard)
 
+def remember_wizard_message(context: ContextTypes.DEFAULT_TYPE, message) -> None:
+    """
+    Запоминает в состоянии диалога сообщение бота, которое редактируется на каждом шаге.
+    """
+    if WIZARD_EDIT_IN_PLACE:
+        context.user_data['wizard_message'] = {'id': message.message_id, 'photo': bool(message.photo)}
+
+async def edit_action_message(query, text: str, reply_markup=None, context: ContextTypes.DEFAULT_TYPE = None) -> None:
+    """
+    Редактирует сообщение с кнопками: подпись, если это фото, иначе текст.
+    После отправки альбома кнопки находятся в отдельном текстовом сообщении.
+    """
+    if query.message.photo:
+        await query.edit_message_caption(caption=text, reply_markup=reply_markup)
+    else:
+        await query.edit_message_text(text=text, reply_markup=reply_markup)
+    if context is not None:
+        remember_wizard_message(context, query.message)
+
+async def show_wizard(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str,
+                      reply_markup=None, parse_mode: str = None) -> None:
+    """
+    Показывает очередной шаг создания поста. В режиме мастера редактирует
+    единственное сообщение бота в диалоге, иначе (или если редактирование
+    невозможно, например сообщение удалено) отправляет новое.
+    """
+    wizard = context.user_data.get('wizard_message') if WIZARD_EDIT_IN_PLACE else None
+    chat_id = update.effective_chat.id
+    if wizard:
+        try:
+            if wizard['photo']:
+                await context.bot.edit_message_caption(
+                    chat_id=chat_id, message_id=wizard['id'],
+                    caption=text, reply_markup=reply_markup, parse_mode=parse_mode
+                )
+            else:
+                await context.bot.edit_message_text(
+                    chat_id=chat_id, message_id=wizard['id'],
+                    text=text, reply_markup=reply_markup, parse_mode=parse_mode
+                )
+            return
+        except BadRequest as e:
+            if 'not modified' in str(e).lower():
+                return
+
+    message = await update.effective_message.reply_text(text, reply_markup=reply_markup, parse_mode=parse_mode)
+    remember_wizard_message(context, message)
+
+def remember_input(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Запоминает сообщение пользователя с ответом на шаг, чтобы удалить его вместе
+    с остальными, когда наберётся WIZARD_DELETE_BATCH сообщений.
+    """
+    if not (WIZARD_EDIT_IN_PLACE and WIZARD_DELETE_INPUTS and update.message):
+        return
+    inputs = context.user_data.setdefault('wizard_inputs', [])
+    inputs.append(update.message.message_id)
+    if len(inputs) >= WIZARD_DELETE_BATCH:
+        flush_inputs(update, context)
+
+def flush_inputs(update: Update, context: ContextTypes.DEFAULT_TYPE, extra: list = None) -> None:
+    """
+    Удаляет накопленные сообщения фоновой задачей, не задерживая ответ пользователю.
+    """
+    message_ids = context.user_data.pop('wizard_inputs', []) + (extra or [])
+    if message_ids:
+        context.job_queue.run_once(delete_messages, 0, data=(update.effective_chat.id, message_ids))
+
+async def delete_messages(context: ContextTypes.DEFAULT_TYPE) -> None:
+    chat_id, message_ids = context.job.data
+    for message_id in message_ids:
+        try:
+            await context.bot.delete_message(chat_id=chat_id, message_id=message_id)
+        except BadRequest:
+            # Сообщение уже удалено или слишком старое
+            pass
+
 async def start_post_creation(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    # Новый пост начинается с чистого листа: поля и draft_id открытого
+    # через /edit_draft черновика не должны перейти в него
+    context.user_data.clear()
     context.user_data['current_step'] = 0
     await prompt_step(update, context)
     return POST_CREATION
@@ -108,174 +257,346 @@ async def prompt_step(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
     step_index = context.user_data['current_step']
     if step_index < len(POST_STEPS):
         step = POST_STEPS[step_index]
-        await update.message.reply_text(
-            step['prompt'],
-            reply_markup=get_skip_keyboard()
-        )
+        await show_wizard(update, context, step['prompt'], get_skip_keyboard())
     else:
         await review_post(update, context)
 
+def advance_step(user_data: dict) -> None:
+    """
+    Переходит к следующему шагу. Если пост заполнен из одного сообщения,
+    шаги берутся из очереди незаполненных полей 'pending_steps'.
+    """
+    pending = user_data.get('pending_steps')
+    if pending is not None:
+        user_data['current_step'] = pending.pop(0) if pending else len(POST_STEPS)
+    else:
+        user_data['current_step'] += 1
+
+async def handle_structured_post(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """
+    Быстрое создание поста одним сообщением с подписанными полями
+    (или фото с такой подписью). Заполняет все распознанные поля сразу
+    и спрашивает только недостающие или некорректные.
+    """
+    message = update.message
+    values, invalid = parse_structured_post(message.text or message.caption)
+
+    context.user_data.clear()
+    for step in POST_STEPS:
+        key = step['key']
+        if key in values:
+            context.user_data[key] = step['formatter'](values[key]) if step['formatter'] else values[key]
+
+    if invalid:
+        await message.reply_text(
+            "Не удалось распознать: " + ", ".join(FIELD_NAMES[key] for key in POST_STEPS_KEYS if key in invalid) + "."
+        )
+
+    if message.media_group_id:
+        # Подпись пришла с альбомом: продолжим, когда соберём все его картинки
+        media_group_buffer.add(update, context, continue_structured_post)
+    else:
+        file_ids = [message.photo[-1].file_id] if message.photo else []
+        await continue_structured_post(update, context, file_ids)
+    return POST_CREATION
+
+async def continue_structured_post(update: Update, context: ContextTypes.DEFAULT_TYPE, file_ids: list) -> None:
+    """
+    Завершает разбор поста из одного сообщения: добавляет картинки
+    и запрашивает недостающие поля или сразу показывает пост.
+    """
+    if file_ids:
+        context.user_data['images'] = file_ids
+        context.user_data['image'] = file_ids[0]
+
+    context.user_data['pending_steps'] = [
+        index for index, step in enumerate(POST_STEPS) if step['key'] not in context.user_data
+    ]
+    context.user_data['current_step'] = 0
+    advance_step(context.user_data)
+    await prompt_step(update, context)
+
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    if context.user_data.get('edit_field'):
+        return await process_edit(update, context)
+
     step_index = context.user_data.get('current_step', 0)
     if step_index >= len(POST_STEPS):
         return POST_CREATION
 
     step = POST_STEPS[step_index]
-    text = update.message.text
+    # После нажатия 'Пропустить' обновление содержит callback, а не сообщение
+    text = update.message.text if update.message else 'пропустить'
+    remember_input(update, context)
 
     if text.lower() == 'пропустить' and step['optional']:
         context.user_data[step['key']] = 'Не указано' if step['key'] != 'image' else None
     else:
         if step['validator'] and not step['validator'](text):
-            await update.message.reply_text(
-                "Некорректный формат. Пожалуйста, используйте правильный формат или нажмите 'Пропустить'.",
-                reply_markup=get_skip_keyboard()
+            await show_wizard(
+                update, context,
+                "Некорректный формат. Пожалуйста, используйте правильный формат или нажмите 'Пропустить'.\n\n"
+                + step['prompt'],
+                get_skip_keyboard()
             )
             return POST_CREATION
         context.user_data[step['key']] = step['formatter'](text) if step['formatter'] else text
 
-    context.user_data['current_step'] += 1
+    advance_step(context.user_data)
     await prompt_step(update, context)
     return POST_CREATION
 
-async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    query = update.callback_query
-    await query.answer()
-    data = query.data
+async def apply_images(update: Update, context: ContextTypes.DEFAULT_TYPE, file_ids: list) -> None:
+    """
+    Сохраняет картинки поста (одну или весь альбом) и продолжает создание
+    или редактирование поста. Отвечает один раз на весь альбом.
+    """
+    context.user_data['images'] = file_ids
+    context.user_data['image'] = file_ids[0]
 
-    if data == 'skip':
-        await handle_message(update, context)
-        return POST_CREATION
-    elif data in ['save_draft', 'send_for_approval', 'edit_post']:
-        if data == 'save_draft':
-            await save_draft(update, context)
-        elif data == 'send_for_approval':
-            await send_for_approval(update, context)
-        elif data == 'edit_post':
-            await edit_post(update, context)
-        return ConversationHandler.END
+    if context.user_data.get('edit_field') == 'image':
+        context.user_data.pop('edit_field', None)
+        text = "Картинка обновлена." if len(file_ids) == 1 else f"Альбом из {len(file_ids)} картинок обновлён."
+        await show_wizard(update, context, text, get_post_actions_keyboard())
+        return
+
+    step_index = context.user_data.get('current_step', 0)
+    if step_index < len(POST_STEPS) and POST_STEPS[step_index]['key'] == 'image':
+        advance_step(context.user_data)
+        await prompt_step(update, context)
+
+async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """
+    Обработчик фото. Части альбома собираются в буфер и обрабатываются вместе.
+    """
+    remember_input(update, context)
+    if update.message.media_group_id:
+        media_group_buffer.add(update, context, apply_images)
     else:
-        return POST_CREATION
+        await apply_images(update, context, [update.message.photo[-1].file_id])
+    return POST_CREATION
+
+async def skip_step(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """
+    Кнопка 'Пропустить': пропускает текущий шаг или редактируемое поле.
+    """
+    await update.callback_query.answer()
+    await handle_message(update, context)
+    return POST_CREATION
 
 async def review_post(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     post_data = context.user_data
-    post = (
-        f"📢 *{post_data.get('title')}*\n\n"
-        f"📅 *Дата*: {post_data.get('date')}\n"
-        f"⏰ *Время*: {post_data.get('time_start')} - {post_data.get('time_end')}\n"
-        f"📍 *Место*: [{post_data.get('place_name')}]({post_data.get('place_url')})\n\n"
-        f"{post_data.get('text')}\n\n"
-        f"📞 *Контакт*: {post_data.get('contact')}"
-    )
+    post = render_post(post_data)
     
-    if post_data.get('image'):
-        await update.message.reply_photo(
+    images = post_data.get('images') or []
+    wizard = context.user_data.pop('wizard_message', None) if WIZARD_EDIT_IN_PLACE else None
+    if wizard and not wizard['photo'] and not post_data.get('image'):
+        # Пост без картинки показывается в том же сообщении мастера
+        context.user_data['wizard_message'] = wizard
+        await show_wizard(update, context, post, get_post_actions_keyboard(), parse_mode='MarkdownV2')
+        flush_inputs(update, context)
+        return POST_CREATION
+
+    # Текстовое сообщение нельзя превратить в фото: отправляем пост заново,
+    # а прежнее сообщение мастера удаляем вместе с ответами пользователя
+    flush_inputs(update, context, extra=[wizard['id']] if wizard else None)
+    if len(images) > 1:
+        # У альбома не может быть кнопок, поэтому они отправляются отдельным сообщением
+        await update.effective_message.reply_media_group(media=[
+            InputMediaPhoto(media=item['media'], caption=item.get('caption'), parse_mode=item.get('parse_mode'))
+            for item in album_media(images, caption=post, parse_mode='MarkdownV2')
+        ])
+        message = await update.effective_message.reply_text(
+            "Выберите действие с постом:",
+            reply_markup=get_post_actions_keyboard()
+        )
+    elif post_data.get('image'):
+        message = await update.effective_message.reply_photo(
             photo=post_data['image'],
             caption=post,
             parse_mode='MarkdownV2',
             reply_markup=get_post_actions_keyboard()
         )
     else:
-        await update.message.reply_text(
+        message = await update.effective_message.reply_text(
             post,
             parse_mode='MarkdownV2',
             reply_markup=get_post_actions_keyboard()
         )
+    remember_wizard_message(context, message)
     
     return POST_CREATION
 
 async def save_draft(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
+
+    # Отвечаем до отметки о нажатии: между ней и коммитом не должно быть
+    # ожиданий, иначе открытая транзакция держит блокировку базы
     await query.answer()
+    user_id = update.effective_user.id
+    fields = {field: context.user_data.get(field) for field in REVISION_FIELDS}
+    fields['images'] = json.dumps(fields['images']) if fields['images'] else None
+
+    # Своя сессия: при ошибке отметка о нажатии и недописанные строки
+    # откатываются, не попадая в коммит другого обработчика
+    session: Session = SessionLocal()
+    try:
+        if not claim_callback(session, callback_key(query)):
+            return ConversationHandler.END
+
+        # Черновик, открытый через /edit_draft, обновляется с записью ревизии,
+        # иначе создаётся новый
+        draft_id = context.user_data.get('draft_id')
+        draft = session.query(Draft).filter(Draft.id == draft_id, Draft.user_id == user_id).first() if draft_id else None
+        if draft:
+            previous = draft_fields(draft)
+            for field, value in fields.items():
+                setattr(draft, field, value)
+            revision = record_revision(session, draft, previous)
+            if revision:
+                text = f"Черновик {draft.id} обновлён, ревизия {revision.number}."
+            else:
+                text = f"Черновик {draft.id} не изменился."
+        else:
+            draft = Draft(user_id=user_id, **fields)
+            session.add(draft)
+            session.flush()
+            record_revision(session, draft)
+            text = "Пост сохранён в черновики."
+        session.commit()
+    except Exception:
+        # Повторное нажатие сработает: маршрутизатор снимет отметку о нажатии
+        session.rollback()
+        raise
+    finally:
+        session.close()
+    invalidate_drafts(user_id)
     
-    session: Session = context.bot_data['db_session']
-    
-    draft = Draft(
-        user_id=update.effective_user.id,
-        title=context.user_data.get('title'),
-        date=context.user_data.get('date'),
-        time_start=context.user_data.get('time_start'),
-        time_end=context.user_data.get('time_end'),
-        place_name=context.user_data.get('place_name'),
-        place_url=context.user_data.get('place_url'),
-        text=context.user_data.get('text'),
-        contact=context.user_data.get('contact'),
-        image=context.user_data.get('image')
-    )
-    session.add(draft)
-    session.commit()
-    
-    await query.edit_message_caption(
-        caption="Пост сохранён в черновики.",
-        parse_mode='MarkdownV2',
-        reply_markup=None
-    )
-    await query.message.reply_text(
-        "Пост сохранён в черновики.",
-        reply_markup=ReplyKeyboardMarkup([['Главное меню']], resize_keyboard=True)
-    )
+    # Правка сообщения с кнопками и ответ пользователю не зависят друг от друга
+    await fan_out({
+        'edit_actions': edit_action_message(query, text),
+        'confirmation': query.message.reply_text(
+            text,
+            reply_markup=ReplyKeyboardMarkup([['Главное меню']], resize_keyboard=True)
+        ),
+    }, raise_errors=False)
     context.user_data.clear()
     return ConversationHandler.END
 
 async def send_for_approval(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
+
     await query.answer()
-    
-    session: Session = context.bot_data['db_session']
-    
     post_data = context.user_data
-    post = (
-        f"📢 *{post_data.get('title')}*\n\n"
-        f"📅 *Дата*: {post_data.get('date')}\n"
-        f"⏰ *Время*: {post_data.get('time_start')} - {post_data.get('time_end')}\n"
-        f"📍 *Место*: [{post_data.get('place_name')}]({post_data.get('place_url')})\n\n"
-        f"{post_data.get('text')}\n\n"
-        f"📞 *Контакт*: {post_data.get('contact')}"
-    )
-    
-    # Отправка в общий чат для согласования
-    if post_data.get('image'):
-        sent_message = await context.bot.send_photo(
-            chat_id=REVIEW_CHAT_ID,
-            photo=post_data['image'],
-            caption=post,
-            parse_mode='MarkdownV2'
-        )
-    else:
-        sent_message = await context.bot.send_message(
-            chat_id=REVIEW_CHAT_ID,
-            text=post,
-            parse_mode='MarkdownV2'
-        )
-    
-    # Добавление кнопки выбора ответственного лица
-    responsible_persons = session.query(ResponsiblePerson).all()
-    if responsible_persons:
-        keyboard = [
-            [InlineKeyboardButton(person.name, callback_data=f'responsible_{person.telegram_id}')]
-            for person in responsible_persons
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await context.bot.send_message(
-            chat_id=REVIEW_CHAT_ID,
-            text="Выберите ответственного за этот пост:",
-            reply_markup=reply_markup
-        )
-    else:
-        await context.bot.send_message(
-            chat_id=REVIEW_CHAT_ID,
-            text="Нет ответственных лиц для назначения."
-        )
+    post = render_post(post_data)
+
+    # Своя сессия: отметка о нажатии коммитится вместе с заявкой и сообщениями
+    # в очереди, а при ошибке откатывается вместе с ними
+    session: Session = SessionLocal()
+    try:
+        if not claim_callback(session, callback_key(query)):
+            return ConversationHandler.END
+
+        # Постановка в очередь на отправку в общий чат для согласования.
+        # Ключ идемпотентности привязан к сообщению с кнопками, поэтому повторная
+        # отправка того же поста не создаст дубликатов в очереди
+        approval_key = f"approval:{query.message.chat_id}:{query.message.message_id}"
+        images = post_data.get('images') or []
+        if len(images) > 1:
+            enqueue_message(
+                session,
+                REVIEW_CHAT_ID,
+                'send_media_group',
+                idempotency_key=f"{approval_key}:post",
+                media=album_media(images, caption=post, parse_mode='MarkdownV2')
+            )
+        elif post_data.get('image'):
+            enqueue_message(
+                session,
+                REVIEW_CHAT_ID,
+                'send_photo',
+                idempotency_key=f"{approval_key}:post",
+                photo=post_data['image'],
+                caption=post,
+                parse_mode='MarkdownV2'
+            )
+        else:
+            enqueue_message(
+                session,
+                REVIEW_CHAT_ID,
+                'send_message',
+                idempotency_key=f"{approval_key}:post",
+                text=post,
+                parse_mode='MarkdownV2'
+            )
+
+        # Сохранение заявки с отпечатком текста и поиск похожих уже отправленных заявок
+        submission, duplicates = record_submission(session, update.effective_user.id, post_data)
+        warning = f"{duplicate_warning(duplicates)}\n\n" if duplicates else ""
+
+        # Нужен id заявки для кнопок выбора ответственного
+        session.flush()
+
+        # Добавление кнопки выбора ответственного лица
+        responsible_persons = session.query(ResponsiblePerson).all()
+        auto_assigned = None
+        if responsible_persons:
+            keyboard = [
+                [InlineKeyboardButton(person.name, callback_data=router.encode(RESPONSIBLE, submission.id, person.telegram_id))]
+                for person in responsible_persons
+            ]
+            reply_markup = InlineKeyboardMarkup(keyboard)
+            text = f"{warning}Выберите ответственного за этот пост:"
+
+            if AUTO_ASSIGN:
+                # Назначаем наименее загруженного; кнопки остаются для ручного переназначения
+                auto_assigned = reviewer_load.pick(responsible_persons)
+                assignment, _ = assign(session, submission.id, auto_assigned.telegram_id, 'auto')
+                enqueue_message(
+                    session,
+                    auto_assigned.telegram_id,
+                    'send_message',
+                    idempotency_key=f"assignment:{assignment.id}",
+                    **assignment_notification(submission, assignment)
+                )
+                text = f"{warning}Ответственный назначен автоматически: {auto_assigned.name}.\nЧтобы переназначить, выберите другого:"
+
+            enqueue_message(
+                session,
+                REVIEW_CHAT_ID,
+                'send_message',
+                idempotency_key=f"{approval_key}:responsible",
+                text=text,
+                reply_markup=reply_markup
+            )
+        else:
+            enqueue_message(
+                session,
+                REVIEW_CHAT_ID,
+                'send_message',
+                idempotency_key=f"{approval_key}:responsible",
+                text=f"{warning}Нет ответственных лиц для назначения."
+            )
+        session.commit()
+        if auto_assigned:
+            reviewer_load.apply(assigned=auto_assigned.telegram_id)
+    except Exception:
+        # Повторное нажатие сработает: маршрутизатор снимет отметку о нажатии
+        session.rollback()
+        raise
+    finally:
+        session.close()
     
-    await query.edit_message_caption(
-        caption="Пост отправлен на согласование.",
-        parse_mode='MarkdownV2',
-        reply_markup=None
-    )
-    await query.message.reply_text(
-        "Пост отправлен на согласование.",
-        reply_markup=ReplyKeyboardMarkup([['Главное меню']], resize_keyboard=True)
-    )
+    # Отправка в чат согласования начинается сразу и идёт параллельно с ответом пользователю
+    kick_outbox(context)
+    # Правка сообщения с кнопками и ответ пользователю не зависят друг от друга
+    await fan_out({
+        'edit_actions': edit_action_message(query, "Пост отправлен на согласование."),
+        'confirmation': query.message.reply_text(
+            "Пост отправлен на согласование.",
+            reply_markup=ReplyKeyboardMarkup([['Главное меню']], resize_keyboard=True)
+        ),
+    }, raise_errors=False)
     context.user_data.clear()
     return ConversationHandler.END
 
@@ -284,76 +605,49 @@ async def edit_post(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     await query.answer()
     
     keyboard = [
-        [InlineKeyboardButton("Заголовок", callback_data='edit_title')],
-        [InlineKeyboardButton("Дата", callback_data='edit_date')],
-        [InlineKeyboardButton("Время начала", callback_data='edit_time_start')],
-        [InlineKeyboardButton("Время конца", callback_data='edit_time_end')],
-        [InlineKeyboardButton("Место", callback_data='edit_place')],
-        [InlineKeyboardButton("Текст", callback_data='edit_text')],
-        [InlineKeyboardButton("Контакт", callback_data='edit_contact')],
-        [InlineKeyboardButton("Картинка", callback_data='edit_image')],
-        [InlineKeyboardButton("Отмена", callback_data='cancel_edit')]
+        [InlineKeyboardButton(label, callback_data=router.encode(EDIT_FIELD, field))]
+        for field, label, _ in EDIT_FIELDS
     ]
+    keyboard.append([InlineKeyboardButton("Отмена", callback_data=router.encode(CANCEL_EDIT))])
     reply_markup = InlineKeyboardMarkup(keyboard)
     
-    await query.edit_message_caption(
-        caption="Редактирование поста. Выберите поле для изменения:",
-        parse_mode='MarkdownV2',
-        reply_markup=reply_markup
-    )
+    await edit_action_message(query, "Редактирование поста. Выберите поле для изменения:", reply_markup, context)
     return POST_CREATION
 
-async def handle_edit(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+async def handle_edit(update: Update, context: ContextTypes.DEFAULT_TYPE, field: str) -> int:
     query = update.callback_query
     await query.answer()
-    action = query.data
-    
-    if action.startswith('edit_'):
-        field = action.split('_')[1]
-        context.user_data['edit_field'] = field
-        prompts = {
-            'title': "Введите новый заголовок или нажмите 'Пропустить':",
-            'date': "Введите новую дату (например, 25.12.2023) или нажмите 'Пропустить':",
-            'time_start': "Введите новое время начала (например, 18:30) или нажмите 'Пропустить':",
-            'time_end': "Введите новое время конца (например, 20:30) или нажмите 'Пропустить':",
-            'place': "Введите новое название места или нажмите 'Пропустить':",
-            'text': "Введите новый текст поста или нажмите 'Пропустить':",
-            'contact': "Введите новую контактную информацию или нажмите 'Пропустить':",
-            'image': "Отправьте новую картинку или нажмите 'Пропустить':"
-        }
-        prompt = prompts.get(field, "Введите новое значение или нажмите 'Пропустить':")
-        await query.edit_message_caption(
-            caption=prompt,
-            parse_mode='MarkdownV2',
-            reply_markup=get_skip_keyboard()
-        )
-        return POST_CREATION
-    elif action == 'cancel_edit':
-        await query.edit_message_caption(
-            caption="Редактирование отменено.",
-            parse_mode='MarkdownV2',
-            reply_markup=get_post_actions_keyboard()
-        )
-        return POST_CREATION
-    else:
-        await query.edit_message_caption(
-            caption="Неизвестное действие.",
-            parse_mode='MarkdownV2',
-            reply_markup=get_post_actions_keyboard()
-        )
+
+    if field not in EDIT_PROMPTS:
+        await edit_action_message(query, "Неизвестное действие.", get_post_actions_keyboard(), context)
         return POST_CREATION
 
+    context.user_data['edit_field'] = field
+    await edit_action_message(query, EDIT_PROMPTS[field], get_skip_keyboard(), context)
+    return POST_CREATION
+
+async def cancel_edit(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    query = update.callback_query
+    await query.answer()
+    context.user_data.pop('edit_field', None)
+    await edit_action_message(query, "Редактирование отменено.", get_post_actions_keyboard(), context)
+    return POST_CREATION
+
 async def process_edit(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     field = context.user_data.get('edit_field')
-    text = update.message.text
+    text = update.message.text if update.message else 'пропустить'
+    remember_input(update, context)
 
     if text.lower() == 'пропустить':
+        context.user_data.pop('edit_field', None)
         if field == 'image':
+            # Вместе с картинкой убирается и альбом, иначе он остался бы в посте
             context.user_data['image'] = None
-            await update.message.reply_text("Картинка не добавлена.", reply_markup=get_post_actions_keyboard())
+            context.user_data['images'] = []
+            await show_wizard(update, context, "Картинка не добавлена.", get_post_actions_keyboard())
         else:
             context.user_data[field] = 'Не указано'
-            await update.message.reply_text("Поле обновлено.", reply_markup=get_post_actions_keyboard())
+            await show_wizard(update, context, "Поле обновлено.", get_post_actions_keyboard())
         return POST_CREATION
 
     # Валидация и форматирование
@@ -365,32 +659,31 @@ async def process_edit(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
     }
 
     if field in validators and not validators[field](text):
-        await update.message.reply_text(
+        await show_wizard(
+            update, context,
             "Некорректный формат. Пожалуйста, введите корректные данные или нажмите 'Пропустить'.",
-            reply_markup=get_skip_keyboard()
+            get_skip_keyboard()
         )
         return POST_CREATION
 
     if field == 'image':
-        if update.message.photo:
-            context.user_data['image'] = update.message.photo[-1].file_id
-            await update.message.reply_text("Картинка обновлена.", reply_markup=get_post_actions_keyboard())
-        else:
-            await update.message.reply_text("Пожалуйста, отправьте изображение или нажмите 'Пропустить'.", reply_markup=get_skip_keyboard())
-            return POST_CREATION
-    else:
-        formatter = {
-            'title': format_text,
-            'date': format_text,
-            'time_start': format_text,
-            'time_end': format_text,
-            'place': format_text,
-            'text': format_text,
-            'contact': format_text,
-            'place_url': format_text
-        }.get(field, lambda x: x)
-        context.user_data[field] = formatter(text)
-        await update.message.reply_text("Поле обновлено.", reply_markup=get_post_actions_keyboard())
+        # Фото сюда не попадают: их обрабатывает handle_photo
+        await show_wizard(update, context, "Пожалуйста, отправьте изображение или нажмите 'Пропустить'.", get_skip_keyboard())
+        return POST_CREATION
+
+    formatter = {
+        'title': format_text,
+        'date': format_text,
+        'time_start': format_text,
+        'time_end': format_text,
+        'place_name': format_text,
+        'text': format_text,
+        'contact': format_text,
+        'place_url': format_text
+    }.get(field, lambda x: x)
+    context.user_data[field] = formatter(text)
+    context.user_data.pop('edit_field', None)
+    await show_wizard(update, context, "Поле обновлено.", get_post_actions_keyboard())
     
     return POST_CREATION
 
@@ -398,23 +691,93 @@ def post_creation_handlers() -> list:
     """
     Возвращает список обработчиков для процесса создания поста.
     """
+    router.register(SKIP, skip_step, scope=POST_CREATION_SCOPE)
+    router.register(SAVE_DRAFT, save_draft, scope=POST_CREATION_SCOPE, idempotent=True)
+    router.register(SEND_FOR_APPROVAL, send_for_approval, scope=POST_CREATION_SCOPE, idempotent=True)
+    router.register(EDIT_POST, edit_post, scope=POST_CREATION_SCOPE)
+    router.register(EDIT_FIELD, handle_edit, arg_types=(str,), scope=POST_CREATION_SCOPE)
+    router.register(CANCEL_EDIT, cancel_edit, scope=POST_CREATION_SCOPE)
+
     return [
         ConversationHandler(
-            entry_points=[CommandHandler('create_post', start_post_creation)],
+            entry_points=[
+                CommandHandler('create_post', start_post_creation),
+                CommandHandler('resume_post', resume_post_creation),
+                CommandHandler('edit_draft', edit_draft),
+                MessageHandler((filters.TEXT | filters.PHOTO) & ~filters.COMMAND & structured_post_filter, handle_structured_post),
+            ],
             states={
                 POST_CREATION: [
+                    MessageHandler((filters.TEXT | filters.PHOTO) & ~filters.COMMAND & structured_post_filter, handle_structured_post),
                     MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message),
-                    CallbackQueryHandler(handle_callback_query, pattern='^(skip|save_draft|send_for_approval|edit_post)$'),
-                    CallbackQueryHandler(handle_edit, pattern='^edit_.*$'),
-                    MessageHandler(filters.PHOTO, process_edit),  # Обработка фото для 'image'
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, process_edit),  # Обработка текстовых сообщений для редактирования
+                    router.handler(POST_CREATION_SCOPE),
+                    MessageHandler(filters.PHOTO, handle_photo),  # Обработка фото и альбомов для 'image'
+                ],
+                ConversationHandler.TIMEOUT: [
+                    TypeHandler(Update, creation_timed_out),
                 ],
             },
             fallbacks=[CommandHandler('cancel', cancel_creation)],
             allow_reentry=True,
+            conversation_timeout=CONVERSATION_TIMEOUT or None,
         )
     ]
 
 async def cancel_creation(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    context.user_data.clear()
     await update.message.reply_text("Создание поста отменено.", reply_markup=ReplyKeyboardRemove())
     return ConversationHandler.END
+
+async def creation_timed_out(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Создание поста прервано по неактивности. Незавершённый пост сохраняется
+    на диск, если это включено, и в любом случае удаляется из памяти.
+    """
+    spilled = spill_user_data(update.effective_user.id, context.user_data)
+    context.user_data.clear()
+
+    text = "Создание поста прервано из-за неактивности."
+    if spilled:
+        text += " Чтобы продолжить с того же места, отправьте /resume_post."
+    await update.effective_message.reply_text(text)
+
+async def edit_draft(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """
+    Обработчик команды /edit_draft <ID черновика>
+    Открывает сохранённый черновик для редактирования. При сохранении
+    черновик обновляется, а изменения записываются новой ревизией.
+    """
+    args = context.args
+    if len(args) != 1 or not args[0].isdigit():
+        await update.message.reply_text("Использование: /edit_draft <ID черновика>")
+        return ConversationHandler.END
+
+    session: Session = context.bot_data['db_session']
+    draft = session.query(Draft).filter(Draft.id == int(args[0]), Draft.user_id == update.effective_user.id).first()
+    if not draft:
+        await update.message.reply_text("Черновик не найден или у вас нет прав для его редактирования.")
+        return ConversationHandler.END
+
+    context.user_data.clear()
+    context.user_data.update(draft_fields(draft))
+    context.user_data['images'] = json.loads(draft.images) if draft.images else []
+    context.user_data['draft_id'] = draft.id
+    context.user_data['current_step'] = len(POST_STEPS)
+    return await review_post(update, context)
+
+async def resume_post_creation(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """
+    Восстанавливает незавершённый пост, сохранённый на диск при простое.
+    """
+    data = restore_user_data(update.effective_user.id)
+    if not data:
+        await update.message.reply_text("Нет прерванного поста. Начните новый: /create_post")
+        return ConversationHandler.END
+
+    context.user_data.clear()
+    context.user_data.update(data)
+    context.user_data.setdefault('current_step', 0)
+    context.user_data.pop('wizard_message', None)
+    await update.message.reply_text("Продолжаем создание поста.")
+    await prompt_step(update, context)
+    return POST_CREATION
@@ -0,0 +1,135 @@
+# handlers/throttle.py
+
+import logging
+import time
+from collections import OrderedDict
+
+from telegram import Update
+from telegram.ext import ApplicationHandlerStop, ContextTypes, TypeHandler
+
+from config import (
+    THROTTLE_USER_RATE,
+    THROTTLE_USER_BURST,
+    THROTTLE_GLOBAL_RATE,
+    THROTTLE_GLOBAL_BURST,
+    THROTTLE_MAX_USERS,
+    THROTTLE_WARN_INTERVAL,
+)
+from media_groups import MAX_MEDIA_GROUP_SIZE
+from metrics import metrics
+from utils.rate_limit import BucketRegistry, TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Группа, в которой регистрируется ограничитель: раньше всех остальных обработчиков
+THROTTLE_GROUP = -1
+
+user_buckets = BucketRegistry(THROTTLE_USER_RATE, THROTTLE_USER_BURST, THROTTLE_MAX_USERS)
+global_bucket = TokenBucket(THROTTLE_GLOBAL_RATE, THROTTLE_GLOBAL_BURST)
+
+WARNING_TEXT = "Слишком много запросов. Пожалуйста, подождите немного."
+
+# Сколько последних альбомов помнить
+ALBUM_TRACK_LIMIT = 1000
+
+
+class AlbumParts:
+    """
+    Альбомы, за которые уже списан токен. Telegram присылает альбом пачкой
+    отдельных обновлений с общим media_group_id, и ограничитель считает его
+    одним сообщением: иначе части сверх запаса корзины отбрасывались бы,
+    и альбом сохранялся бы не целиком. Без списания пропускаются не больше
+    MAX_MEDIA_GROUP_SIZE частей одного альбома.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._parts = OrderedDict()
+
+    def charged(self, media_group_id: str) -> None:
+        self._parts[media_group_id] = 1
+        if len(self._parts) > self.limit:
+            self._parts.popitem(last=False)
+
+    def free_part(self, media_group_id: str) -> bool:
+        """
+        Отмечает очередную часть альбома. Возвращает True, если за альбом
+        уже заплачено и часть пропускается без списания.
+        """
+        parts = self._parts.get(media_group_id)
+        if parts is None or parts >= MAX_MEDIA_GROUP_SIZE:
+            return False
+        self._parts[media_group_id] = parts + 1
+        return True
+
+
+album_parts = AlbumParts(ALBUM_TRACK_LIMIT)
+
+
+async def throttle_update(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Пропускает обновление дальше, если у пользователя и у бота в целом есть свободные токены.
+    Иначе обновление отбрасывается, а пользователь получает не чаще одного
+    предупреждения в THROTTLE_WARN_INTERVAL секунд. Альбом оплачивается
+    первой частью, остальные его части проходят без списания.
+    """
+    if update.inline_query:
+        # Запрос приходит на каждое нажатие клавиши при наборе, а отброшенный
+        # остался бы без ответа: поиск был бы непригоден при обычном наборе
+        metrics.increment('throttle.inline_queries')
+        return
+
+    now = time.monotonic()
+    user = update.effective_user
+    media_group_id = update.message.media_group_id if update.message else None
+
+    if media_group_id and album_parts.free_part(media_group_id):
+        metrics.increment('throttle.album_parts')
+        return
+
+    bucket = None
+    if user is not None:
+        bucket = user_buckets.get(user.id, now)
+        metrics.set_gauge('throttle.tracked_users', len(user_buckets))
+        if not bucket.consume(now):
+            metrics.increment('throttle.dropped_user')
+            await _warn(update, bucket, now)
+            raise ApplicationHandlerStop
+
+    if not global_bucket.consume(now):
+        metrics.increment('throttle.dropped_global')
+        if bucket is not None:
+            await _warn(update, bucket, now)
+        raise ApplicationHandlerStop
+
+    if media_group_id:
+        album_parts.charged(media_group_id)
+    metrics.increment('throttle.allowed')
+
+
+async def _warn(update: Update, bucket: TokenBucket, now: float) -> None:
+    """
+    Сообщает пользователю об ограничении. Нажатия кнопок всегда подтверждаются,
+    чтобы у пользователя не «зависала» кнопка, но текст показывается не чаще интервала.
+    """
+    should_warn = now - bucket.warned_at >= THROTTLE_WARN_INTERVAL
+    if should_warn:
+        bucket.warned_at = now
+        metrics.increment('throttle.warnings')
+
+    try:
+        if update.callback_query:
+            await update.callback_query.answer(WARNING_TEXT if should_warn else None)
+        elif should_warn and update.effective_message:
+            await update.effective_message.reply_text(WARNING_TEXT)
+    except Exception as e:
+        logger.warning(f"Не удалось отправить предупреждение об ограничении: {e}")
+
+
+def throttle_handlers() -> list:
+    """
+    Возвращает список обработчиков ограничения частоты. Регистрируются в группе THROTTLE_GROUP.
+    """
+    return [
+        TypeHandler(Update, throttle_update),
+    ]
@@ -0,0 +1,51 @@
+# http_pool.py
+
+import logging
+
+import httpx
+from telegram.request import HTTPXRequest
+
+logger = logging.getLogger(__name__)
+
+
+class PooledHTTPXRequest(HTTPXRequest):
+    """
+    HTTPXRequest с настраиваемым временем жизни keep-alive соединений.
+    Стандартный HTTPXRequest позволяет задать только размер пула и таймауты,
+    поэтому keep-alive задаётся через его внутренние _client_kwargs и
+    _build_client. Версия PTB для этого закреплена в requirements.txt; если
+    внутреннее устройство изменится, остаётся keep-alive httpx по умолчанию.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, connection_pool_size: int = 1, keepalive_expiry: float = 5.0, **kwargs):
+        super().__init__(connection_pool_size=connection_pool_size, **kwargs)
+
+        if not isinstance(getattr(self, '_client_kwargs', None), dict) or not hasattr(self, '_build_client'):
+            logger.warning("HTTPXRequest этой версии PTB не позволяет задать keep-alive: используется значение httpx.")
+            return
+
+        # Пересобираем клиент с нужными лимитами пула
+        self._client_kwargs['limits'] = httpx.Limits(
+            max_connections=connection_pool_size,
+            max_keepalive_connections=connection_pool_size,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._client = self._build_client()
+
+
+def build_request(pool_size: int, connect_timeout: float, read_timeout: float, write_timeout: float,
+                  pool_timeout: float, keepalive_expiry: float, http_version: str = "1.1") -> PooledHTTPXRequest:
+    """
+    Создаёт объект запросов к Bot API с заданным пулом соединений.
+    """
+    return PooledHTTPXRequest(
+        connection_pool_size=pool_size,
+        keepalive_expiry=keepalive_expiry,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+        write_timeout=write_timeout,
+        pool_timeout=pool_timeout,
+        http_version=http_version,
+    )
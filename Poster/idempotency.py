@@ -0,0 +1,84 @@
+# idempotency.py
+
+import time
+from collections import OrderedDict
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from config import CALLBACK_DEDUP_WINDOW
+from metrics import metrics
+from models import CallbackReceipt
+
+
+def callback_key(query) -> str:
+    """
+    Ключ нажатия: пользователь, сообщение с кнопкой и данные кнопки.
+    """
+    message_id = query.message.message_id if query.message else query.inline_message_id
+    return f"{query.from_user.id}:{message_id}:{query.data}"
+
+
+class PressWindow:
+    """
+    Недавние нажатия в памяти процесса. Повторное нажатие с тем же ключом
+    в течение window секунд считается двойным. Записи хранятся в порядке
+    добавления, поэтому устаревшие удаляются с начала без полного перебора.
+    """
+
+    def __init__(self, window: float = CALLBACK_DEDUP_WINDOW):
+        self.window = window
+        self._seen = OrderedDict()
+
+    def _expire(self, now: float) -> None:
+        while self._seen:
+            oldest_key, pressed_at = next(iter(self._seen.items()))
+            if now - pressed_at < self.window:
+                break
+            del self._seen[oldest_key]
+
+    def first_press(self, key: str, now: float = None) -> bool:
+        """
+        Отмечает нажатие. Возвращает False, если такое же нажатие уже было в окне.
+        """
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        if key in self._seen:
+            return False
+        self._seen[key] = now
+        return True
+
+    def seen(self, key: str, now: float = None) -> bool:
+        """
+        Было ли такое нажатие в окне; новое нажатие не отмечается.
+        """
+        self._expire(time.monotonic() if now is None else now)
+        return key in self._seen
+
+    def forget(self, key: str) -> None:
+        """
+        Снимает отметку, например, если обработка завершилась ошибкой и нажатие можно повторить.
+        """
+        self._seen.pop(key, None)
+
+
+press_window = PressWindow()
+
+
+def claim_callback(session: Session, key: str) -> bool:
+    """
+    Записывает отметку о нажатии в рамках транзакции сессии — до побочных
+    эффектов обработчика и с коммитом вместе с ними. Уникальный ключ не даёт
+    выполнить действие дважды даже после перезапуска бота; если обработка
+    откатится, отметка откатится вместе с ней. Между вызовом и коммитом не должно
+    быть await: открытая транзакция держит блокировку записи SQLite.
+    Возвращает False для повтора.
+    """
+    session.add(CallbackReceipt(key=key))
+    try:
+        session.flush()
+    except IntegrityError:
+        session.rollback()
+        metrics.increment('callbacks.duplicate_db')
+        return False
+    return True
@@ -0,0 +1,198 @@
+# job_leases.py
+
+import asyncio
+import functools
+import logging
+import os
+import random
+import socket
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, bindparam, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from config import JOB_INSTANCE_ID, JOB_LEASE_TTL, JOB_JITTER
+from database import SessionLocal
+from metrics import metrics
+from models import JobLease, JobRun
+
+logger = logging.getLogger(__name__)
+
+leases = JobLease.__table__
+
+# Имя этого процесса в таблице аренды
+INSTANCE_ID = JOB_INSTANCE_ID or f"{socket.gethostname()}:{os.getpid()}"
+
+_acquire = insert(leases).values(
+    name=bindparam('b_name'),
+    holder=bindparam('b_holder'),
+    acquired_at=bindparam('b_now'),
+    heartbeat_at=bindparam('b_now'),
+    expires_at=bindparam('b_expires_at'),
+)
+# Аренду можно взять, если прежняя истекла и задача давно не запускалась:
+# второй процесс, проснувшийся позже из-за случайной задержки, не повторит
+# уже выполненный запуск. Проверка и захват — одна атомарная запись.
+ACQUIRE_LEASE = _acquire.on_conflict_do_update(
+    index_elements=[leases.c.name],
+    set_={
+        'holder': _acquire.excluded.holder,
+        'acquired_at': _acquire.excluded.acquired_at,
+        'heartbeat_at': _acquire.excluded.heartbeat_at,
+        'expires_at': _acquire.excluded.expires_at,
+    },
+    where=and_(
+        leases.c.expires_at <= bindparam('b_now'),
+        leases.c.acquired_at <= bindparam('b_started_before'),
+    ),
+)
+
+RENEW_LEASE = (
+    update(leases)
+    .where(leases.c.name == bindparam('b_name'), leases.c.holder == bindparam('b_holder'))
+    .values(heartbeat_at=bindparam('b_now'), expires_at=bindparam('b_expires_at'))
+)
+
+RELEASE_LEASE = (
+    update(leases)
+    .where(leases.c.name == bindparam('b_name'), leases.c.holder == bindparam('b_holder'))
+    .values(expires_at=bindparam('b_now'))
+)
+
+
+def acquire_lease(session: Session, name: str, ttl: float, cooldown: float,
+                  holder: str = INSTANCE_ID, now: datetime = None) -> bool:
+    """
+    Пытается взять аренду задачи name на ttl секунд. Не удаётся, если её держит
+    другой процесс или задача запускалась меньше cooldown секунд назад.
+    Коммит — за вызывающим кодом.
+    """
+    now = now or datetime.utcnow()
+    result = session.execute(ACQUIRE_LEASE, {
+        'b_name': name,
+        'b_holder': holder,
+        'b_now': now,
+        'b_expires_at': now + timedelta(seconds=ttl),
+        'b_started_before': now - timedelta(seconds=cooldown),
+    })
+    return result.rowcount > 0
+
+
+def renew_lease(session: Session, name: str, ttl: float, holder: str = INSTANCE_ID, now: datetime = None) -> bool:
+    """
+    Продлевает аренду. Возвращает False, если аренду уже забрал другой процесс.
+    Коммит — за вызывающим кодом.
+    """
+    now = now or datetime.utcnow()
+    result = session.execute(RENEW_LEASE, {
+        'b_name': name,
+        'b_holder': holder,
+        'b_now': now,
+        'b_expires_at': now + timedelta(seconds=ttl),
+    })
+    return result.rowcount > 0
+
+
+def release_lease(session: Session, name: str, holder: str = INSTANCE_ID) -> None:
+    """
+    Освобождает аренду. Время последнего запуска сохраняется, поэтому другие
+    процессы не повторят этот запуск. Коммит — за вызывающим кодом.
+    """
+    session.execute(RELEASE_LEASE, {'b_name': name, 'b_holder': holder, 'b_now': datetime.utcnow()})
+
+
+def _try_acquire(name: str, ttl: float, cooldown: float) -> bool:
+    session: Session = SessionLocal()
+    try:
+        acquired = acquire_lease(session, name, ttl, cooldown)
+        session.commit()
+        return acquired
+    except Exception as e:
+        logger.error(f"Не удалось взять аренду задачи {name}: {e}")
+        session.rollback()
+        return False
+    finally:
+        session.close()
+
+
+def _finish(name: str, status: str, started_at: datetime, duration_ms: int, error: str) -> None:
+    session: Session = SessionLocal()
+    try:
+        session.add(JobRun(
+            job=name,
+            holder=INSTANCE_ID,
+            status=status,
+            started_at=started_at,
+            duration_ms=duration_ms,
+            error=error,
+        ))
+        release_lease(session, name)
+        session.commit()
+    except Exception as e:
+        logger.error(f"Не удалось записать завершение задачи {name}: {e}")
+        session.rollback()
+    finally:
+        session.close()
+
+
+async def _heartbeat(name: str, ttl: float) -> None:
+    while True:
+        await asyncio.sleep(ttl / 3)
+        session: Session = SessionLocal()
+        try:
+            renewed = renew_lease(session, name, ttl)
+            session.commit()
+        except Exception as e:
+            logger.error(f"Не удалось продлить аренду задачи {name}: {e}")
+            session.rollback()
+            continue
+        finally:
+            session.close()
+        if not renewed:
+            metrics.increment(f"jobs.{name}.lease_lost")
+            logger.warning(f"Аренда задачи {name} перешла другому процессу.")
+            return
+
+
+def coordinated(callback, interval: timedelta, jitter: float = JOB_JITTER, ttl: float = JOB_LEASE_TTL):
+    """
+    Оборачивает фоновую задачу так, чтобы при нескольких запущенных процессах
+    бота каждый её запуск выполнял только один из них. Запуск откладывается на
+    случайные 0–jitter секунд, чтобы обслуживание не начиналось во всех
+    процессах одновременно; затем процесс берёт аренду в базе и продлевает её,
+    пока задача выполняется. interval — период задачи: повторно её можно
+    запустить не раньше чем через половину периода. Длительность и исход
+    каждого запуска записываются в job_runs.
+    """
+    name = callback.__name__
+    cooldown = interval.total_seconds() / 2
+
+    @functools.wraps(callback)
+    async def wrapper(context):
+        if jitter > 0:
+            await asyncio.sleep(random.uniform(0, jitter))
+
+        if not _try_acquire(name, ttl, cooldown):
+            metrics.increment(f"jobs.{name}.skipped")
+            logger.info(f"Задача {name} уже выполняется или выполнена другим процессом.")
+            return
+
+        heartbeat = asyncio.get_running_loop().create_task(_heartbeat(name, ttl))
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        status, error = 'ok', None
+        try:
+            await callback(context)
+        except Exception as e:
+            status, error = 'error', str(e)
+            logger.error(f"Задача {name} завершилась ошибкой: {e}")
+        finally:
+            heartbeat.cancel()
+            duration_ms = round((time.perf_counter() - started) * 1000)
+            _finish(name, status, started_at, duration_ms, error)
+            metrics.increment(f"jobs.{name}.{status}")
+            metrics.set_gauge(f"jobs.{name}.duration_ms", duration_ms)
+
+    return wrapper
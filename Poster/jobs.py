@@ -1,20 +1,37 @@
 # jobs.py
 
+import asyncio
 import logging
 from datetime import datetime, time, timedelta  # Корректный импорт
 
 from sqlalchemy.orm import Session
 
+from backup import backup_database
+from config import (
+    OUTBOX_POLL_INTERVAL,
+    OUTBOX_RETENTION_DAYS,
+    CALLBACK_RECEIPT_DAYS,
+    DIGEST_CHAT_ID,
+    DIGEST_TIME,
+    JOB_RUN_RETENTION_DAYS,
+    BACKUP_INTERVAL_HOURS,
+    PERMISSIONS_TTL,
+    METRICS_LOG_INTERVAL,
+    USER_DATA_TTL,
+    USER_DATA_SWEEP_INTERVAL,
+)
 from database import SessionLocal
-from models import Draft
+from digest import digest_cache, publish_digest
+from draft_cache import invalidate_drafts
+from job_leases import coordinated
+from metrics import log_metrics
+from outbox import drain_outbox, kick_outbox
+from permissions import refresh_permissions
+from read_models import delete_old_drafts, delete_old_job_runs, delete_old_receipts, delete_sent_outbox
+from user_state import sweep_user_data
 
 from telegram.ext import Application
 
-# Настройка логирования
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
 logger = logging.getLogger(__name__)
 
 async def remove_old_drafts(context):
@@ -30,41 +47,224 @@ async def remove_old_drafts(context):
         # Определяем дату, до которой черновики считаются старыми (30 дней назад)
         cutoff_date = datetime.utcnow() - timedelta(days=30)
         
-        # Запрос на выбор черновиков, созданных до cutoff_date
-        old_drafts = session.query(Draft).filter(Draft.created_at < cutoff_date).all()
+        # Удаляем старые черновики одним запросом DELETE, не загружая их в сессию
+        count, affected_users = delete_old_drafts(session, cutoff_date)
         
-        if not old_drafts:
+        if not count:
             logger.info("Нет черновиков, подлежащих удалению.")
             return
         
-        # Количество черновиков, которые будут удалены
-        count = len(old_drafts)
-        
-        # Удаление старых черновиков
-        for draft in old_drafts:
-            session.delete(draft)
-        
         # Фиксация изменений в базе данных
         session.commit()
+
+        # Сбрасываем списки и inline-индексы пользователей, чьи черновики удалены
+        for user_id in affected_users:
+            invalidate_drafts(user_id)
         
         logger.info(f"Удалено {count} черновиков, которым больше месяца.")
     except Exception as e:
         logger.error(f"Ошибка при удалении черновиков: {e}")
         session.rollback()
+        raise
     finally:
         # Закрываем сессию
         session.close()
 
+async def purge_outbox(context):
+    """
+    Фоновая задача для удаления давно отправленных сообщений очереди.
+    """
+    session: Session = SessionLocal()
+
+    try:
+        cutoff = datetime.utcnow() - timedelta(days=OUTBOX_RETENTION_DAYS)
+        count = delete_sent_outbox(session, cutoff)
+        session.commit()
+        logger.info(f"Удалено {count} отправленных сообщений очереди.")
+    except Exception as e:
+        logger.error(f"Ошибка при очистке очереди сообщений: {e}")
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+async def purge_callback_receipts(context):
+    """
+    Фоновая задача для удаления старых отметок о нажатиях кнопок.
+    """
+    session: Session = SessionLocal()
+
+    try:
+        cutoff = datetime.utcnow() - timedelta(days=CALLBACK_RECEIPT_DAYS)
+        count = delete_old_receipts(session, cutoff)
+        session.commit()
+        logger.info(f"Удалено {count} отметок о нажатиях кнопок.")
+    except Exception as e:
+        logger.error(f"Ошибка при удалении отметок о нажатиях: {e}")
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+async def purge_job_runs(context):
+    """
+    Фоновая задача для удаления старых записей о запусках фоновых задач.
+    """
+    session: Session = SessionLocal()
+
+    try:
+        cutoff = datetime.utcnow() - timedelta(days=JOB_RUN_RETENTION_DAYS)
+        count = delete_old_job_runs(session, cutoff)
+        session.commit()
+        logger.info(f"Удалено {count} записей о запусках фоновых задач.")
+    except Exception as e:
+        logger.error(f"Ошибка при удалении записей о запусках задач: {e}")
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+async def send_digest(context):
+    """
+    Фоновая задача для публикации анонса ближайших событий в канал.
+    """
+    session: Session = SessionLocal()
+
+    try:
+        today = datetime.utcnow().date()
+        digest = digest_cache.get(session, today)
+        if not digest.events:
+            logger.info("Нет событий для анонса.")
+            return
+
+        count = publish_digest(session, DIGEST_CHAT_ID, digest, today)
+        session.commit()
+        kick_outbox(context)
+        logger.info(f"Анонс из {digest.events} событий поставлен в очередь: {count} сообщений.")
+    except Exception as e:
+        logger.error(f"Ошибка при публикации анонса: {e}")
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+async def backup_drafts_db(context):
+    """
+    Фоновая задача для резервного копирования базы данных.
+    Копирование выполняется в отдельном потоке небольшими шагами, чтобы не блокировать
+    ни цикл событий, ни пишущие в базу обработчики.
+    """
+    logger.info("Запуск фоновой задачи: резервное копирование базы данных.")
+
+    try:
+        path = await asyncio.to_thread(backup_database)
+        logger.info(f"Резервная копия базы данных сохранена в {path}.")
+    except Exception as e:
+        logger.error(f"Ошибка при резервном копировании базы данных: {e}")
+        raise
+
 def setup_jobs(application: Application):
     """
     Настройка фоновых задач для бота.
     
     :param application: Экземпляр Telegram Application
+
+    Задачи обслуживания базы и публикации обёрнуты в coordinated: при нескольких
+    процессах бота каждый их запуск выполняет один процесс. Остальные задачи
+    работают с памятью своего процесса и выполняются в каждом.
     """
+    daily = timedelta(days=1)
+
     # Планируем задачу на ежедневное выполнение в 00:00 UTC
     application.job_queue.run_daily(
-        remove_old_drafts,
+        coordinated(remove_old_drafts, daily),
         time=time(hour=0, minute=0),  # Корректный вызов time
         name="remove_old_drafts"
     )
     logger.info("Фоновая задача 'remove_old_drafts' успешно настроена.")
+
+    # Резервное копирование базы данных
+    if BACKUP_INTERVAL_HOURS > 0:
+        backup_interval = timedelta(hours=BACKUP_INTERVAL_HOURS)
+        application.job_queue.run_repeating(
+            coordinated(backup_drafts_db, backup_interval),
+            interval=backup_interval,
+            first=timedelta(minutes=1),
+            name="backup_drafts_db"
+        )
+        logger.info("Фоновая задача 'backup_drafts_db' успешно настроена.")
+
+    # Периодически отправляем накопившиеся в очереди сообщения
+    application.job_queue.run_repeating(
+        drain_outbox,
+        interval=OUTBOX_POLL_INTERVAL,
+        first=OUTBOX_POLL_INTERVAL,
+        name="drain_outbox"
+    )
+    logger.info("Фоновая задача 'drain_outbox' успешно настроена.")
+
+    # Ежедневно удаляем давно отправленные сообщения очереди
+    if OUTBOX_RETENTION_DAYS > 0:
+        application.job_queue.run_daily(
+            coordinated(purge_outbox, daily),
+            time=time(hour=0, minute=30),
+            name="purge_outbox"
+        )
+        logger.info("Фоновая задача 'purge_outbox' успешно настроена.")
+
+    # Отметки о нажатиях нужны, только пока кнопки могут нажать повторно
+    if CALLBACK_RECEIPT_DAYS > 0:
+        application.job_queue.run_daily(
+            coordinated(purge_callback_receipts, daily),
+            time=time(hour=0, minute=45),
+            name="purge_callback_receipts"
+        )
+        logger.info("Фоновая задача 'purge_callback_receipts' успешно настроена.")
+
+    # Ежедневный анонс ближайших событий
+    if DIGEST_CHAT_ID:
+        hour, minute = map(int, DIGEST_TIME.split(':'))
+        application.job_queue.run_daily(
+            coordinated(send_digest, daily),
+            time=time(hour=hour, minute=minute),
+            name="send_digest"
+        )
+        logger.info("Фоновая задача 'send_digest' успешно настроена.")
+
+    # Записи о запусках задач нужны для разбора недавних сбоев
+    if JOB_RUN_RETENTION_DAYS > 0:
+        application.job_queue.run_daily(
+            coordinated(purge_job_runs, daily),
+            time=time(hour=0, minute=15),
+            name="purge_job_runs"
+        )
+        logger.info("Фоновая задача 'purge_job_runs' успешно настроена.")
+
+    # Периодически перечитываем права администраторов, чтобы подхватить изменения других процессов
+    application.job_queue.run_repeating(
+        refresh_permissions,
+        interval=PERMISSIONS_TTL,
+        first=PERMISSIONS_TTL,
+        name="refresh_permissions"
+    )
+    logger.info("Фоновая задача 'refresh_permissions' успешно настроена.")
+
+    # Периодическая запись метрик в лог
+    if METRICS_LOG_INTERVAL > 0:
+        application.job_queue.run_repeating(
+            log_metrics,
+            interval=METRICS_LOG_INTERVAL,
+            first=METRICS_LOG_INTERVAL,
+            name="log_metrics"
+        )
+        logger.info("Фоновая задача 'log_metrics' успешно настроена.")
+
+    # Удаление из памяти состояния простаивающих пользователей
+    if USER_DATA_TTL > 0:
+        application.job_queue.run_repeating(
+            sweep_user_data,
+            interval=USER_DATA_SWEEP_INTERVAL,
+            first=USER_DATA_SWEEP_INTERVAL,
+            name="sweep_user_data"
+        )
+        logger.info("Фоновая задача 'sweep_user_data' успешно настроена.")
@@ -0,0 +1,160 @@
+# loop_monitor.py
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+from config import LOOP_MONITOR_INTERVAL, LOOP_LAG_THRESHOLD, LOOP_STACK_DEPTH
+from metrics import metrics
+from structured_logging import LogContext, task_context
+
+logger = logging.getLogger(__name__)
+
+# Код бота: по нему в стеке отличаются функции бота от кода библиотек
+BOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Кадры PTB, с которых начинается выполнение обработчика и фоновой задачи
+HANDLER_ENTRY = 'BaseHandler.handle_update'
+JOB_ENTRY = 'Job._run'
+
+# Обёртки бота вокруг обработчиков (инструментирование, маршрутизатор кнопок,
+# аренда фоновых задач): сами по себе они обработчиком не считаются
+WRAPPER_NAMES = ('wrapper', 'dispatch')
+
+
+def handler_from_stack(frame) -> str:
+    """
+    Имя обработчика или фоновой задачи по стеку: самая внешняя функция бота
+    ниже точки входа PTB. Пока корутина работает, её кадр связан через f_back
+    с кадрами ожидающих её корутин. Читаются только f_code и f_back:
+    локальные переменные кадра, выполняемого в другом потоке, читать небезопасно.
+    """
+    handler = None
+    while frame is not None:
+        code = frame.f_code
+        if code.co_qualname == JOB_ENTRY:
+            return f"job:{handler}" if handler else None
+        if code.co_qualname == HANDLER_ENTRY:
+            break
+        if code.co_filename.startswith(BOT_DIR) and code.co_name not in WRAPPER_NAMES:
+            handler = code.co_qualname
+        frame = frame.f_back
+    return handler
+
+
+def attribute_frame(frame, context: LogContext = None) -> dict:
+    """
+    Находит обработчик, обновление и пользователя, которые сейчас блокируют цикл.
+    Обновление и пользователь берутся из контекста логирования выполняемой задачи,
+    обработчик — оттуда же, а если контекста нет (фоновая задача или задача,
+    запущенная обработчиком), — по стеку.
+    """
+    context = context or LogContext()
+    return {
+        'handler': context.handler or handler_from_stack(frame),
+        'update_id': context.update_id,
+        'user_id': context.user_id,
+    }
+
+
+class LoopMonitor:
+    """
+    Сторож цикла событий. Корутина-пульс раз в interval отмечает время и
+    измеряет, насколько позже запланированного она проснулась, — это задержка
+    цикла. Отдельный поток проверяет пульс: если его нет дольше threshold,
+    цикл занят синхронным кодом, и поток снимает стек этого кода прямо во время
+    блокировки. В обычной работе это один таймер в цикле и несколько сравнений
+    в потоке за interval — достаточно дёшево, чтобы не выключать в работе.
+    """
+
+    def __init__(self, interval: float = LOOP_MONITOR_INTERVAL, threshold: float = LOOP_LAG_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.last_beat = time.monotonic()
+        self.max_lag = 0.0
+        self._reported_beat = None
+        self._loop_thread_id = None
+        self._loop = None
+        self._task = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0 and self.interval > 0
+
+    def start(self) -> None:
+        """
+        Запускает сторож. Вызывается из работающего цикла событий.
+        """
+        if not self.enabled or self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._loop = asyncio.get_running_loop()
+        self.last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = self._loop.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name='loop-monitor', daemon=True)
+        self._thread.start()
+        logger.info(f"Контроль цикла событий включён: порог {self.threshold * 1000:.0f} мс.")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stop.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _heartbeat(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            # Пульс отмечается сразу после пробуждения, до записи метрик и в лог
+            self.last_beat = time.monotonic()
+            lag = max(0.0, loop.time() - expected)
+
+            self.max_lag = max(self.max_lag, lag)
+            metrics.set_gauge('loop.lag_ms', round(lag * 1000, 1))
+            metrics.set_gauge('loop.lag_max_ms', round(self.max_lag * 1000, 1))
+            if lag >= self.threshold:
+                metrics.increment('loop.stalls')
+                logger.warning(f"Цикл событий был заблокирован {lag * 1000:.0f} мс.")
+
+    def _watch(self) -> None:
+        # Проверяем чаще порога, чтобы успеть снять стек и у коротких блокировок
+        period = min(self.interval, self.threshold) / 2
+        while not self._stop.wait(period):
+            beat = self.last_beat
+            if time.monotonic() - beat < self.interval + self.threshold or beat == self._reported_beat:
+                continue
+            # Об одной блокировке сообщаем один раз, пока пульс не возобновится
+            self._reported_beat = beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self.report(frame, time.monotonic() - beat - self.interval, task_context(self._loop))
+
+    def report(self, frame, blocked_for: float, context: LogContext = None) -> None:
+        source = attribute_frame(frame, context)
+        handler = source['handler'] or 'неизвестно'
+        stack = ''.join(traceback.format_list(traceback.extract_stack(frame)[-LOOP_STACK_DEPTH:]))
+
+        metrics.increment('loop.blocked')
+        metrics.increment(f"loop.blocked.{handler}")
+        logger.warning(
+            f"Цикл событий заблокирован уже {blocked_for * 1000:.0f} мс: обработчик {handler}, "
+            f"обновление {source['update_id']}, пользователь {source['user_id']}. "
+            f"Блокирующий код:\n{stack}",
+            extra={'update_id': source['update_id'], 'user_id': source['user_id'], 'handler': handler},
+        )
+
+
+loop_monitor = LoopMonitor()
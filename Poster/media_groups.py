@@ -0,0 +1,66 @@
+# media_groups.py
+
+import logging
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from config import MEDIA_GROUP_WINDOW
+
+logger = logging.getLogger(__name__)
+
+# Telegram допускает не больше 10 элементов в альбоме
+MAX_MEDIA_GROUP_SIZE = 10
+
+
+class MediaGroupBuffer:
+    """
+    Собирает части альбома (обновления с общим media_group_id) в одну группу.
+
+    Каждая новая часть откладывает обработку на MEDIA_GROUP_WINDOW секунд;
+    когда части перестают приходить, вызывается on_complete(update, context, file_ids)
+    первой части один раз на весь альбом с картинками в порядке сообщений.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._groups = {}
+
+    def add(self, update: Update, context: ContextTypes.DEFAULT_TYPE, on_complete) -> None:
+        message = update.message
+        group = self._groups.get(message.media_group_id)
+        if group is None:
+            # Способ обработки альбома определяет первая часть (обычно с подписью)
+            group = {'parts': {}, 'job': None, 'update': update, 'context': context, 'on_complete': on_complete}
+            self._groups[message.media_group_id] = group
+
+        group['parts'][message.message_id] = message.photo[-1].file_id
+
+        if group['job']:
+            group['job'].schedule_removal()
+        group['job'] = context.job_queue.run_once(
+            self._flush,
+            self.window,
+            data=message.media_group_id,
+            name=f"media_group_{message.media_group_id}",
+        )
+
+    def __contains__(self, media_group_id) -> bool:
+        return media_group_id in self._groups
+
+    async def _flush(self, job_context) -> None:
+        group = self._groups.pop(job_context.job.data, None)
+        if group is None:
+            return
+
+        file_ids = [group['parts'][message_id] for message_id in sorted(group['parts'])]
+        if len(file_ids) > MAX_MEDIA_GROUP_SIZE:
+            file_ids = file_ids[:MAX_MEDIA_GROUP_SIZE]
+
+        try:
+            await group['on_complete'](group['update'], group['context'], file_ids)
+        except Exception as e:
+            logger.error(f"Ошибка при обработке альбома {job_context.job.data}: {e}")
+
+
+media_group_buffer = MediaGroupBuffer(MEDIA_GROUP_WINDOW)
@@ -0,0 +1,36 @@
+# metrics.py
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Metrics:
+    """
+    Простой реестр счётчиков и текущих значений (gauge) в памяти процесса.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.gauges = {}
+
+    def increment(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value) -> None:
+        self.gauges[name] = value
+
+    def snapshot(self) -> dict:
+        return {**self.counters, **self.gauges}
+
+
+metrics = Metrics()
+
+
+async def log_metrics(context) -> None:
+    """
+    Фоновая задача для периодической записи метрик в лог.
+    """
+    snapshot = metrics.snapshot()
+    if snapshot:
+        logger.info("Метрики: " + ", ".join(f"{name}={value}" for name, value in sorted(snapshot.items())))
@@ -1,6 +1,7 @@
 # models.py
 
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, ForeignKey, Index
+from sqlalchemy import text as sql_text
 from datetime import datetime
 from base import Base  # Импортируем Base из base.py
 
@@ -19,12 +20,36 @@ class Draft(Base):
     text = Column(Text, nullable=True)
     contact = Column(String(255), nullable=True)
     image = Column(String(255), nullable=True)
+    # Все картинки альбома в виде JSON-списка file_id; image хранит первую из них
+    images = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     def __repr__(self):
         return f"<Draft(id={self.id}, user_id={self.user_id}, title={self.title})>"
 
 
+class DraftRevision(Base):
+    __tablename__ = 'draft_revisions'
+    __table_args__ = (
+        Index('ix_draft_revisions_draft_number', 'draft_id', 'number', unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    draft_id = Column(Integer, ForeignKey('drafts.id'), nullable=False)
+    # Порядковый номер ревизии в пределах черновика, начиная с 1
+    number = Column(Integer, nullable=False)
+    # snapshot — все поля целиком, delta — только изменения относительно предыдущей ревизии
+    kind = Column(String(20), nullable=False)
+    # JSON-объект {поле: значение или список правок}, см. revisions.py
+    data = Column(Text, nullable=False)
+    # Изменённые поля через запятую — для списка ревизий без разбора data
+    changed = Column(String(255), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<DraftRevision(draft_id={self.draft_id}, number={self.number}, kind={self.kind})>"
+
+
 class ResponsiblePerson(Base):
     __tablename__ = 'responsible_persons'
     
@@ -34,3 +59,146 @@ class ResponsiblePerson(Base):
 
     def __repr__(self):
         return f"<ResponsiblePerson(id={self.id}, name={self.name}, telegram_id={self.telegram_id})>"
+
+
+class Submission(Base):
+    __tablename__ = 'submissions'
+    __table_args__ = (
+        # Анонс выбирает только одобренные заявки по диапазону дат события
+        Index('ix_submissions_upcoming', 'event_date', sqlite_where=sql_text('approved_at IS NOT NULL')),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    title = Column(String(255), nullable=True)
+    date = Column(String(50), nullable=True)
+    time_start = Column(String(50), nullable=True)
+    time_end = Column(String(50), nullable=True)
+    place_name = Column(String(255), nullable=True)
+    place_url = Column(String(255), nullable=True)
+    text = Column(Text, nullable=True)
+    contact = Column(String(255), nullable=True)
+    image = Column(String(255), nullable=True)
+    images = Column(Text, nullable=True)
+    # SimHash нормализованного текста и его полосы для поиска похожих заявок
+    simhash = Column(Integer, nullable=False)
+    simhash_band0 = Column(Integer, nullable=False, index=True)
+    simhash_band1 = Column(Integer, nullable=False, index=True)
+    simhash_band2 = Column(Integer, nullable=False, index=True)
+    simhash_band3 = Column(Integer, nullable=False, index=True)
+    # Дата события, разобранная из поля date; NULL, если дату разобрать не удалось
+    event_date = Column(Date, nullable=True)
+    # Когда ответственный отметил заявку проверенной
+    approved_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<Submission(id={self.id}, user_id={self.user_id}, title={self.title})>"
+
+
+class AdminRole(Base):
+    __tablename__ = 'admin_roles'
+
+    id = Column(Integer, primary_key=True, index=True)
+    telegram_id = Column(Integer, unique=True, nullable=False)
+    role = Column(String(50), default='admin', nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<AdminRole(id={self.id}, telegram_id={self.telegram_id}, role={self.role})>"
+
+
+class OutboxMessage(Base):
+    __tablename__ = 'outbox'
+
+    id = Column(Integer, primary_key=True, index=True)
+    idempotency_key = Column(String(255), unique=True, nullable=False)
+    chat_id = Column(String(64), nullable=False)
+    method = Column(String(50), nullable=False)
+    payload = Column(Text, nullable=False)
+    status = Column(String(20), default='pending', nullable=False, index=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<OutboxMessage(id={self.id}, method={self.method}, chat_id={self.chat_id}, status={self.status})>"
+
+
+class Assignment(Base):
+    __tablename__ = 'assignments'
+    __table_args__ = (
+        # Нагрузка считается по открытым назначениям каждого ответственного
+        Index('ix_assignments_status_responsible', 'status', 'responsible_id'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    submission_id = Column(Integer, ForeignKey('submissions.id'), nullable=False, index=True)
+    responsible_id = Column(Integer, nullable=False)
+    # open — ждёт проверки, closed — проверено, reassigned — передано другому ответственному
+    status = Column(String(20), default='open', nullable=False)
+    # auto — выбран автоматически, manual — выбран в чате согласования
+    assigned_by = Column(String(20), default='manual', nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    closed_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<Assignment(id={self.id}, submission_id={self.submission_id}, responsible_id={self.responsible_id}, status={self.status})>"
+
+
+class CallbackReceipt(Base):
+    __tablename__ = 'callback_receipts'
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Пользователь, сообщение и данные кнопки: повторное нажатие даёт тот же ключ
+    key = Column(String(255), unique=True, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<CallbackReceipt(key={self.key})>"
+
+
+class StatCounter(Base):
+    __tablename__ = 'stat_counters'
+
+    # submissions — заявки за день (ключ — дата), assignments — назначения
+    # ответственного (ключ — Telegram ID), latency — корзина гистограммы
+    # времени до назначения (ключ — номер корзины), total — общие итоги
+    kind = Column(String(20), primary_key=True)
+    key = Column(String(32), primary_key=True)
+    value = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<StatCounter(kind={self.kind}, key={self.key}, value={self.value})>"
+
+
+class JobLease(Base):
+    __tablename__ = 'job_leases'
+
+    # Имя фоновой задачи: задачу выполняет только процесс, держащий её аренду
+    name = Column(String(64), primary_key=True)
+    holder = Column(String(128), nullable=False)
+    acquired_at = Column(DateTime, nullable=False)
+    heartbeat_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<JobLease(name={self.name}, holder={self.holder}, expires_at={self.expires_at})>"
+
+
+class JobRun(Base):
+    __tablename__ = 'job_runs'
+
+    id = Column(Integer, primary_key=True, index=True)
+    job = Column(String(64), nullable=False, index=True)
+    holder = Column(String(128), nullable=False)
+    # ok — выполнена, error — завершилась исключением
+    status = Column(String(20), nullable=False)
+    started_at = Column(DateTime, nullable=False, index=True)
+    duration_ms = Column(Integer, nullable=False)
+    error = Column(Text, nullable=True)
+
+    def __repr__(self):
+        return f"<JobRun(job={self.job}, status={self.status}, duration_ms={self.duration_ms})>"
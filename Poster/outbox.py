@@ -0,0 +1,272 @@
+# outbox.py
+
+import asyncio
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session, object_session
+from telegram import InlineKeyboardMarkup, InputMediaPhoto
+from telegram.error import BadRequest, Forbidden, RetryAfter
+
+from config import (
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_BACKOFF_BASE,
+    OUTBOX_BACKOFF_MAX,
+)
+from database import SessionLocal
+from fanout import fan_out
+from models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+# Методы Bot API, которые умеет вызывать воркер очереди
+SUPPORTED_METHODS = ('send_message', 'send_photo', 'send_media_group')
+
+# Один проход воркера за раз: иначе параллельные проходы отправили бы одно сообщение дважды
+_drain_lock = asyncio.Lock()
+
+
+def enqueue_message(session: Session, chat_id, method: str, idempotency_key: str = None,
+                    reply_markup: InlineKeyboardMarkup = None, **kwargs) -> OutboxMessage:
+    """
+    Ставит исходящее сообщение в очередь в рамках транзакции переданной сессии.
+    Коммит выполняет вызывающий код, поэтому сообщение сохраняется атомарно
+    вместе с остальными изменениями обработчика.
+
+    Повторный вызов с тем же idempotency_key не создаёт дубликат,
+    а возвращает уже поставленное в очередь сообщение.
+    """
+    if method not in SUPPORTED_METHODS:
+        raise ValueError(f"Метод {method} не поддерживается очередью.")
+
+    if idempotency_key is None:
+        idempotency_key = uuid.uuid4().hex
+    else:
+        existing = session.query(OutboxMessage).filter_by(idempotency_key=idempotency_key).first()
+        if existing:
+            return existing
+
+    payload = dict(kwargs)
+    if reply_markup is not None:
+        payload['reply_markup'] = reply_markup.to_dict()
+
+    message = OutboxMessage(
+        idempotency_key=idempotency_key,
+        chat_id=str(chat_id),
+        method=method,
+        payload=json.dumps(payload, ensure_ascii=False),
+    )
+    session.add(message)
+    return message
+
+
+def album_media(file_ids: list, caption: str = None, parse_mode: str = None) -> list:
+    """
+    Описание альбома для send_media_group в виде, пригодном для хранения в очереди.
+    Подпись ставится на первую картинку.
+    """
+    media = []
+    for index, file_id in enumerate(file_ids):
+        item = {'type': 'photo', 'media': file_id}
+        if index == 0 and caption:
+            item['caption'] = caption
+            item['parse_mode'] = parse_mode
+        media.append(item)
+    return media
+
+
+def _backoff_delay(attempts: int) -> float:
+    """
+    Экспоненциальная задержка перед следующей попыткой: base, 2*base, 4*base, ...
+    """
+    return min(OUTBOX_BACKOFF_MAX, OUTBOX_BACKOFF_BASE * 2 ** (attempts - 1))
+
+
+async def _deliver(bot, message: OutboxMessage) -> None:
+    """
+    Выполняет вызов Bot API для одного сообщения из очереди.
+    """
+    payload = json.loads(message.payload)
+    if 'reply_markup' in payload:
+        payload['reply_markup'] = InlineKeyboardMarkup.de_json(payload['reply_markup'], bot)
+    if 'media' in payload:
+        payload['media'] = [
+            InputMediaPhoto(media=item['media'], caption=item.get('caption'), parse_mode=item.get('parse_mode'))
+            for item in payload['media']
+        ]
+
+    method = getattr(bot, message.method)
+    await method(chat_id=message.chat_id, **payload)
+
+
+# Сообщения, которые имеют смысл только после другого сообщения того же
+# ключа: клавиатура выбора ответственного без поста над ней бесполезна
+DEPENDENT_MESSAGES = {'post': ('responsible',)}
+
+
+def _fail_dependents(session: Session, message: OutboxMessage) -> None:
+    """
+    Помечает failed ещё не отправленные сообщения, зависящие от сообщения,
+    которое Telegram отклонил окончательно.
+    """
+    prefix, _, suffix = message.idempotency_key.rpartition(':')
+    keys = [f"{prefix}:{dependent}" for dependent in DEPENDENT_MESSAGES.get(suffix, ())]
+    if not prefix or not keys:
+        return
+    dependents = (
+        session.query(OutboxMessage)
+        .filter(OutboxMessage.idempotency_key.in_(keys), OutboxMessage.status == 'pending')
+        .all()
+    )
+    for dependent in dependents:
+        dependent.status = 'failed'
+        dependent.last_error = f"Не отправлено сообщение {message.idempotency_key}"
+        logger.error(f"Сообщение {dependent.idempotency_key} не будет отправлено: {dependent.last_error}.")
+
+
+def _notify_author(session: Session, message: OutboxMessage) -> None:
+    """
+    Если окончательно не отправлен пост на согласование, сообщает об этом
+    автору: его чат — часть ключа approval:<чат автора>:<сообщение>:post.
+    """
+    parts = message.idempotency_key.split(':')
+    if len(parts) != 4 or parts[0] != 'approval' or parts[3] != 'post':
+        return
+    _, chat_id, message_id, _ = parts
+    enqueue_message(
+        session,
+        chat_id,
+        'send_message',
+        idempotency_key=f"approval:{chat_id}:{message_id}:failed",
+        text="Не удалось отправить пост на согласование. Пожалуйста, создайте его заново: /create_post",
+    )
+
+
+def _give_up(session: Session, message: OutboxMessage) -> None:
+    """
+    Последствия окончательного отказа в отправке: зависимые сообщения
+    не отправляются, а автор поста узнаёт, что пост не дошёл.
+    """
+    _fail_dependents(session, message)
+    _notify_author(session, message)
+
+
+def _schedule_retry(message: OutboxMessage, error: Exception, delay: float = None) -> None:
+    """
+    Откладывает сообщение до следующей попытки или помечает его как failed,
+    если попытки исчерпаны.
+    """
+    message.last_error = str(error)
+    if message.attempts >= OUTBOX_MAX_ATTEMPTS:
+        message.status = 'failed'
+        logger.error(f"Сообщение {message.idempotency_key} не отправлено после {message.attempts} попыток: {error}")
+        _give_up(object_session(message), message)
+        return
+
+    if delay is None:
+        delay = _backoff_delay(message.attempts)
+    message.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+    logger.warning(f"Сообщение {message.idempotency_key} будет повторено через {delay} с: {error}")
+
+
+def kick_outbox(context) -> None:
+    """
+    Запускает отправку очереди сразу, не дожидаясь очередного прохода воркера.
+    Вызывается после коммита, чтобы отправка шла параллельно с ответом пользователю.
+    """
+    context.job_queue.run_once(drain_outbox, 0, name="drain_outbox_now")
+
+
+async def _drain_chat(bot, message_ids: list) -> None:
+    """
+    Отправляет сообщения одного чата строго по порядку. Если отправка не удалась,
+    остальные сообщения этого чата ждут следующего прохода.
+
+    Чаты обслуживаются параллельно, поэтому у каждого своя сессия: коммит
+    одного чата не должен сохранять наполовину обработанные строки другого.
+    """
+    session: Session = SessionLocal()
+    try:
+        messages = (
+            session.query(OutboxMessage)
+            .filter(OutboxMessage.id.in_(message_ids), OutboxMessage.status == 'pending')
+            .order_by(OutboxMessage.id)
+            .all()
+        )
+        for message in messages:
+            if message.status != 'pending':
+                # Помечено failed вместе с сообщением, от которого зависит
+                continue
+            message.attempts += 1
+            try:
+                await _deliver(bot, message)
+            except RetryAfter as e:
+                # Telegram сам сообщает, сколько нужно подождать
+                _schedule_retry(message, e, delay=e.retry_after)
+                blocked = True
+            except (BadRequest, Forbidden) as e:
+                # Повтор не поможет: запрос некорректен или бот заблокирован
+                message.status = 'failed'
+                message.last_error = str(e)
+                logger.error(f"Сообщение {message.idempotency_key} отклонено Telegram: {e}")
+                _give_up(session, message)
+                blocked = False
+            except Exception as e:
+                # Сетевые ошибки Telegram и непредвиденные сбои: повтор с задержкой
+                _schedule_retry(message, e)
+                blocked = True
+            else:
+                message.status = 'sent'
+                message.sent_at = datetime.utcnow()
+                message.last_error = None
+                blocked = False
+
+            # Фиксируем результат сразу, чтобы не отправить сообщение повторно после сбоя
+            session.commit()
+            if blocked:
+                return
+    except Exception as e:
+        logger.error(f"Ошибка при отправке сообщений чата из очереди: {e}")
+        session.rollback()
+    finally:
+        session.close()
+
+
+async def drain_outbox(context) -> None:
+    """
+    Фоновая задача: отправляет пачку готовых к отправке сообщений из очереди.
+
+    Сообщения одного чата отправляются строго по порядку, а разные чаты
+    обслуживаются параллельно (не больше FANOUT_CONCURRENCY одновременно),
+    каждый в своей сессии. Доставка выполняется по принципу at-least-once.
+    """
+    async with _drain_lock:
+        session: Session = SessionLocal()
+        try:
+            batch = (
+                session.query(OutboxMessage.id, OutboxMessage.chat_id)
+                .filter(
+                    OutboxMessage.status == 'pending',
+                    OutboxMessage.next_attempt_at <= datetime.utcnow(),
+                )
+                .order_by(OutboxMessage.id)
+                .limit(OUTBOX_BATCH_SIZE)
+                .all()
+            )
+        except Exception as e:
+            logger.error(f"Ошибка при обработке очереди исходящих сообщений: {e}")
+            return
+        finally:
+            session.close()
+
+        chats = {}
+        for message_id, chat_id in batch:
+            chats.setdefault(chat_id, []).append(message_id)
+
+        await fan_out(
+            {f"outbox:{chat_id}": _drain_chat(context.bot, message_ids) for chat_id, message_ids in chats.items()},
+            raise_errors=False,
+        )
@@ -0,0 +1,113 @@
+# permissions.py
+
+import asyncio
+import logging
+import time
+
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import AdminRole
+
+logger = logging.getLogger(__name__)
+
+# Роли, дающие права администратора.
+# owner — администраторы из ADMIN_IDS, их нельзя удалить командой бота.
+ADMIN_ROLES = ('owner', 'admin')
+
+
+class PermissionCache:
+    """
+    Кэш прав администраторов в памяти процесса.
+    Проверка прав — поиск в frozenset без обращения к базе; сам набор целиком
+    заменяется новым при обновлении, поэтому читатели никогда не видят его
+    в промежуточном состоянии.
+    """
+
+    def __init__(self):
+        self._admins = frozenset()
+        self.refreshed_at = 0.0
+
+    def is_admin(self, user_id: int) -> bool:
+        return user_id in self._admins
+
+    @property
+    def admins(self) -> frozenset:
+        return self._admins
+
+    def refresh(self) -> None:
+        """
+        Перечитывает список администраторов из базы.
+        """
+        session: Session = SessionLocal()
+        try:
+            rows = session.query(AdminRole.telegram_id).filter(AdminRole.role.in_(ADMIN_ROLES)).all()
+            self._admins = frozenset(telegram_id for (telegram_id,) in rows)
+            self.refreshed_at = time.monotonic()
+        finally:
+            session.close()
+
+
+permission_cache = PermissionCache()
+
+
+def is_admin(user_id: int) -> bool:
+    """
+    Проверяет, является ли пользователь администратором. Не обращается к базе.
+    """
+    return permission_cache.is_admin(user_id)
+
+
+def notify_permissions_changed() -> None:
+    """
+    Вызывается после изменения таблицы ролей, чтобы изменения вступили в силу сразу.
+    Другие процессы бота подхватят их при ближайшем обновлении по PERMISSIONS_TTL.
+    """
+    permission_cache.refresh()
+
+
+def seed_admins(admin_ids: list) -> None:
+    """
+    Приводит владельцев в базе в соответствие с переменной окружения ADMIN_IDS
+    и загружает кэш прав. Администраторы из ADMIN_IDS становятся владельцами
+    (owner), а владельцы, которых в ADMIN_IDS больше нет, лишаются прав:
+    удалить их командой бота нельзя, поэтому права отзываются здесь.
+    Администраторы, назначенные командой /add_admin, не затрагиваются.
+    """
+    admin_ids = set(admin_ids)
+    session: Session = SessionLocal()
+    try:
+        roles = {
+            role.telegram_id: role
+            for role in session.query(AdminRole).filter(
+                (AdminRole.role == 'owner') | AdminRole.telegram_id.in_(admin_ids)
+            )
+        }
+        for telegram_id in admin_ids:
+            role = roles.get(telegram_id)
+            if role is None:
+                session.add(AdminRole(telegram_id=telegram_id, role='owner'))
+            elif role.role != 'owner':
+                role.role = 'owner'
+
+        revoked = sorted(telegram_id for telegram_id in roles if telegram_id not in admin_ids)
+        for telegram_id in revoked:
+            session.delete(roles[telegram_id])
+        session.commit()
+    finally:
+        session.close()
+
+    if revoked:
+        logger.info(f"Отозваны права владельцев, которых нет в ADMIN_IDS: {revoked}.")
+    permission_cache.refresh()
+    logger.info(f"Загружено администраторов: {len(permission_cache.admins)}.")
+
+
+async def refresh_permissions(context) -> None:
+    """
+    Фоновая задача для периодического обновления кэша прав из базы.
+    """
+    try:
+        await asyncio.to_thread(permission_cache.refresh)
+    except Exception as e:
+        logger.error(f"Ошибка при обновлении кэша прав администраторов: {e}")
@@ -0,0 +1,190 @@
+# read_models.py
+
+from datetime import date, datetime
+from typing import NamedTuple
+
+from sqlalchemy import bindparam, delete, select, update
+from sqlalchemy.orm import Session
+
+from models import Assignment, CallbackReceipt, Draft, DraftRevision, JobRun, OutboxMessage, Submission
+
+drafts = Draft.__table__
+revisions = DraftRevision.__table__
+assignments = Assignment.__table__
+outbox = OutboxMessage.__table__
+receipts = CallbackReceipt.__table__
+submissions = Submission.__table__
+job_runs = JobRun.__table__
+
+
+class DraftSummary(NamedTuple):
+    """
+    Краткие сведения о черновике для списков. Обычный кортеж: без отслеживания
+    изменений и identity map, в отличие от ORM-объекта Draft.
+    """
+    id: int
+    title: str
+    date: str
+    time_start: str
+    time_end: str
+    place_name: str
+
+
+class UpcomingEvent(NamedTuple):
+    """
+    Одобренная заявка для анонса. Текстовые поля уже экранированы для MarkdownV2.
+    """
+    id: int
+    event_date: date
+    title: str
+    time_start: str
+    time_end: str
+    place_name: str
+    place_url: str
+    contact: str
+    image: str
+
+
+# Запросы строятся один раз при импорте и параметризуются через bindparam,
+# поэтому SQLAlchemy находит их скомпилированный SQL в кэше по готовому ключу,
+# не собирая выражение заново при каждом вызове.
+DRAFT_SUMMARIES = (
+    select(
+        drafts.c.id,
+        drafts.c.title,
+        drafts.c.date,
+        drafts.c.time_start,
+        drafts.c.time_end,
+        drafts.c.place_name,
+    )
+    .where(drafts.c.user_id == bindparam('user_id'))
+    .order_by(drafts.c.id)
+)
+
+# Условие approved_at IS NOT NULL совпадает с условием частичного индекса
+# ix_submissions_upcoming, поэтому выборка идёт по индексу диапазоном дат
+UPCOMING_EVENTS = (
+    select(
+        submissions.c.id,
+        submissions.c.event_date,
+        submissions.c.title,
+        submissions.c.time_start,
+        submissions.c.time_end,
+        submissions.c.place_name,
+        submissions.c.place_url,
+        submissions.c.contact,
+        submissions.c.image,
+    )
+    .where(
+        submissions.c.approved_at.isnot(None),
+        submissions.c.event_date >= bindparam('start'),
+        submissions.c.event_date < bindparam('end'),
+    )
+    .order_by(submissions.c.event_date, submissions.c.time_start, submissions.c.id)
+)
+
+# История удаляемых черновиков удаляется вместе с ними
+DELETE_USER_DRAFT_REVISIONS = delete(revisions).where(
+    revisions.c.draft_id.in_(
+        select(drafts.c.id).where(
+            drafts.c.id == bindparam('draft_id'),
+            drafts.c.user_id == bindparam('user_id'),
+        )
+    )
+)
+DELETE_USER_DRAFT = delete(drafts).where(
+    drafts.c.id == bindparam('draft_id'),
+    drafts.c.user_id == bindparam('user_id'),
+)
+
+OLD_DRAFT_USERS = select(drafts.c.user_id).where(drafts.c.created_at < bindparam('cutoff')).distinct()
+DELETE_OLD_DRAFT_REVISIONS = delete(revisions).where(
+    revisions.c.draft_id.in_(select(drafts.c.id).where(drafts.c.created_at < bindparam('cutoff')))
+)
+DELETE_OLD_DRAFTS = delete(drafts).where(drafts.c.created_at < bindparam('cutoff'))
+
+DELETE_SENT_OUTBOX = delete(outbox).where(
+    outbox.c.status == 'sent',
+    outbox.c.sent_at < bindparam('cutoff'),
+)
+
+DELETE_OLD_RECEIPTS = delete(receipts).where(receipts.c.created_at < bindparam('cutoff'))
+
+DELETE_OLD_JOB_RUNS = delete(job_runs).where(job_runs.c.started_at < bindparam('cutoff'))
+
+RELEASE_ASSIGNMENTS = (
+    update(assignments)
+    .where(
+        assignments.c.responsible_id == bindparam('b_responsible_id'),
+        assignments.c.status == 'open',
+    )
+    .values(status='reassigned', closed_at=bindparam('b_closed_at'))
+)
+
+
+def draft_summaries(session: Session, user_id: int) -> list:
+    """
+    Черновики пользователя в виде DraftSummary, от старых к новым.
+    """
+    return [DraftSummary._make(row) for row in session.execute(DRAFT_SUMMARIES, {'user_id': user_id})]
+
+
+def upcoming_events(session: Session, start: date, end: date) -> list:
+    """
+    Одобренные события с датой в [start, end), по дате и времени начала.
+    """
+    return [UpcomingEvent._make(row) for row in session.execute(UPCOMING_EVENTS, {'start': start, 'end': end})]
+
+
+def delete_user_draft(session: Session, user_id: int, draft_id: int) -> bool:
+    """
+    Удаляет черновик пользователя одним DELETE. Возвращает False, если черновик
+    не найден или принадлежит другому пользователю. Коммит — за вызывающим кодом.
+    """
+    params = {'draft_id': draft_id, 'user_id': user_id}
+    session.execute(DELETE_USER_DRAFT_REVISIONS, params)
+    result = session.execute(DELETE_USER_DRAFT, params)
+    return result.rowcount > 0
+
+
+def delete_old_drafts(session: Session, cutoff: datetime) -> tuple:
+    """
+    Удаляет черновики, созданные до cutoff, одним DELETE.
+    Возвращает (количество удалённых, множество затронутых пользователей).
+    """
+    affected_users = set(session.execute(OLD_DRAFT_USERS, {'cutoff': cutoff}).scalars())
+    if not affected_users:
+        return 0, affected_users
+    session.execute(DELETE_OLD_DRAFT_REVISIONS, {'cutoff': cutoff})
+    result = session.execute(DELETE_OLD_DRAFTS, {'cutoff': cutoff})
+    return result.rowcount, affected_users
+
+
+def delete_sent_outbox(session: Session, cutoff: datetime) -> int:
+    """
+    Удаляет отправленные до cutoff сообщения очереди одним DELETE.
+    """
+    return session.execute(DELETE_SENT_OUTBOX, {'cutoff': cutoff}).rowcount
+
+
+def delete_old_receipts(session: Session, cutoff: datetime) -> int:
+    """
+    Удаляет отметки о нажатиях, сделанные до cutoff, одним DELETE.
+    """
+    return session.execute(DELETE_OLD_RECEIPTS, {'cutoff': cutoff}).rowcount
+
+
+def delete_old_job_runs(session: Session, cutoff: datetime) -> int:
+    """
+    Удаляет записи о запусках фоновых задач, начатых до cutoff, одним DELETE.
+    """
+    return session.execute(DELETE_OLD_JOB_RUNS, {'cutoff': cutoff}).rowcount
+
+
+def release_assignments(session: Session, responsible_id: int) -> int:
+    """
+    Снимает все открытые назначения с ответственного одним UPDATE.
+    """
+    return session.execute(
+        RELEASE_ASSIGNMENTS, {'b_responsible_id': responsible_id, 'b_closed_at': datetime.utcnow()}
+    ).rowcount
@@ -0,0 +1,175 @@
+# revisions.py
+
+import json
+from difflib import SequenceMatcher
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from config import DRAFT_SNAPSHOT_INTERVAL, DRAFT_PATCH_MIN_LENGTH
+from models import Draft, DraftRevision
+
+# Поля черновика, история которых сохраняется
+REVISION_FIELDS = (
+    'title', 'date', 'time_start', 'time_end', 'place_name',
+    'place_url', 'text', 'contact', 'image', 'images',
+)
+
+
+def draft_fields(draft: Draft) -> dict:
+    return {field: getattr(draft, field) for field in REVISION_FIELDS}
+
+
+def text_patch(old: str, new: str) -> list:
+    """
+    Посимвольные правки, превращающие old в new: список [начало, конец, замена].
+    """
+    matcher = SequenceMatcher(None, old, new, autojunk=False)
+    return [[i1, i2, new[j1:j2]] for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal']
+
+
+def apply_patch(old: str, patch: list) -> str:
+    # Правки применяются с конца, чтобы не сдвигать позиции ещё не применённых
+    for start, end, replacement in reversed(patch):
+        old = old[:start] + replacement + old[end:]
+    return old
+
+
+def make_delta(old: dict, new: dict) -> dict:
+    """
+    Изменения полей от old к new. Значение поля — новое значение целиком либо,
+    для длинных строк, список посимвольных правок, если он короче. Значения
+    полей — строки или None, поэтому список однозначно означает правки.
+    """
+    delta = {}
+    for field in REVISION_FIELDS:
+        before, after = old.get(field), new.get(field)
+        if before == after:
+            continue
+        if isinstance(before, str) and isinstance(after, str) and len(after) >= DRAFT_PATCH_MIN_LENGTH:
+            patch = text_patch(before, after)
+            if len(json.dumps(patch, ensure_ascii=False)) < len(json.dumps(after, ensure_ascii=False)):
+                delta[field] = patch
+                continue
+        delta[field] = after
+    return delta
+
+
+def apply_delta(fields: dict, delta: dict) -> dict:
+    fields = dict(fields)
+    for field, value in delta.items():
+        fields[field] = apply_patch(fields.get(field) or '', value) if isinstance(value, list) else value
+    return fields
+
+
+def last_revision_number(session: Session, draft_id: int) -> int:
+    return session.query(func.max(DraftRevision.number)).filter(DraftRevision.draft_id == draft_id).scalar() or 0
+
+
+def _add_revision(session: Session, draft_id: int, number: int, kind: str, data: dict, changed) -> DraftRevision:
+    revision = DraftRevision(
+        draft_id=draft_id,
+        number=number,
+        kind=kind,
+        data=json.dumps(data, ensure_ascii=False),
+        changed=','.join(changed),
+    )
+    session.add(revision)
+    return revision
+
+
+def record_revision(session: Session, draft: Draft, previous: dict = None) -> DraftRevision:
+    """
+    Записывает текущее состояние черновика новой ревизией в рамках транзакции
+    сессии. previous — поля до изменения; для нового черновика не передаётся.
+    Каждая DRAFT_SNAPSHOT_INTERVAL-я ревизия сохраняется целиком, поэтому для
+    восстановления любой ревизии достаточно одного снимка и меньше
+    DRAFT_SNAPSHOT_INTERVAL изменений. Возвращает None, если ничего не изменилось.
+    """
+    current = draft_fields(draft)
+    number = last_revision_number(session, draft.id)
+
+    if previous is not None and number == 0:
+        # Черновик создан до появления истории: его прежнее состояние становится первой ревизией
+        _add_revision(session, draft.id, 1, 'snapshot', previous, [])
+        number = 1
+
+    changed = [field for field in REVISION_FIELDS if (previous or {}).get(field) != current[field]]
+    if previous is not None and not changed:
+        return None
+
+    number += 1
+    if (number - 1) % max(DRAFT_SNAPSHOT_INTERVAL, 1) == 0:
+        return _add_revision(session, draft.id, number, 'snapshot', current, changed)
+    return _add_revision(session, draft.id, number, 'delta', make_delta(previous, current), changed)
+
+
+def reconstruct(session: Session, draft_id: int, number: int) -> dict:
+    """
+    Поля черновика в ревизии number или None, если такой ревизии нет.
+    """
+    snapshot = (
+        session.query(func.max(DraftRevision.number))
+        .filter(
+            DraftRevision.draft_id == draft_id,
+            DraftRevision.kind == 'snapshot',
+            DraftRevision.number <= number,
+        )
+        .scalar()
+    )
+    if snapshot is None:
+        return None
+
+    rows = (
+        session.query(DraftRevision.number, DraftRevision.kind, DraftRevision.data)
+        .filter(
+            DraftRevision.draft_id == draft_id,
+            DraftRevision.number >= snapshot,
+            DraftRevision.number <= number,
+        )
+        .order_by(DraftRevision.number)
+        .all()
+    )
+    if not rows or rows[-1].number != number:
+        return None
+
+    fields = {}
+    for row in rows:
+        data = json.loads(row.data)
+        fields = data if row.kind == 'snapshot' else apply_delta(fields, data)
+    return fields
+
+
+def list_revisions(session: Session, draft_id: int) -> list:
+    """
+    Ревизии черновика от новых к старым: (номер, вид, изменённые поля, размер данных, время).
+    """
+    return (
+        session.query(
+            DraftRevision.number,
+            DraftRevision.kind,
+            DraftRevision.changed,
+            func.length(DraftRevision.data).label('size'),
+            DraftRevision.created_at,
+        )
+        .filter(DraftRevision.draft_id == draft_id)
+        .order_by(DraftRevision.number.desc())
+        .all()
+    )
+
+
+def restore_revision(session: Session, draft: Draft, number: int) -> DraftRevision:
+    """
+    Возвращает черновику поля ревизии number. Восстановление записывается
+    новой ревизией, так что история не теряется и его тоже можно отменить.
+    Возвращает None, если ревизии нет, и False, если черновик с ней уже
+    совпадает. Коммит — за вызывающим кодом.
+    """
+    fields = reconstruct(session, draft.id, number)
+    if fields is None:
+        return None
+
+    previous = draft_fields(draft)
+    for field in REVISION_FIELDS:
+        setattr(draft, field, fields.get(field))
+    return record_revision(session, draft, previous) or False
@@ -0,0 +1,201 @@
+# stats.py
+
+import logging
+import math
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from typing import NamedTuple
+
+from sqlalchemy import and_, bindparam, func, or_, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import Assignment, StatCounter, Submission
+
+logger = logging.getLogger(__name__)
+
+counters = StatCounter.__table__
+
+# Верхние границы корзин гистограммы времени до назначения, в секундах.
+# Последняя корзина (номер len(LATENCY_BOUNDS)) — всё, что дольше недели.
+LATENCY_BOUNDS = (1, 5, 15, 30, 60, 300, 900, 1800, 3600, 7200, 14400, 28800, 86400, 172800, 604800)
+
+PERCENTILES = (50, 90, 99)
+
+_increment = insert(counters).values(
+    kind=bindparam('kind'),
+    key=bindparam('key'),
+    value=bindparam('amount'),
+)
+# Счётчик создаётся при первом событии и дальше увеличивается на месте
+INCREMENT = _increment.on_conflict_do_update(
+    index_elements=[counters.c.kind, counters.c.key],
+    set_={'value': counters.c.value + _increment.excluded.value},
+)
+
+# Заявки только за последние дни, остальные счётчики — целиком: их число
+# ограничено числом ответственных и корзин, а не объёмом истории
+STATS_ROWS = select(counters.c.kind, counters.c.key, counters.c.value).where(
+    or_(
+        and_(counters.c.kind == 'submissions', counters.c.key >= bindparam('since')),
+        counters.c.kind != 'submissions',
+    )
+)
+
+
+class Stats(NamedTuple):
+    days: list           # [(дата, заявок)] от старых к новым
+    submissions: int
+    assignments: int
+    reviewers: dict      # Telegram ID ответственного -> назначений
+    latency: dict        # номер корзины -> назначений
+
+
+def latency_bucket(seconds: float) -> int:
+    return bisect_left(LATENCY_BOUNDS, max(seconds, 0))
+
+
+def _add(session: Session, increments: list) -> None:
+    session.execute(INCREMENT, [{'kind': kind, 'key': key, 'amount': amount} for kind, key, amount in increments])
+
+
+def count_submission(session: Session, day: date) -> None:
+    """
+    Учитывает новую заявку в рамках транзакции сессии: счётчик
+    коммитится вместе с самой заявкой.
+    """
+    _add(session, [('submissions', day.isoformat(), 1), ('total', 'submissions', 1)])
+
+
+def count_assignment(session: Session, responsible_id: int, latency: float = None) -> None:
+    """
+    Учитывает назначение в рамках транзакции сессии. latency — секунды от
+    создания заявки до её первого назначения; для переназначений не передаётся.
+    """
+    increments = [('assignments', str(responsible_id), 1), ('total', 'assignments', 1)]
+    if latency is not None:
+        increments.append(('latency', str(latency_bucket(latency)), 1))
+    _add(session, increments)
+
+
+def load_stats(session: Session, days: int, today: date = None) -> Stats:
+    """
+    Читает счётчики одним запросом. Число строк зависит от days, числа
+    ответственных и корзин, но не от количества заявок в базе.
+    """
+    today = today or datetime.utcnow().date()
+    first_day = today - timedelta(days=days - 1)
+    per_day, totals, reviewers, latency = {}, {}, {}, {}
+    for kind, key, value in session.execute(STATS_ROWS, {'since': first_day.isoformat()}):
+        if kind == 'submissions':
+            per_day[key] = value
+        elif kind == 'total':
+            totals[key] = value
+        elif kind == 'assignments':
+            reviewers[int(key)] = value
+        elif kind == 'latency':
+            latency[int(key)] = value
+
+    day_list = [first_day + timedelta(days=offset) for offset in range(days)]
+    return Stats(
+        days=[(day, per_day.get(day.isoformat(), 0)) for day in day_list],
+        submissions=totals.get('submissions', 0),
+        assignments=totals.get('assignments', 0),
+        reviewers=reviewers,
+        latency=latency,
+    )
+
+
+def percentile_bucket(histogram: dict, percent: float) -> int:
+    """
+    Номер корзины, в которую попадает заданный процентиль, или None для пустой гистограммы.
+    """
+    total = sum(histogram.values())
+    if not total:
+        return None
+    target = max(math.ceil(total * percent / 100), 1)
+    seen = 0
+    for bucket in sorted(histogram):
+        seen += histogram[bucket]
+        if seen >= target:
+            return bucket
+    return max(histogram)
+
+
+def format_duration(seconds: int) -> str:
+    if seconds < 60:
+        return f"{seconds} с"
+    if seconds < 3600:
+        return f"{seconds // 60} мин"
+    if seconds < 86400:
+        return f"{seconds // 3600} ч"
+    return f"{seconds // 86400} дн"
+
+
+def bucket_label(bucket: int) -> str:
+    if bucket >= len(LATENCY_BOUNDS):
+        return f"> {format_duration(LATENCY_BOUNDS[-1])}"
+    return f"≤ {format_duration(LATENCY_BOUNDS[bucket])}"
+
+
+def format_stats(stats: Stats, names: dict) -> str:
+    """
+    Текст ответа на /stats. names — имена ответственных по Telegram ID.
+    """
+    lines = [f"📊 Статистика\n\nЗаявки за {len(stats.days)} дн.:"]
+    lines += [f"{day:%d.%m} — {count}" for day, count in stats.days]
+    lines.append(f"Всего заявок: {stats.submissions}")
+
+    lines.append(f"\nНазначения по ответственным (всего {stats.assignments}):")
+    for responsible_id, count in sorted(stats.reviewers.items(), key=lambda item: -item[1]):
+        lines.append(f"{names.get(responsible_id, 'удалён')} ({responsible_id}) — {count}")
+    if not stats.reviewers:
+        lines.append("Назначений пока нет.")
+
+    measured = sum(stats.latency.values())
+    lines.append(f"\nВремя до назначения ({measured} заявок):")
+    if measured:
+        lines.append(', '.join(
+            f"p{percent} {bucket_label(percentile_bucket(stats.latency, percent))}" for percent in PERCENTILES
+        ))
+    else:
+        lines.append("Данных пока нет.")
+    return '\n'.join(lines)
+
+
+def backfill_stats() -> None:
+    """
+    Заполняет пустые счётчики по уже накопленным заявкам и назначениям.
+    Выполняется при запуске один раз: дальше счётчики поддерживаются
+    при каждом событии.
+    """
+    session: Session = SessionLocal()
+    try:
+        if session.query(StatCounter.kind).first() is not None:
+            return
+
+        increments = []
+        day = func.date(Submission.created_at)
+        for key, count in session.query(day, func.count(Submission.id)).group_by(day):
+            increments += [('submissions', key, count), ('total', 'submissions', count)]
+
+        rows = session.query(Assignment.responsible_id, func.count(Assignment.id)).group_by(Assignment.responsible_id)
+        for responsible_id, count in rows:
+            increments += [('assignments', str(responsible_id), count), ('total', 'assignments', count)]
+
+        first_assigned = (
+            session.query(func.min(Assignment.created_at).label('assigned_at'), Submission.created_at)
+            .join(Submission, Submission.id == Assignment.submission_id)
+            .group_by(Assignment.submission_id)
+        )
+        for assigned_at, created_at in first_assigned:
+            seconds = (datetime.fromisoformat(str(assigned_at)) - created_at).total_seconds()
+            increments.append(('latency', str(latency_bucket(seconds)), 1))
+
+        if increments:
+            _add(session, increments)
+            session.commit()
+            logger.info(f"Счётчики статистики заполнены по истории: {len(increments)} изменений.")
+    finally:
+        session.close()
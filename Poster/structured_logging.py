@@ -0,0 +1,229 @@
+# structured_logging.py
+
+import asyncio
+import atexit
+import contextvars
+import functools
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from telegram.ext import ConversationHandler
+
+from config import LOG_LEVEL, LOG_FORMAT, LOG_DEBUG_SAMPLE_RATE, LOG_SLOW_HANDLER_MS
+
+logger = logging.getLogger(__name__)
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Поля контекста, добавляемые к каждой записи
+CONTEXT_FIELDS = ('update_id', 'user_id', 'handler')
+
+
+class LogContext(NamedTuple):
+    update_id: int = None
+    user_id: int = None
+    handler: str = None
+
+
+# Контекст обновления, которое сейчас обрабатывается. Задачи, созданные
+# обработчиком (например, в fan_out), получают копию и пишут тот же контекст.
+log_context = contextvars.ContextVar('log_context', default=LogContext())
+
+# Тот же контекст по задачам asyncio. Значение ContextVar видно только
+# в потоке цикла событий, а сторожу цикла (loop_monitor) из своего потока
+# нужно знать, какое обновление обрабатывает заблокировавшая цикл задача.
+task_contexts = {}
+
+
+def _set_context(value: LogContext):
+    token = log_context.set(value)
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is not None:
+        task_contexts[task] = value
+    return token
+
+
+def task_context(loop) -> LogContext:
+    """
+    Контекст задачи, которая сейчас выполняется в цикле loop. Можно вызывать из другого потока.
+    """
+    task = asyncio.current_task(loop)
+    return task_contexts.get(task) if task is not None else None
+
+
+def set_handler_name(name: str) -> None:
+    """
+    Уточняет имя обработчика в контексте, например, когда общий обработчик
+    кнопок выбрал конкретное действие.
+    """
+    _set_context(log_context.get()._replace(handler=name))
+
+
+class ContextFilter(logging.Filter):
+    """
+    Добавляет к записи поля контекста обновления, если они не переданы явно через extra.
+    Работает в потоке, создавшем запись, — только там контекст и доступен.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = log_context.get()
+        for field in CONTEXT_FIELDS:
+            if getattr(record, field, None) is None:
+                setattr(record, field, getattr(context, field))
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """
+    Пропускает DEBUG-записи только для доли rate обновлений. Решение принимается
+    по update_id, поэтому у выбранного обновления сохраняются все его записи.
+    Записи вне обновлений отбираются случайно. Остальные уровни не отбрасываются.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.threshold = int(max(0.0, min(rate, 1.0)) * 10000)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        update_id = getattr(record, 'update_id', None)
+        if update_id is None:
+            return random.randrange(10000) < self.threshold
+        return update_id * 2654435761 % 10000 < self.threshold
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Одна JSON-строка на запись: время, уровень, логгер, сообщение, контекст
+    обновления, длительность обработки и текст исключения, если они есть.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS + ('duration_ms',):
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """
+    Кладёт запись в очередь, не выполняя ввода-вывода. Сообщение подставляется
+    здесь, а исключение превращается в текст, чтобы запись можно было безопасно
+    передать в другой поток; форматирование целиком выполняет поток-слушатель.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """
+    Настраивает корневой логгер: записи попадают в очередь, а в поток вывода
+    их пишет отдельный поток-слушатель, так что логирование не задерживает
+    обработку обновлений в цикле событий.
+    """
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter() if LOG_FORMAT == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = ContextQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    queue_handler.addFilter(DebugSamplingFilter(LOG_DEBUG_SAMPLE_RATE))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(LOG_LEVEL)
+    # Предупреждения warnings тоже идут через очередь в общем формате
+    logging.captureWarnings(True)
+
+    listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    listener.start()
+    # Оставшиеся в очереди записи дописываются при завершении процесса
+    atexit.register(listener.stop)
+    return listener
+
+
+def instrument(callback):
+    """
+    Оборачивает обработчик: задаёт контекст логирования для обновления
+    и записывает длительность обработки.
+    """
+    name = getattr(callback, '__qualname__', repr(callback))
+
+    @functools.wraps(callback)
+    async def wrapper(update, context, *args, **kwargs):
+        user = getattr(update, 'effective_user', None)
+        task = asyncio.current_task()
+        previous = task_contexts.get(task)
+        token = _set_context(LogContext(
+            update_id=getattr(update, 'update_id', None),
+            user_id=user.id if user else None,
+            handler=name,
+        ))
+        started = time.perf_counter()
+        try:
+            return await callback(update, context, *args, **kwargs)
+        finally:
+            duration_ms = round((time.perf_counter() - started) * 1000, 1)
+            if duration_ms >= LOG_SLOW_HANDLER_MS:
+                logger.warning("Медленная обработка обновления.", extra={'duration_ms': duration_ms})
+            else:
+                logger.debug("Обновление обработано.", extra={'duration_ms': duration_ms})
+            log_context.reset(token)
+            if previous is None:
+                task_contexts.pop(task, None)
+            else:
+                task_contexts[task] = previous
+
+    wrapper.instrumented = True
+    return wrapper
+
+
+def _instrument_handler(handler) -> None:
+    if isinstance(handler, ConversationHandler):
+        inner = list(handler.entry_points) + list(handler.fallbacks)
+        for state_handlers in handler.states.values():
+            inner.extend(state_handlers)
+        for inner_handler in inner:
+            _instrument_handler(inner_handler)
+    elif not getattr(handler.callback, 'instrumented', False):
+        handler.callback = instrument(handler.callback)
+
+
+def instrument_handlers(application) -> None:
+    """
+    Оборачивает все зарегистрированные обработчики, включая вложенные в диалоги.
+    Вызывается после регистрации обработчиков.
+    """
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            _instrument_handler(handler)
@@ -0,0 +1,111 @@
+# submissions.py
+
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from config import SIMHASH_MAX_DISTANCE, SIMHASH_WINDOW_DAYS
+from models import Submission
+from stats import count_submission
+from utils.formatter import unescape_markdown
+from utils.validators import parse_date
+from utils.simhash import (
+    bands,
+    hamming_distance,
+    normalize_text,
+    simhash,
+    to_signed,
+    to_unsigned,
+)
+
+POST_FIELDS = ('title', 'date', 'time_start', 'time_end', 'place_name', 'place_url', 'text', 'contact', 'image')
+
+# Поля, по которым определяется «то же самое событие»
+FINGERPRINT_FIELDS = ('title', 'date', 'time_start', 'place_name', 'text')
+
+BAND_COLUMNS = (
+    Submission.simhash_band0,
+    Submission.simhash_band1,
+    Submission.simhash_band2,
+    Submission.simhash_band3,
+)
+
+# Значение, которое ставится в поле при пропуске шага
+EMPTY_VALUE = 'Не указано'
+
+
+def fingerprint_text(post_data: dict) -> str:
+    """
+    Текст для отпечатка. Пропущенные поля не учитываются: иначе общие
+    шинглы из «Не указано» сближали бы посты с малым числом заполненных полей.
+    """
+    values = (str(post_data.get(field) or '') for field in FINGERPRINT_FIELDS)
+    return ' '.join(value for value in values if value and value != EMPTY_VALUE)
+
+
+def find_near_duplicates(session: Session, value: int, max_distance: int = SIMHASH_MAX_DISTANCE,
+                         limit: int = 5, window_days: float = SIMHASH_WINDOW_DAYS) -> list:
+    """
+    Ищет заявки с похожим отпечатком за последние window_days дней. Похожие
+    отпечатки совпадают хотя бы в одной полосе, поэтому достаточно одного
+    индексированного запроса на полосу и проверки расстояния Хэмминга для всех
+    заявок с совпавшей полосой: ограничение их числа пропускало бы давние дубликаты.
+    """
+    candidates = {}
+    for band, column in zip(bands(value), BAND_COLUMNS):
+        query = (
+            session.query(Submission.id, Submission.simhash, Submission.title, Submission.created_at)
+            .filter(column == band)
+        )
+        if window_days > 0:
+            query = query.filter(Submission.created_at >= datetime.utcnow() - timedelta(days=window_days))
+        for row in query.order_by(Submission.created_at.desc()):
+            candidates[row.id] = row
+
+    matches = [
+        row for row in candidates.values()
+        if hamming_distance(to_unsigned(row.simhash), value) <= max_distance
+    ]
+    matches.sort(key=lambda row: row.id, reverse=True)
+    return matches[:limit]
+
+
+def record_submission(session: Session, user_id: int, post_data: dict) -> tuple:
+    """
+    Сохраняет заявку с отпечатком в рамках транзакции сессии, учитывает её
+    в статистике и ищет похожие на неё.
+    Возвращает кортеж (заявка, список похожих заявок).
+    """
+    text = fingerprint_text(post_data)
+    value = simhash(text)
+
+    # Пустой текст не несёт информации и «совпадает» с любым другим пустым
+    duplicates = find_near_duplicates(session, value) if normalize_text(text) else []
+
+    band_values = bands(value)
+    submission = Submission(
+        user_id=user_id,
+        simhash=to_signed(value),
+        simhash_band0=band_values[0],
+        simhash_band1=band_values[1],
+        simhash_band2=band_values[2],
+        simhash_band3=band_values[3],
+        images=json.dumps(post_data['images']) if post_data.get('images') else None,
+        event_date=parse_date(unescape_markdown(post_data.get('date') or '')),
+        **{field: post_data.get(field) for field in POST_FIELDS},
+    )
+    session.add(submission)
+    count_submission(session, datetime.utcnow().date())
+    return submission, duplicates
+
+
+def duplicate_warning(duplicates: list) -> str:
+    """
+    Текст предупреждения о похожих заявках для сообщения в чате согласования.
+    """
+    lines = ["⚠️ Похоже на уже отправленные заявки:"]
+    for row in duplicates:
+        title = unescape_markdown(row.title or '') or 'Без заголовка'
+        lines.append(f"• #{row.id} от {row.created_at:%d.%m.%Y}: {title}")
+    return '\n'.join(lines)
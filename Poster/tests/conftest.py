@@ -0,0 +1,35 @@
+# tests/conftest.py
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+# config.py требует настроек бота при импорте. Тесты работают с отдельной
+# временной базой и никогда не трогают рабочую.
+os.environ.update({
+    'TELEGRAM_BOT_TOKEN': '123:test',
+    'REVIEW_CHAT_ID': '-100',
+    'ADMIN_IDS': '1',
+    'DATABASE_PATH': os.path.join(tempfile.mkdtemp(prefix='poster-tests-'), 'test.db'),
+    'LOG_FORMAT': 'text',
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from base import Base  # noqa: E402
+from database import SessionLocal, engine, init_db  # noqa: E402
+
+
+@pytest.fixture
+def session():
+    """
+    Сессия к пустой базе со всеми таблицами. После теста таблицы удаляются.
+    """
+    init_db()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
@@ -0,0 +1,154 @@
+# tests/test_callback_router.py
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from telegram import Update
+
+from callback_router import MAX_CALLBACK_DATA, POST_CREATION_SCOPE, CallbackRouter
+
+
+class StubQuery:
+    """
+    Заменитель CallbackQuery: запоминает ответы на нажатие.
+    """
+
+    def __init__(self, data: str, message_id: int, user_id: int = 7):
+        self.data = data
+        self.from_user = SimpleNamespace(id=user_id)
+        self.message = SimpleNamespace(message_id=message_id)
+        self.inline_message_id = None
+        self.answers = []
+
+    async def answer(self, text=None):
+        self.answers.append(text)
+
+
+def press(handler, query: StubQuery):
+    return asyncio.run(handler.callback(SimpleNamespace(callback_query=query), None))
+
+
+def callback_update(data: str) -> Update:
+    return Update.de_json({
+        'update_id': 1,
+        'callback_query': {
+            'id': '1',
+            'chat_instance': '1',
+            'from': {'id': 7, 'is_bot': False, 'first_name': 'x'},
+            'data': data,
+        },
+    }, None)
+
+
+async def noop(update, context, *args):
+    return args
+
+
+@pytest.fixture
+def router():
+    return CallbackRouter(version=1)
+
+
+def test_round_trip_with_packed_arguments(router):
+    router.register('d', noop, arg_types=(int, int, str))
+    data = router.encode('d', 123456, -42, 'title')
+
+    assert data == '1d:2n9c:-16:title'
+    assert router.decode(data) == (noop, [123456, -42, 'title'], 'global')
+
+
+def test_decode_rejects_stale_and_malformed_data(router):
+    router.register('d', noop, arg_types=(int,))
+
+    assert router.decode('2d:1') is None        # другая версия формата
+    assert router.decode('1z:1') is None        # неизвестное действие
+    assert router.decode('1d') is None          # не хватает аргумента
+    assert router.decode('1d:1:2') is None      # лишний аргумент
+    assert router.decode('1d:!!') is None       # не base36
+    assert router.decode('delete_draft_5') is None
+    assert router.decode('') is None
+
+
+def test_encode_rejects_separator_and_long_data(router):
+    router.register('f', noop, arg_types=(str,))
+    with pytest.raises(ValueError):
+        router.encode('f', 'a:b')
+    with pytest.raises(ValueError):
+        router.encode('f', 'x' * MAX_CALLBACK_DATA)
+
+
+def test_register_rejects_conflicts(router):
+    router.register('d', noop, arg_types=(int,))
+    # Повторная регистрация того же маршрута допустима
+    router.register('d', noop, arg_types=(int,))
+
+    async def other(update, context, *args):
+        pass
+
+    with pytest.raises(ValueError):
+        router.register('d', other, arg_types=(int,))
+    with pytest.raises(ValueError):
+        router.register('a:b', noop)
+
+
+def test_handler_matches_only_its_scope(router):
+    router.register('g', noop)
+    router.register('p', noop, scope=POST_CREATION_SCOPE)
+    global_handler = router.handler()
+    post_handler = router.handler(POST_CREATION_SCOPE)
+
+    assert global_handler.check_update(callback_update('1g'))
+    assert not global_handler.check_update(callback_update('1p'))
+    assert post_handler.check_update(callback_update('1p'))
+    assert not post_handler.check_update(callback_update('2p'))
+
+
+def test_dispatch_passes_decoded_arguments(router):
+    router.register('d', noop, arg_types=(int, str))
+    assert press(router.handler(), StubQuery(router.encode('d', 99, 'x'), message_id=1001)) == (99, 'x')
+
+
+def test_repeated_press_of_idempotent_action_is_dropped(router):
+    calls = []
+
+    async def slow(update, context):
+        calls.append(update.callback_query.data)
+        await asyncio.sleep(0.05)
+
+    router.register('s', slow, idempotent=True)
+    handler = router.handler()
+    first, second = StubQuery('1s', message_id=1002), StubQuery('1s', message_id=1002)
+
+    async def double_press():
+        await asyncio.gather(
+            handler.callback(SimpleNamespace(callback_query=first), None),
+            handler.callback(SimpleNamespace(callback_query=second), None),
+        )
+
+    asyncio.run(double_press())
+    assert calls == ['1s']
+    assert second.answers == ["Уже выполняется."]
+
+
+def test_failed_idempotent_action_can_be_retried(router):
+    attempts = []
+
+    async def flaky(update, context):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError('boom')
+
+    router.register('s', flaky, idempotent=True)
+    handler = router.handler()
+
+    with pytest.raises(RuntimeError):
+        press(handler, StubQuery('1s', message_id=1003))
+    press(handler, StubQuery('1s', message_id=1003))
+    assert len(attempts) == 2
+
+
+def test_stale_handler_answers_old_buttons(router):
+    query = StubQuery('delete_draft_5', message_id=1004)
+    press(router.stale_handler(), query)
+    assert query.answers == ["Эта кнопка устарела."]
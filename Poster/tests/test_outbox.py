@@ -0,0 +1,152 @@
+# tests/test_outbox.py
+
+import asyncio
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+import outbox
+from config import OUTBOX_BACKOFF_MAX, OUTBOX_MAX_ATTEMPTS
+from models import OutboxMessage
+from outbox import album_media, drain_outbox, enqueue_message
+
+
+class StubBot:
+    """
+    Заменитель Bot: запоминает отправленные тексты, а для текстов из errors
+    выбрасывает указанное исключение.
+    """
+
+    def __init__(self, errors: dict = None):
+        self.sent = []
+        self.errors = errors or {}
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if text in self.errors:
+            raise self.errors[text]
+        self.sent.append((str(chat_id), text))
+
+
+def drain(bot) -> None:
+    asyncio.run(drain_outbox(SimpleNamespace(bot=bot)))
+
+
+def by_key(session) -> dict:
+    session.expire_all()
+    return {message.idempotency_key: message for message in session.query(OutboxMessage)}
+
+
+def enqueue_approval(session, author_chat: int, message_id: int, post: str, responsible: str = 'kb') -> None:
+    key = f"approval:{author_chat}:{message_id}"
+    enqueue_message(session, -100, 'send_message', idempotency_key=f"{key}:post", text=post)
+    enqueue_message(session, -100, 'send_message', idempotency_key=f"{key}:responsible", text=responsible)
+
+
+def test_enqueue_is_idempotent(session):
+    first = enqueue_message(session, 5, 'send_message', idempotency_key='k', text='a')
+    session.commit()
+    second = enqueue_message(session, 5, 'send_message', idempotency_key='k', text='b')
+
+    assert second.id == first.id
+    assert session.query(OutboxMessage).count() == 1
+    assert json.loads(second.payload) == {'text': 'a'}
+
+
+def test_enqueue_rejects_unsupported_method(session):
+    with pytest.raises(ValueError):
+        enqueue_message(session, 5, 'send_dice')
+
+
+def test_album_media_puts_caption_on_first_item():
+    media = album_media(['a', 'b'], caption='c', parse_mode='MarkdownV2')
+    assert media == [
+        {'type': 'photo', 'media': 'a', 'caption': 'c', 'parse_mode': 'MarkdownV2'},
+        {'type': 'photo', 'media': 'b'},
+    ]
+
+
+def test_backoff_doubles_and_is_capped():
+    delays = [outbox._backoff_delay(attempt) for attempt in range(1, 30)]
+    assert delays[1] == 2 * delays[0]
+    assert max(delays) == OUTBOX_BACKOFF_MAX
+
+
+def test_drain_sends_chat_messages_in_order(session):
+    for index in range(3):
+        enqueue_message(session, 5, 'send_message', text=str(index))
+    session.commit()
+
+    bot = StubBot()
+    drain(bot)
+
+    assert bot.sent == [('5', '0'), ('5', '1'), ('5', '2')]
+    assert {message.status for message in by_key(session).values()} == {'sent'}
+
+
+def test_rejected_post_fails_keyboard_and_notifies_author(session):
+    enqueue_approval(session, 7, 1, 'bad')
+    enqueue_approval(session, 7, 2, 'good')
+    session.commit()
+
+    bot = StubBot(errors={'bad': BadRequest("Can't parse entities")})
+    drain(bot)
+    drain(bot)
+
+    messages = by_key(session)
+    assert messages['approval:7:1:post'].status == 'failed'
+    assert messages['approval:7:1:responsible'].status == 'failed'
+    assert messages['approval:7:1:responsible'].attempts == 0
+    assert messages['approval:7:2:post'].status == 'sent'
+    assert messages['approval:7:2:responsible'].status == 'sent'
+    assert messages['approval:7:1:failed'].status == 'sent'
+    assert ('-100', 'kb') in bot.sent
+    assert [text for chat, text in bot.sent if chat == '7'] == [
+        "Не удалось отправить пост на согласование. Пожалуйста, создайте его заново: /create_post"
+    ]
+
+
+def test_network_error_is_retried_and_blocks_the_chat(session):
+    enqueue_approval(session, 7, 1, 'flaky')
+    session.commit()
+
+    bot = StubBot(errors={'flaky': NetworkError('timeout')})
+    drain(bot)
+
+    messages = by_key(session)
+    post = messages['approval:7:1:post']
+    assert post.status == 'pending'
+    assert post.attempts == 1
+    assert post.next_attempt_at > datetime.utcnow()
+    # Клавиатура ждёт, пока не уйдёт пост над ней
+    assert messages['approval:7:1:responsible'].status == 'pending'
+    assert bot.sent == []
+
+
+def test_retry_after_uses_telegram_delay(session):
+    enqueue_message(session, 5, 'send_message', idempotency_key='k', text='slow')
+    session.commit()
+
+    drain(StubBot(errors={'slow': RetryAfter(120)}))
+
+    message = by_key(session)['k']
+    delay = (message.next_attempt_at - datetime.utcnow()).total_seconds()
+    assert message.status == 'pending'
+    assert 100 < delay <= 120
+
+
+def test_exhausted_retries_fail_dependents(session):
+    enqueue_approval(session, 7, 1, 'flaky')
+    session.commit()
+    post = session.query(OutboxMessage).filter_by(idempotency_key='approval:7:1:post').one()
+    post.attempts = OUTBOX_MAX_ATTEMPTS - 1
+    session.commit()
+
+    drain(StubBot(errors={'flaky': NetworkError('timeout')}))
+
+    messages = by_key(session)
+    assert messages['approval:7:1:post'].status == 'failed'
+    assert messages['approval:7:1:responsible'].status == 'failed'
+    assert messages['approval:7:1:failed'].status == 'pending'
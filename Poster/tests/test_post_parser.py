@@ -0,0 +1,90 @@
+# tests/test_post_parser.py
+
+from utils.post_parser import looks_structured, parse_structured_post
+
+
+def test_full_post_is_parsed():
+    values, invalid = parse_structured_post(
+        "Заголовок: Лекция о космосе\n"
+        "Дата: 25.12.2023\n"
+        "Время: 18:30-20:00\n"
+        "Место: Планетарий\n"
+        "Ссылка: https://maps.example.com/p\n"
+        "Текст: Вход свободный\n"
+        "Контакт: @org"
+    )
+    assert invalid == set()
+    assert values == {
+        'title': 'Лекция о космосе',
+        'date': '25.12.2023',
+        'time_start': '18:30',
+        'time_end': '20:00',
+        'place_name': 'Планетарий',
+        'place_url': 'https://maps.example.com/p',
+        'text': 'Вход свободный',
+        'contact': '@org',
+    }
+
+
+def test_labels_are_case_insensitive_and_have_synonyms():
+    values, _ = parse_structured_post("НАЗВАНИЕ: Концерт\nописание: Живая музыка\nКонтакты: 123")
+    assert values == {'title': 'Концерт', 'text': 'Живая музыка', 'contact': '123'}
+
+
+def test_unlabeled_lines_continue_previous_field():
+    values, _ = parse_structured_post("Заголовок: Встреча\nТекст: Первая строка\nВторая строка\n\nТретья")
+    assert values['text'] == "Первая строка\nВторая строка\n\nТретья"
+
+
+def test_lines_before_first_label_are_ignored():
+    values, _ = parse_structured_post("Привет!\nЗаголовок: Встреча\nДата: 01.02")
+    assert values == {'title': 'Встреча', 'date': '01.02'}
+
+
+def test_time_range_separators_and_normalization():
+    for range_text in ("9.00 – 10.30", "9:00 до 10:30", "09:00—10:30"):
+        values, invalid = parse_structured_post(f"Заголовок: А\nВремя: {range_text}")
+        assert (values['time_start'], values['time_end']) == ('09:00', '10:30'), range_text
+        assert invalid == set()
+
+
+def test_single_time_is_start():
+    values, _ = parse_structured_post("Заголовок: А\nВремя: 19:00")
+    assert values['time_start'] == '19:00'
+    assert 'time_end' not in values
+
+
+def test_explicit_start_and_end_win_over_range():
+    values, _ = parse_structured_post("Время: 10:00-11:00\nНачало: 09:00\nКонец: 12:00")
+    assert (values['time_start'], values['time_end']) == ('09:00', '12:00')
+
+
+def test_date_separators_are_normalized():
+    values, invalid = parse_structured_post("Заголовок: А\nДата: 25/12/2023")
+    assert values['date'] == '25.12.2023'
+    assert invalid == set()
+
+
+def test_invalid_values_are_reported_and_dropped():
+    values, invalid = parse_structured_post(
+        "Заголовок: А\nДата: завтра\nВремя: 25:00\nСсылка: не ссылка"
+    )
+    assert invalid == {'date', 'time_start', 'place_url'}
+    assert values == {'title': 'А'}
+
+
+def test_empty_values_are_skipped():
+    values, _ = parse_structured_post("Заголовок: \nДата: 01.02")
+    assert values == {'date': '01.02'}
+
+
+def test_looks_structured_needs_two_known_labels():
+    assert looks_structured("Заголовок: А\nДата: 01.02")
+    assert not looks_structured("Заголовок: А")
+    assert not looks_structured("Кстати: привет\nВопрос: как дела")
+    assert not looks_structured(None)
+
+
+def test_url_with_colon_keeps_its_value():
+    values, _ = parse_structured_post("Заголовок: А\nСсылка: https://example.com:8080/x")
+    assert values['place_url'] == 'https://example.com:8080/x'
@@ -0,0 +1,118 @@
+# tests/test_revisions.py
+
+from config import DRAFT_PATCH_MIN_LENGTH, DRAFT_SNAPSHOT_INTERVAL
+from models import Draft, DraftRevision
+from revisions import (
+    apply_delta,
+    apply_patch,
+    draft_fields,
+    list_revisions,
+    make_delta,
+    reconstruct,
+    record_revision,
+    restore_revision,
+    text_patch,
+)
+
+LONG_TEXT = "Приглашаем всех на встречу клуба любителей настольных игр. " * 5
+
+
+# Как и save_draft, каждое сохранение — отдельная транзакция
+
+def create_draft(session, **fields) -> Draft:
+    draft = Draft(user_id=1, **fields)
+    session.add(draft)
+    session.flush()
+    record_revision(session, draft)
+    session.commit()
+    return draft
+
+
+def edit(session, draft: Draft, **fields):
+    previous = draft_fields(draft)
+    for field, value in fields.items():
+        setattr(draft, field, value)
+    revision = record_revision(session, draft, previous)
+    session.commit()
+    return revision
+
+
+def test_patch_round_trip():
+    for old, new in [("abc", "abXc"), ("", "new"), ("old", ""), (LONG_TEXT, LONG_TEXT.replace("клуба", "кружка"))]:
+        assert apply_patch(old, text_patch(old, new)) == new
+
+
+def test_delta_patches_long_text_and_replaces_short_values():
+    old = {'title': 'A', 'text': LONG_TEXT, 'image': 'x'}
+    new = {'title': 'B', 'text': LONG_TEXT + "!", 'image': None}
+    delta = make_delta(old, new)
+
+    assert len(LONG_TEXT) >= DRAFT_PATCH_MIN_LENGTH
+    assert delta['title'] == 'B'
+    assert delta['image'] is None
+    assert isinstance(delta['text'], list)
+    assert apply_delta(old, delta) == new
+
+
+def test_unchanged_fields_are_not_in_delta():
+    fields = {'title': 'A', 'text': LONG_TEXT}
+    assert make_delta(fields, dict(fields)) == {}
+
+
+def test_every_revision_can_be_reconstructed(session):
+    draft = create_draft(session, title='Встреча', text=LONG_TEXT)
+    states = {1: draft_fields(draft)}
+    for number in range(2, 2 * DRAFT_SNAPSHOT_INTERVAL + 3):
+        edit(session, draft, title=f"Встреча {number}", text=LONG_TEXT + str(number))
+        states[number] = draft_fields(draft)
+    session.commit()
+
+    for number, fields in states.items():
+        assert reconstruct(session, draft.id, number) == fields, number
+    assert reconstruct(session, draft.id, len(states) + 1) is None
+
+
+def test_snapshots_are_taken_every_interval(session):
+    draft = create_draft(session, title='A')
+    for number in range(2, 2 * DRAFT_SNAPSHOT_INTERVAL + 2):
+        edit(session, draft, title=str(number))
+    session.commit()
+
+    snapshots = [number for number, kind, *_ in list_revisions(session, draft.id) if kind == 'snapshot']
+    assert sorted(snapshots) == [1, DRAFT_SNAPSHOT_INTERVAL + 1, 2 * DRAFT_SNAPSHOT_INTERVAL + 1]
+
+
+def test_unchanged_save_records_nothing(session):
+    draft = create_draft(session, title='A')
+    assert edit(session, draft, title='A') is None
+    assert session.query(DraftRevision).count() == 1
+
+
+def test_changed_fields_are_listed(session):
+    draft = create_draft(session, title='A', date='01.02')
+    revision = edit(session, draft, date='02.02', contact='@me')
+    assert revision.changed == 'date,contact'
+
+
+def test_draft_without_history_gets_its_previous_state_first(session):
+    draft = Draft(user_id=1, title='Старый')
+    session.add(draft)
+    session.commit()
+
+    revision = edit(session, draft, title='Новый')
+    assert revision.number == 2
+    assert reconstruct(session, draft.id, 1)['title'] == 'Старый'
+    assert reconstruct(session, draft.id, 2)['title'] == 'Новый'
+
+
+def test_restore_is_recorded_as_a_new_revision(session):
+    draft = create_draft(session, title='A', text=LONG_TEXT)
+    edit(session, draft, title='B', text=None)
+    session.commit()
+
+    revision = restore_revision(session, draft, 1)
+    session.commit()
+    assert revision.number == 3
+    assert (draft.title, draft.text) == ('A', LONG_TEXT)
+    assert restore_revision(session, draft, 3) is False
+    assert restore_revision(session, draft, 10) is None
@@ -0,0 +1,130 @@
+# tests/test_simhash.py
+
+from datetime import datetime, timedelta
+
+from models import Submission
+from submissions import find_near_duplicates, fingerprint_text, record_submission
+from utils.simhash import (
+    BANDS,
+    BAND_BITS,
+    BAND_MASK,
+    SIMHASH_BITS,
+    bands,
+    hamming_distance,
+    normalize_text,
+    simhash,
+    to_signed,
+    to_unsigned,
+)
+
+TEXT = (
+    "Приглашаем на открытую лекцию о космосе в городском планетарии. Вход свободный, начало в семь вечера. "
+    "Лектор расскажет о новых телескопах, о поиске планет у других звёзд и о том, как устроены чёрные дыры. "
+    "После лекции можно будет посмотреть на Луну и Сатурн в телескоп на крыше, если позволит погода. "
+    "Приходите всей семьёй, для детей подготовлены отдельные вопросы и небольшие подарки."
+)
+OTHER = "Продам велосипед, почти новый, катался одно лето, недорого, самовывоз из центра, звоните вечером после шести"
+
+
+def add_submission(session, value: int, created_at: datetime) -> Submission:
+    band_values = bands(value)
+    submission = Submission(
+        user_id=1,
+        simhash=to_signed(value),
+        simhash_band0=band_values[0],
+        simhash_band1=band_values[1],
+        simhash_band2=band_values[2],
+        simhash_band3=band_values[3],
+        created_at=created_at,
+    )
+    session.add(submission)
+    return submission
+
+
+def test_normalize_text_drops_escaping_case_and_punctuation():
+    assert normalize_text("Ёлка\\. В  ПАРКЕ\\!") == "елка в парке"
+    assert normalize_text(None) == ""
+
+
+def test_simhash_is_stable_and_ignores_formatting():
+    assert simhash(TEXT) == simhash(TEXT)
+    assert simhash(TEXT) == simhash(TEXT.upper().replace(',', ' \\.'))
+
+
+def test_similar_texts_are_closer_than_different_ones():
+    appended = hamming_distance(simhash(TEXT), simhash(TEXT + " Ждём вас!"))
+    edited = hamming_distance(simhash(TEXT), simhash(TEXT.replace("семь", "восемь")))
+    unrelated = hamming_distance(simhash(TEXT), simhash(OTHER))
+    assert appended < edited < unrelated
+    assert appended <= 3
+
+
+def test_bands_cover_the_whole_value():
+    value = simhash(TEXT)
+    parts = bands(value)
+    assert len(parts) == BANDS
+    assert sum(part << (index * BAND_BITS) for index, part in enumerate(parts)) == value
+
+
+def test_close_values_share_a_band():
+    value = simhash(TEXT)
+    # Три изменённых бита в разных полосах: хотя бы одна полоса совпадает
+    changed = value ^ (1 << 0) ^ (1 << BAND_BITS) ^ (1 << 2 * BAND_BITS)
+    assert any(a == b for a, b in zip(bands(value), bands(changed)))
+
+
+def test_signed_round_trip():
+    for value in (0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1):
+        signed = to_signed(value)
+        assert -(1 << 63) <= signed < 1 << 63
+        assert to_unsigned(signed) == value
+
+
+def test_fingerprint_skips_placeholders():
+    post = {'title': 'Концерт', 'date': 'Не указано', 'time_start': None, 'place_name': 'Не указано', 'text': 'Джаз'}
+    assert fingerprint_text(post) == 'Концерт Джаз'
+
+
+def test_placeholder_only_posts_are_not_duplicates(session):
+    placeholders = {field: 'Не указано' for field in ('date', 'time_start', 'place_name', 'text')}
+    record_submission(session, 1, {'title': 'Концерт', **placeholders})
+    session.commit()
+
+    _, duplicates = record_submission(session, 2, {'title': 'Лекция', **placeholders})
+    assert duplicates == []
+
+
+def test_near_duplicate_is_found(session):
+    first, _ = record_submission(session, 1, {'title': 'Лекция', 'text': TEXT})
+    session.commit()
+
+    _, duplicates = record_submission(session, 2, {'title': 'Лекция', 'text': TEXT + " Ждём вас!"})
+    assert [row.id for row in duplicates] == [first.id]
+
+    _, duplicates = record_submission(session, 3, {'title': 'Велосипед', 'text': OTHER})
+    assert duplicates == []
+
+
+def test_old_duplicate_behind_a_crowded_band_is_found(session):
+    value = simhash(TEXT)
+    now = datetime.utcnow()
+    # Похожая заявка совпадает с искомой только в первой полосе
+    near = value ^ (1 << BAND_BITS) ^ (1 << 2 * BAND_BITS) ^ (1 << 3 * BAND_BITS)
+    duplicate = add_submission(session, near, now - timedelta(days=30))
+    # Много более новых заявок с той же первой полосой, но далёких по остальным битам
+    crowded = value ^ (((1 << SIMHASH_BITS) - 1) & ~BAND_MASK)
+    for _ in range(200):
+        add_submission(session, crowded, now)
+    session.commit()
+
+    matches = find_near_duplicates(session, value)
+    assert [row.id for row in matches] == [duplicate.id]
+
+
+def test_duplicates_outside_the_window_are_ignored(session):
+    value = simhash(TEXT)
+    add_submission(session, value, datetime.utcnow() - timedelta(days=400))
+    session.commit()
+
+    assert find_near_duplicates(session, value, window_days=180) == []
+    assert len(find_near_duplicates(session, value, window_days=0)) == 1
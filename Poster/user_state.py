@@ -0,0 +1,190 @@
+# user_state.py
+
+import json
+import logging
+import os
+import sys
+import time
+
+from config import USER_DATA_TTL, USER_DATA_SPILL_DIR, USER_DATA_SPILL_DAYS
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def deep_size(value, seen: set = None) -> int:
+    """
+    Приблизительный размер объекта в памяти вместе с вложенными объектами, в байтах.
+    """
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_size(key, seen) + deep_size(item, seen) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in value)
+    return size
+
+
+class ActivityTracker:
+    """
+    Время последней активности пользователей и чатов.
+    По нему фоновая задача находит простаивающие user_data и chat_data.
+    """
+
+    def __init__(self):
+        self.users = {}
+        self.chats = {}
+
+    def touch(self, user_id: int = None, chat_id: int = None, now: float = None) -> None:
+        now = time.monotonic() if now is None else now
+        if user_id is not None:
+            self.users[user_id] = now
+        if chat_id is not None:
+            self.chats[chat_id] = now
+
+    def idle(self, seen: dict, keys, ttl: float, now: float) -> list:
+        """
+        Ключи, простаивающие дольше ttl. Ключи без отметки (например, созданные
+        фоновой задачей) считаются активными с момента первой проверки.
+        """
+        result = []
+        for key in keys:
+            last_seen = seen.setdefault(key, now)
+            if now - last_seen > ttl:
+                result.append(key)
+        return result
+
+
+activity = ActivityTracker()
+
+
+def _spill_path(user_id: int) -> str:
+    return os.path.join(USER_DATA_SPILL_DIR, f"{int(user_id)}.json")
+
+
+def spill_user_data(user_id: int, user_data: dict) -> bool:
+    """
+    Сохраняет состояние пользователя на диск вместо того, чтобы просто его удалить.
+    Возвращает False, если сохранение на диск отключено или состояние пустое.
+    """
+    if not USER_DATA_SPILL_DIR or not user_data:
+        return False
+
+    os.makedirs(USER_DATA_SPILL_DIR, exist_ok=True)
+    path = _spill_path(user_id)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(dict(user_data), f, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
+    metrics.increment('user_data.spilled')
+    return True
+
+
+def restore_user_data(user_id: int) -> dict:
+    """
+    Загружает и удаляет с диска сохранённое состояние пользователя.
+    Возвращает None, если сохранённого состояния нет.
+    """
+    if not USER_DATA_SPILL_DIR:
+        return None
+
+    path = _spill_path(user_id)
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.error(f"Не удалось прочитать сохранённое состояние пользователя {user_id}: {e}")
+        return None
+
+    os.remove(path)
+    metrics.increment('user_data.restored')
+    return data
+
+
+def has_spilled_user_data(user_id: int) -> bool:
+    return bool(USER_DATA_SPILL_DIR) and os.path.exists(_spill_path(user_id))
+
+
+def remove_stale_spills(now: float = None) -> int:
+    """
+    Удаляет сохранённые состояния, к которым не возвращались дольше USER_DATA_SPILL_DAYS.
+    """
+    if not USER_DATA_SPILL_DIR or not os.path.isdir(USER_DATA_SPILL_DIR):
+        return 0
+
+    cutoff = (time.time() if now is None else now) - USER_DATA_SPILL_DAYS * 86400
+    removed = 0
+    for entry in os.scandir(USER_DATA_SPILL_DIR):
+        if entry.name.endswith('.json') and entry.stat().st_mtime < cutoff:
+            os.remove(entry.path)
+            removed += 1
+    return removed
+
+
+def record_memory_usage(application) -> dict:
+    """
+    Обновляет метрики количества и приблизительного объёма user_data и chat_data.
+    """
+    usage = {
+        'user_data.users': len(application.user_data),
+        'user_data.bytes': sum(deep_size(data) for data in application.user_data.values()),
+        'chat_data.chats': len(application.chat_data),
+        'chat_data.bytes': sum(deep_size(data) for data in application.chat_data.values()),
+    }
+    for name, value in usage.items():
+        metrics.set_gauge(name, value)
+    return usage
+
+
+async def sweep_user_data(context) -> None:
+    """
+    Фоновая задача: удаляет из памяти user_data и chat_data, простаивающие
+    дольше USER_DATA_TTL. Непустое состояние пользователя при включённом
+    USER_DATA_SPILL_DIR сохраняется на диск и может быть восстановлено.
+    """
+    application = context.application
+    now = time.monotonic()
+
+    evicted_users = 0
+    spilled = 0
+    for user_id in activity.idle(activity.users, list(application.user_data), USER_DATA_TTL, now):
+        user_data = application.user_data.get(user_id)
+        try:
+            if spill_user_data(user_id, user_data):
+                spilled += 1
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Не удалось сохранить состояние пользователя {user_id} на диск: {e}")
+        application.drop_user_data(user_id)
+        activity.users.pop(user_id, None)
+        evicted_users += 1
+
+    evicted_chats = 0
+    for chat_id in activity.idle(activity.chats, list(application.chat_data), USER_DATA_TTL, now):
+        application.drop_chat_data(chat_id)
+        activity.chats.pop(chat_id, None)
+        evicted_chats += 1
+
+    # Отметки пользователей без данных тоже не должны копиться бесконечно
+    for seen, keys in ((activity.users, application.user_data), (activity.chats, application.chat_data)):
+        for key in [key for key, last_seen in seen.items() if key not in keys and now - last_seen > USER_DATA_TTL]:
+            del seen[key]
+
+    removed_spills = remove_stale_spills()
+
+    metrics.increment('user_data.evicted', evicted_users)
+    metrics.increment('chat_data.evicted', evicted_chats)
+    usage = record_memory_usage(application)
+
+    logger.info(
+        f"Очистка состояния: удалено user_data {evicted_users} (сохранено на диск {spilled}), "
+        f"chat_data {evicted_chats}, устаревших файлов {removed_spills}. "
+        f"В памяти: пользователей {usage['user_data.users']} ({usage['user_data.bytes']} байт), "
+        f"чатов {usage['chat_data.chats']} ({usage['chat_data.bytes']} байт)."
+    )
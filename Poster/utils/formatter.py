@@ -6,7 +6,8 @@ def escape_markdown(text: str) -> str:
     """
     Экранирует специальные символы MarkdownV2.
     """
-    escape_chars = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '=', '|', '{', '}', '.', '!']
+    # Обратная косая черта экранируется первой, чтобы не задеть добавленные ниже
+    escape_chars = ['\\', '_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
     for char in escape_chars:
         text = text.replace(char, f'\\{char}')
     return text
@@ -44,3 +45,34 @@ def format_text(text: str) -> str:
     text = replace_hyphens(text)
     text = escape_markdown(text)
     return text
+
+def unescape_markdown(text: str) -> str:
+    """
+    Убирает экранирование MarkdownV2, добавленное escape_markdown.
+    """
+    return re.sub(r'\\(.)', r'\1', text)
+
+def escape_link_url(url: str) -> str:
+    """
+    Готовит отформатированную ссылку для части (...) ссылки MarkdownV2:
+    внутри неё экранируются только ')' и обратная косая черта.
+    """
+    url = unescape_markdown(url)
+    return url.replace('\\', '\\\\').replace(')', '\\)')
+
+def render_post(data: dict) -> str:
+    """
+    Формирует текст поста в формате MarkdownV2 из уже отформатированных полей.
+    """
+    place = data.get('place_name') or 'Не указано'
+    if data.get('place_url') and data['place_url'] != 'Не указано':
+        place = f"[{place}]({escape_link_url(data['place_url'])})"
+
+    return (
+        f"📢 *{data.get('title') or 'Без заголовка'}*\n\n"
+        f"📅 *Дата*: {data.get('date') or 'Не указана'}\n"
+        f"⏰ *Время*: {data.get('time_start') or 'Не указано'} \\- {data.get('time_end') or 'Не указано'}\n"
+        f"📍 *Место*: {place}\n\n"
+        f"{data.get('text') or 'Без текста'}\n\n"
+        f"📞 *Контакт*: {data.get('contact') or 'Не указано'}"
+    )
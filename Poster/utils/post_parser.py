@@ -0,0 +1,127 @@
+# utils/post_parser.py
+
+import re
+
+from utils.validators import validate_date, validate_time, validate_url
+
+# Подписи полей и соответствующие им ключи шагов создания поста.
+# Подпись 'время' задаёт сразу начало и конец в виде диапазона.
+LABELS = {
+    'заголовок': 'title',
+    'название': 'title',
+    'дата': 'date',
+    'время': 'time',
+    'начало': 'time_start',
+    'время начала': 'time_start',
+    'конец': 'time_end',
+    'окончание': 'time_end',
+    'время конца': 'time_end',
+    'время окончания': 'time_end',
+    'место': 'place_name',
+    'название места': 'place_name',
+    'ссылка': 'place_url',
+    'ссылка на место': 'place_url',
+    'карта': 'place_url',
+    'текст': 'text',
+    'описание': 'text',
+    'контакт': 'contact',
+    'контакты': 'contact',
+}
+
+VALIDATORS = {
+    'date': validate_date,
+    'time_start': validate_time,
+    'time_end': validate_time,
+    'place_url': validate_url,
+}
+
+# Минимальное количество распознанных подписей, чтобы считать сообщение структурированным постом
+MIN_LABELS = 2
+
+LABEL_LINE = re.compile(r'^\s*([^\W\d_][^\W\d_ ]*(?: [^\W\d_]+){0,2})\s*[:：]\s*(.*)$')
+TIME_RANGE = re.compile(r'^\s*(\S+)\s*(?:-|–|—|до)\s*(\S+)\s*$')
+
+
+def _match_label(line: str):
+    """
+    Возвращает (ключ поля, значение), если строка начинается с известной подписи.
+    """
+    match = LABEL_LINE.match(line)
+    if not match:
+        return None
+    key = LABELS.get(' '.join(match.group(1).lower().split()))
+    if key is None:
+        return None
+    return key, match.group(2).strip()
+
+
+def _normalize_time(value: str) -> str:
+    # 18.30 -> 18:30, 9:00 -> 09:00
+    value = value.strip().replace('.', ':')
+    if re.fullmatch(r'\d:\d{2}', value):
+        value = f"0{value}"
+    return value
+
+
+def _normalize_date(value: str) -> str:
+    # 25/12/2023 и 25-12-2023 -> 25.12.2023
+    return re.sub(r'[/-]', '.', value.strip())
+
+
+def count_labels(text: str) -> int:
+    return sum(1 for line in (text or '').splitlines() if _match_label(line))
+
+
+def looks_structured(text: str) -> bool:
+    """
+    Проверяет, похоже ли сообщение на пост с подписанными полями.
+    """
+    return count_labels(text) >= MIN_LABELS
+
+
+def parse_structured_post(text: str) -> tuple:
+    """
+    Разбирает сообщение вида «Заголовок: ...», «Дата: ...», «Время: 18:30-20:30» и т.д.
+
+    Строки без подписи продолжают предыдущее поле, поэтому текст поста может быть
+    многострочным. Значения проверяются теми же валидаторами, что и при пошаговом вводе.
+
+    Возвращает кортеж (values, invalid): словарь распознанных значений по ключам шагов
+    и множество ключей, значения которых не прошли проверку.
+    """
+    values = {}
+    current = None
+
+    for line in (text or '').splitlines():
+        labeled = _match_label(line)
+        if labeled:
+            current, value = labeled
+            values[current] = value
+        elif current is not None:
+            values[current] = f"{values[current]}\n{line}" if values[current] else line
+
+    values = {key: value.strip() for key, value in values.items() if value.strip()}
+
+    invalid = set()
+
+    time_range = values.pop('time', None)
+    if time_range:
+        match = TIME_RANGE.match(time_range)
+        if match:
+            values.setdefault('time_start', match.group(1))
+            values.setdefault('time_end', match.group(2))
+        else:
+            values.setdefault('time_start', time_range)
+
+    for key in ('time_start', 'time_end'):
+        if key in values:
+            values[key] = _normalize_time(values[key])
+    if 'date' in values:
+        values['date'] = _normalize_date(values['date'])
+
+    for key, validator in VALIDATORS.items():
+        if key in values and not validator(values[key]):
+            invalid.add(key)
+            del values[key]
+
+    return values, invalid
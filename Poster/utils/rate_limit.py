@@ -0,0 +1,60 @@
+# utils/rate_limit.py
+
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    """
+    Корзина токенов: пополняется со скоростью `rate` токенов в секунду до `burst`.
+    Пополнение вычисляется лениво при обращении, поэтому проверка стоит O(1).
+    """
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated_at', 'warned_at')
+
+    def __init__(self, rate: float, burst: float, now: float = None):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic() if now is None else now
+        self.warned_at = 0.0
+
+    def consume(self, now: float = None, amount: float = 1.0) -> bool:
+        """
+        Забирает `amount` токенов. Возвращает False, если токенов недостаточно.
+        """
+        if now is None:
+            now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return True
+        return False
+
+
+class BucketRegistry:
+    """
+    Корзины токенов по ключу (например, по ID пользователя) с ограничением по памяти:
+    при превышении `max_size` вытесняются корзины, к которым дольше всего не обращались.
+    """
+
+    def __init__(self, rate: float, burst: float, max_size: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_size = max_size
+        self._buckets = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def get(self, key, now: float = None) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst, now)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_size:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
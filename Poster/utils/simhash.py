@@ -0,0 +1,73 @@
+# utils/simhash.py
+
+import hashlib
+import re
+
+SIMHASH_BITS = 64
+# Отпечаток делится на полосы: при расстоянии Хэмминга меньше количества полос
+# хотя бы одна полоса у похожих текстов совпадает целиком
+BANDS = 4
+BAND_BITS = SIMHASH_BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+SHINGLE_SIZE = 3
+
+
+def normalize_text(text: str) -> str:
+    """
+    Приводит текст к виду для сравнения: без экранирования, регистра, пунктуации и лишних пробелов.
+    """
+    text = (text or '').lower().replace('ё', 'е')
+    text = re.sub(r'\\(.)', r'\1', text)
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return ' '.join(text.split())
+
+
+def _features(text: str) -> list:
+    words = normalize_text(text).split()
+    if len(words) < SHINGLE_SIZE:
+        return words
+    return [' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+
+
+def _hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), 'big')
+
+
+def simhash(text: str) -> int:
+    """
+    Вычисляет 64-битный SimHash текста по шинглам из трёх слов.
+    """
+    weights = [0] * SIMHASH_BITS
+    for feature in _features(text):
+        value = _hash(feature)
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+
+    result = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            result |= 1 << bit
+    return result
+
+
+def bands(value: int) -> list:
+    """
+    Делит отпечаток на BANDS полос по BAND_BITS бит.
+    """
+    return [(value >> (band * BAND_BITS)) & BAND_MASK for band in range(BANDS)]
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def to_signed(value: int) -> int:
+    """
+    Переводит беззнаковый 64-битный отпечаток в знаковое число для хранения в SQLite INTEGER.
+    """
+    return value - (1 << SIMHASH_BITS) if value >= 1 << (SIMHASH_BITS - 1) else value
+
+
+def to_unsigned(value: int) -> int:
+    return value + (1 << SIMHASH_BITS) if value < 0 else value
@@ -1,7 +1,7 @@
 # utils/validators.py
 
 import re
-from datetime import datetime
+from datetime import date, datetime
 from urllib.parse import urlparse
 
 def validate_date(date_text: str) -> bool:
@@ -41,3 +41,29 @@ def validate_url(url_text: str) -> bool:
         r'(/.*)?$'    # Путь (опционально)
     )
     return re.match(url_pattern, url_text) is not None
+
+def parse_date(date_text: str, today: date = None):
+    """
+    Разбирает дату в формате ДД.ММ.ГГГГ или ДД.ММ. Дата без года относится
+    к ближайшему такому дню начиная с today. Возвращает None, если разобрать не удалось.
+    """
+    date_text = (date_text or '').strip()
+    try:
+        return datetime.strptime(date_text, '%d.%m.%Y').date()
+    except ValueError:
+        pass
+    try:
+        parsed = datetime.strptime(date_text, '%d.%m')
+    except ValueError:
+        return None
+
+    today = today or datetime.utcnow().date()
+    for year in (today.year, today.year + 1):
+        try:
+            candidate = date(year, parsed.month, parsed.day)
+        except ValueError:
+            # 29.02 в невисокосном году
+            continue
+        if candidate >= today:
+            return candidate
+    return None